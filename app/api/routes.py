@@ -1,8 +1,17 @@
 """Route handlers for the Human Presence Detection System"""
 
-from flask import jsonify, request, render_template
+import os
+import time
 
-from .validators import validate_recording_parameters
+from flask import Response, jsonify, request, render_template
+
+from app.config.settings import ModelConfig
+from app.utils.instrumentation import instrumentation, record, span
+from app.utils.memory_tracker import memory_tracker
+from app.utils.metrics import registry
+from app.utils.profiler import ProfilerBusyError, profiler
+from .validators import (validate_filename, validate_model_load, validate_playback_control,
+                         validate_positive_number, validate_recording_parameters)
 
 
 def create_api_routes(app, wriple_system):
@@ -23,6 +32,24 @@ def create_api_routes(app, wriple_system):
         status = wriple_system.get_system_status()
         return jsonify(status), 200
     
+    @app.route('/get_status_events', methods=['GET'])
+    def get_status_events():
+        """Get the AP, ESP32 and LD2420 status changes, optionally after a Unix time"""
+        since = request.args.get('since', default=None, type=float)
+        return jsonify(wriple_system.health_monitor.events(since)), 200
+    
+    @app.route('/get_network_stats', methods=['GET'])
+    def get_network_stats():
+        """Get the socket receive buffer, kernel drop counters, ingest backlog and request rate"""
+        stats = wriple_system.network_manager.receive_stats
+        stats['packet_loss'] = wriple_system.network_manager.packet_loss
+        return jsonify(stats), 200
+    
+    @app.route('/get_room_presence', methods=['GET'])
+    def get_room_presence():
+        """Get the presence of each room from every ESP32 link"""
+        return jsonify(wriple_system.get_room_presence()), 200
+    
     @app.route('/get_monitor_status', methods=['GET'])
     def get_monitor_status():
         """Get monitoring information"""
@@ -59,11 +86,53 @@ def create_api_routes(app, wriple_system):
         wriple_system.stop_operations()
         return jsonify({'message': 'Stopped capturing'}), 200
     
+    # Model Routes
+    
+    @app.route('/get_model_status', methods=['GET'])
+    def get_model_status():
+        """Get the active and shadow model versions, their latencies and agreement"""
+        return jsonify(wriple_system.model_manager.status), 200
+    
+    @app.route('/load_model', methods=['POST'])
+    def load_model():
+        """Load a model version in the background and swap it in or run it in shadow"""
+        params = request.get_json(silent=True) or {}
+
+        if not validate_model_load(params):
+            return jsonify({'message': 'Invalid model'}), 400
+        
+        path = os.path.join(ModelConfig.MODEL_DIR, params['file']) if params.get('file') else None
+        if not wriple_system.model_manager.load_model(params['model'], path, params.get('shadow', False)):
+            return jsonify({'message': 'A model is already loading'}), 409
+        return jsonify(wriple_system.model_manager.status), 202
+    
+    @app.route('/promote_model', methods=['POST'])
+    def promote_model():
+        """Make the shadow model the active one"""
+        if not wriple_system.model_manager.promote_shadow():
+            return jsonify({'message': 'No shadow model'}), 409
+        return jsonify(wriple_system.model_manager.status), 200
+    
+    @app.route('/stop_shadow_model', methods=['POST'])
+    def stop_shadow_model():
+        """Stop running the shadow model"""
+        if not wriple_system.model_manager.stop_shadow():
+            return jsonify({'message': 'No shadow model'}), 409
+        return jsonify(wriple_system.model_manager.status), 200
+    
     @app.route('/get_amplitude_data', methods=['GET'])
     def get_amplitude_data():
         """Get latest amplitude data subset"""
-        latest_amplitudes = wriple_system.csi_processor.get_amps_heatmap_data()
-        return jsonify({'latestAmplitudes': latest_amplitudes}), 200
+        with span('heatmap'):
+            latest_amplitudes = wriple_system.csi_processor.get_amps_heatmap_data()
+        with span('serialize'):
+            response = jsonify({'latestAmplitudes': latest_amplitudes})
+
+        # Age of the newest packet once its heatmap column is ready to be sent
+        last_packet_ns = wriple_system.last_packet_ns
+        if last_packet_ns is not None:
+            record('packet_to_ui', time.perf_counter_ns() - last_packet_ns)
+        return response, 200
     
     @app.route('/get_radar_data', methods=['GET'])
     def get_radar_data():
@@ -81,6 +150,129 @@ def create_api_routes(app, wriple_system):
         ampVariance = wriple_system.csi_processor.amplitude_variance
         return jsonify({'ampVariance': ampVariance}), 200
     
+    @app.route('/get_latency_stats', methods=['GET'])
+    def get_latency_stats():
+        """Get the latency percentiles of the instrumented pipeline stages"""
+        return jsonify(instrumentation.summary()), 200
+    
+    @app.route('/reset_latency_stats', methods=['POST'])
+    def reset_latency_stats():
+        """Clear the recorded pipeline latencies"""
+        instrumentation.reset()
+        return jsonify({'message': 'Latency statistics cleared'}), 200
+    
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Get the system metrics in the Prometheus text exposition format"""
+        return Response(registry.render(), content_type=registry.content_type), 200
+    
+    @app.route('/start_resource_monitor', methods=['POST'])
+    def start_resource_monitor():
+        """Start sampling the process resources in the background"""
+        params = request.get_json(silent=True) or {}
+        interval = params.get('interval')
+
+        if interval is not None and not validate_positive_number(interval):
+            return jsonify({'message': 'Invalid sample interval'}), 400
+        
+        wriple_system.resource_monitor.start(interval)
+        return jsonify(wriple_system.resource_monitor.status), 200
+    
+    @app.route('/stop_resource_monitor', methods=['POST'])
+    def stop_resource_monitor():
+        """Stop sampling the process resources"""
+        wriple_system.resource_monitor.stop()
+        return jsonify(wriple_system.resource_monitor.status), 200
+    
+    @app.route('/get_resource_history', methods=['GET'])
+    def get_resource_history():
+        """Get the sampled resources, optionally only the latest samples"""
+        last = request.args.get('last', type=int)
+        return jsonify({
+            'status': wriple_system.resource_monitor.status,
+            'samples': wriple_system.resource_monitor.history(last)
+        }), 200
+    
+    @app.route('/export_resource_history', methods=['GET'])
+    def export_resource_history():
+        """Download the sampled resources as a CSV file"""
+        return Response(
+            wriple_system.resource_monitor.export_csv(),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=resource_history.csv'}
+        ), 200
+    
+    @app.route('/capture_profile', methods=['GET'])
+    def capture_profile():
+        """Sample the stacks of all threads and return them as collapsed stacks"""
+        seconds = request.args.get('seconds', default=5.0, type=float)
+        interval = request.args.get('interval', default=None, type=float)
+
+        if not validate_positive_number(seconds) or (interval is not None and not validate_positive_number(interval)):
+            return jsonify({'message': 'Invalid capture duration or interval'}), 400
+        
+        try:
+            profile = profiler.capture(seconds, interval)
+        except ProfilerBusyError as e:
+            return jsonify({'message': str(e)}), 409
+        
+        return Response(
+            profile['collapsed'],
+            mimetype='text/plain',
+            headers={
+                'Content-Disposition': 'attachment; filename=profile.collapsed',
+                'X-Profile-Samples': str(profile['samples']),
+                'X-Profile-Duration': str(profile['duration'])
+            }
+        ), 200
+    
+    @app.route('/memory_snapshot', methods=['POST'])
+    def memory_snapshot():
+        """Take the tracemalloc snapshot later diffs are compared against"""
+        return jsonify(memory_tracker.snapshot()), 200
+    
+    @app.route('/get_memory_diff', methods=['GET'])
+    def get_memory_diff():
+        """Get the top growing allocation sites since the snapshot"""
+        group_by = request.args.get('group_by', default='lineno')
+        top = request.args.get('top', default=None, type=int)
+
+        if group_by not in ['lineno', 'filename', 'traceback'] or (top is not None and top <= 0):
+            return jsonify({'message': 'Invalid grouping or count'}), 400
+        
+        diff = memory_tracker.diff(group_by, top)
+        if diff:
+            return jsonify(diff), 200
+        else:
+            return jsonify({'message': 'No memory snapshot taken'}), 404
+    
+    @app.route('/start_memory_watch', methods=['POST'])
+    def start_memory_watch():
+        """Start logging the memory growth periodically"""
+        params = request.get_json(silent=True) or {}
+        interval = params.get('interval')
+
+        if interval is not None and not validate_positive_number(interval):
+            return jsonify({'message': 'Invalid watch interval'}), 400
+        
+        memory_tracker.start_watch(interval)
+        return jsonify(memory_tracker.status), 200
+    
+    @app.route('/get_memory_watch', methods=['GET'])
+    def get_memory_watch():
+        """Get the periodic memory growth results"""
+        last = request.args.get('last', type=int)
+        return jsonify({
+            'status': memory_tracker.status,
+            'history': memory_tracker.watch_history(last)
+        }), 200
+    
+    @app.route('/stop_memory_tracking', methods=['POST'])
+    def stop_memory_tracking():
+        """Stop the periodic mode and allocation tracing"""
+        memory_tracker.stop()
+        return jsonify(memory_tracker.status), 200
+    
     # CSV File Management Routes
     
     @app.route('/get_csv_files', methods=['GET'])
@@ -100,6 +292,47 @@ def create_api_routes(app, wriple_system):
         else:
             return jsonify({'message': 'File not found'}), 404
     
+    # Playback Routes
+    
+    @app.route('/start_playback', methods=['POST'])
+    def start_playback():
+        """Start replaying a recorded CSV file through the visualizers"""
+        filename = request.get_json()
+
+        if not validate_filename(filename):
+            return jsonify({'message': 'Invalid file name'}), 400
+        
+        status = wriple_system.start_playback(filename)
+        if status:
+            return jsonify(status), 200
+        else:
+            return jsonify({'message': 'File not found'}), 404
+    
+    @app.route('/control_playback', methods=['POST'])
+    def control_playback():
+        """Play, pause, seek or change the speed of the playback"""
+        params = request.get_json()
+
+        if not validate_playback_control(params):
+            return jsonify({'message': 'Invalid playback control'}), 400
+        
+        playback_manager = wriple_system.playback_manager
+        action = params['action']
+        if action == 'play':
+            playback_manager.play()
+        elif action == 'pause':
+            playback_manager.pause()
+        elif action == 'seek':
+            playback_manager.seek(params['value'])
+        elif action == 'speed':
+            playback_manager.set_speed(params['value'])
+        return jsonify(playback_manager.status), 200
+    
+    @app.route('/get_playback_status', methods=['GET'])
+    def get_playback_status():
+        """Get the playback position and state"""
+        return jsonify(wriple_system.playback_manager.status), 200
+    
     # Error Handlers
     
     @app.errorhandler(404)
@@ -3,6 +3,7 @@ Input Validation Module
 Validates incoming API requests and data
 """
 
+from app.config.settings import PlaybackConfig
 from app.utils.logger import setup_logger
 
 _logger = setup_logger('Validators')
@@ -208,3 +209,87 @@ def validate_filename(filename) -> bool:
         return False
     
     return True
+
+def validate_playback_control(params) -> bool:
+    """
+    Validate playback control action and value
+
+    Args:
+        params (dict): Input data with 'action' and an optional 'value'
+
+    Returns:
+        bool: True if valid, False otherwise
+    """
+    try:
+        action = params.get('action')
+        if action in ['play', 'pause']:
+            return True
+
+        if action == 'seek':
+            if float(params.get('value')) < 0:
+                _logger.error(f'Invalid seek position: {params.get("value")}')
+                return False
+            return True
+
+        if action == 'speed':
+            speed = float(params.get('value'))
+            if speed < PlaybackConfig.MIN_SPEED or speed > PlaybackConfig.MAX_SPEED:
+                _logger.error(f'Invalid playback speed: {speed}')
+                return False
+            return True
+
+        _logger.error(f'Invalid playback action: {action}')
+        return False
+    except Exception as e:
+        _logger.error(f'Error validating playback control: {e}')
+        return False
+
+def validate_model_load(params) -> bool:
+    """
+    Validate a model version to load
+
+    Args:
+        params (dict): Input data with 'model', an optional 'file' in the model directory and 'shadow'
+
+    Returns:
+        bool: True if valid, False otherwise
+    """
+    try:
+        extensions = {'forest': '.pkl', 'convlstm': '.keras'}
+        model = params.get('model')
+        if model not in extensions:
+            _logger.error(f'Invalid model: {model}')
+            return False
+
+        filename = params.get('file')
+        if filename is not None:
+            # Only files in the model directory, joblib files can run code when loaded
+            dangerous_chars = ['..', '/', '\\', '<', '>', ':', '"', '|', '?', '*']
+            if (not isinstance(filename, str) or not filename.endswith(extensions[model])
+                    or any(char in filename for char in dangerous_chars) or len(filename) > 255):
+                _logger.error(f'Invalid model file: {filename}')
+                return False
+
+        if not isinstance(params.get('shadow', False), bool):
+            _logger.error(f'Invalid shadow flag: {params.get("shadow")}')
+            return False
+        return True
+    except Exception as e:
+        _logger.error(f'Error validating model load: {e}')
+        return False
+
+def validate_positive_number(value) -> bool:
+    """
+    Validate a positive number such as an interval
+
+    Returns:
+        bool: True if valid, False otherwise
+    """
+    try:
+        if isinstance(value, bool) or float(value) <= 0:
+            _logger.error(f'Invalid positive number: {value}')
+            return False
+        return True
+    except Exception as e:
+        _logger.error(f'Error validating number: {e}')
+        return False
@@ -22,6 +22,29 @@ class NetworkConfig:
     RX_SOCKET_TIMEOUT: float = 0.25     # Timeout used to stop listening
     TX_SOCKET_TIMEOUT: float = 0.1      # Timeout used to stop listening
     RX_BUFFER_SIZE: int = 5120          # Adjusted based on ESP32 CSI and sensor data size
+    RX_SOCKET_BUFFER: int = 1048576     # Kernel receive buffer (SO_RCVBUF) requested to absorb bursts
+    RX_BUFFER_POOL: int = 64            # Preallocated receive buffers, grows if the ingest falls behind
+    RX_BATCH_SIZE: int = 32             # Datagrams read per wake-up before handing them to the ingest
+    AP_CHECK_BYPASS: bool = False       # Skip the SSID check and use AP_BROADCAST_IP as is (simulator)
+    LIVENESS_TIMEOUT: float = 1.0       # Seconds without a CSI reply before a streaming ESP32 is down
+    HEARTBEAT_RETRIES: int = 3          # Heartbeats sent before an idle ESP32 is unreachable
+    HEARTBEAT_INTERVAL: float = 1.0     # Interval between heartbeats of an idle ESP32
+    DISCOVERY_BURST: int = 5            # Broadcasts per discovery attempt
+    DISCOVERY_BACKOFF_MIN: float = 0.5  # Wait after the first unanswered discovery attempt
+    DISCOVERY_BACKOFF_MAX: float = 8.0  # Longest wait between discovery attempts
+    TRANSPORT: str = 'thread'           # Network manager, 'thread' or 'asyncio'
+    HEARTBEAT_RTT_WINDOW: int = 30      # Heartbeat round trips averaged
+    # Back the monitoring request rate off under loss and ingest backlog. Off by default: the CSI, RSSI
+    # and noise windows count packets, so at TX_INTERVAL_MAX the 120 packet prediction window spans
+    # about 12 s instead of about 2 s and the model sees features over a longer time than it was trained on
+    TX_ADAPTIVE: bool = False
+    TX_INTERVAL_MIN: float = None       # Shortest adaptive request interval, TX_INTERVAL if None
+    TX_INTERVAL_MAX: float = 0.1        # Longest adaptive request interval
+    TX_CONTROL_PERIOD: float = 1.0      # Seconds of requests and replies measured per rate adjustment
+    TX_LOSS_TARGET: int = 5             # Rising packet loss percentage above which the rate backs off
+    TX_BACKLOG_LIMIT: int = 32          # Packets waiting for the ingest above which the rate backs off
+    TX_BACKOFF_FACTOR: float = 1.5      # Interval multiplier of a back-off
+    TX_INTERVAL_STEP: float = 0.001     # Interval decrease per period without congestion
 
     def to_dict(self) -> dict:
         return {
@@ -31,7 +54,8 @@ class NetworkConfig:
             'tx_esp32_ip': self.TX_ESP32_IP,
             'tx_port': self.TX_PORT,
             'tx_interval': self.TX_INTERVAL,
-            'record_packet_limit': self.RECORD_PACKET_LIMIT
+            'record_packet_limit': self.RECORD_PACKET_LIMIT,
+            'ap_check_bypass': self.AP_CHECK_BYPASS
         }
 
     def update(self, config: dict):
@@ -42,6 +66,30 @@ class NetworkConfig:
         self.TX_PORT = config.get('tx_port', self.TX_PORT)
         self.TX_INTERVAL = config.get('tx_interval', self.TX_INTERVAL)
         self.RECORD_PACKET_LIMIT = config.get('record_packet_limit', self.RECORD_PACKET_LIMIT)
+        self.AP_CHECK_BYPASS = config.get('ap_check_bypass', self.AP_CHECK_BYPASS)
+
+
+class NodeConfig:
+    """Configuration for capturing from several ESP32 transceivers"""
+    MAX_NODES: int = 1              # ESP32 links captured at once, further ones are ignored
+    NODE_SCAN_INTERVAL: float = 5.0 # Seconds between broadcasts looking for more ESP32 links
+    NODE_TIMEOUT: float = 15.0      # Seconds without a reply before an extra link is offline
+    NODE_ROOMS: dict = {}           # ESP32 IP address to room name
+    DEFAULT_ROOM: str = 'default'   # Room of the links missing from NODE_ROOMS
+
+
+class IngestConfig:
+    """Configuration for where the monitored packets are received and queued"""
+    MODE: str = 'thread'            # 'thread' in the web process, 'process' in a child writing to shared memory
+    RING_SLOTS: int = 512           # Packets kept in each shared memory ring, above the longest window read
+
+
+class HealthConfig:
+    """Configuration for the background system status prober"""
+    PROBE_INTERVAL: float = 2.0     # Seconds between AP and ESP32 probes
+    STATUS_TTL: float = 6.0         # Seconds before the cached status is reported as stale
+    EVENT_HISTORY: int = 100        # Status change events kept
+    LD2420_MISS_LIMIT: int = 35     # Consecutive packets without LD2420 data before it is offline
 
 
 class RecordConfig:
@@ -57,8 +105,11 @@ class FileConfig:
 
     SETTING_FILE: str = os.path.join(_BASE_DIR, 'settings', 'settings.json')
     CSV_DIRECTORY: str = os.path.join(_BASE_DIR, 'data', 'record')
+    CACHE_DIRECTORY: str = os.path.join(_BASE_DIR, 'data', 'cache')
     CSV_FILE_PATTERN: str = r'^WRIPLE_DATA_.*$'
     CSV_FILE_PREFIX: str = 'WRIPLE_DATA_'
+    TIME_INDEX_SUFFIX: str = '.idx'
+    TIME_INDEX_STRIDE: int = 60     # Rows between time index entries
     CSV_COLUMNS: list = [
         'Presence', 'Target_Count', 'State', 'Activity', 'Angle', 'Distance',
         'Obstructed', 'Obstruction', 'Setup_Spacing',
@@ -72,6 +123,43 @@ class FileConfig:
     ]
 
 
+class PlaybackConfig:
+    """Configuration for recorded session playback"""
+    MIN_SPEED: float = 0.5
+    MAX_SPEED: float = 8.0
+    PREROLL: float = 3.0            # Seconds fed before a seek target to refill the signal windows
+
+
+class ResourceConfig:
+    """Configuration for the background resource monitor"""
+    AUTO_START: bool = False
+    SAMPLE_INTERVAL: float = 1.0    # Seconds between samples
+    HISTORY_SIZE: int = 3600        # Samples kept in the ring buffer
+    # Thread name prefixes of each CPU group, unmatched threads are reported as 'other'.
+    # Threads started outside Python are matched by their OS name, 'tf_' are the TensorFlow workers
+    THREAD_GROUPS: dict = {
+        'ingest': ('Receiver', 'NetworkLoop', 'Ingest', 'Playback'),
+        'tx': ('Transmitter',),
+        'inference': ('ModelLoader', 'ModelShadow', 'tf_'),
+        'http': ('waitress', 'HTTPServer'),
+    }
+
+
+class ProfilerConfig:
+    """Configuration for the on-demand sampling profiler"""
+    SAMPLE_INTERVAL: float = 0.005  # Seconds between stack samples
+    MAX_DURATION: float = 60.0      # Longest capture allowed in seconds
+    MAX_DEPTH: int = 128            # Frames kept per stack
+
+
+class MemoryConfig:
+    """Configuration for the tracemalloc memory tracker"""
+    TRACE_FRAMES: int = 1           # Frames stored per allocation, more frames cost more memory
+    TOP_COUNT: int = 15             # Allocation sites reported per diff
+    WATCH_INTERVAL: float = 300.0   # Seconds between snapshots in periodic mode
+    WATCH_HISTORY: int = 288        # Periodic totals kept, 24 hours at the default interval
+
+
 class CsiConfig:
     """Configuration for data visualizers"""
     HEAT_SUBCARRIER_SLICES: list = [[30, 70]]
@@ -109,11 +197,22 @@ class ModelConfig:
     """Configuration for machine learning models directories and paths"""
     _BASE_DIR: Path = Path(__file__).resolve().parent.parent
 
+    MODEL_DIR: str = os.path.join(_BASE_DIR, 'model')  # Model versions loaded at runtime are read from here
     RANDOM_FOREST_PATH: str = os.path.join(_BASE_DIR, 'model', 'rf_model.pkl')
     CONVLSTM_PATH: str = os.path.join(_BASE_DIR, 'model', 'convlstm_model.keras')
     SCALER_PCA_PATH: str = os.path.join(_BASE_DIR, 'model', 'scaler_pca_pipeline.pkl')
+    PRESENCE_MODEL: str = 'convlstm'    # 'convlstm', or 'forest' for the compiled random forest without keras
 
     PRED_SIGNAL_WINDOW: int = 120
+    FEATURE_STRIDE: int = 30        # Packets between windows for offline feature extraction
+    PREDICT_BATCH_SIZE: int = 4096  # Windows per model call of the offline batch prediction
     FEATURE_XHEIGHT: int = 4
     FEATURE_XWIDTH: int = 5
     THRESHOLD_CALIBRATE_COUNT: int = 15
+    NOISE_THRESHOLD: float = 50.0   # Mean signal noise above which the calibration gate reports Noisy
+    CASCADE: bool = False           # Reuse the last prediction while the motion gate sees a static scene
+    MOTION_VARIANCE_DELTA: float = 20.0 # Amplitude variance change since the last inference that is motion
+    MOTION_RSSI_DELTA: float = 2.0  # RSSI mean change in dBm since the last inference that is motion
+    MODEL_MAX_STALENESS: float = 5.0 # Longest a prediction is reused in seconds
+    MODEL_STATS_WINDOW: int = 100   # Latest predictions the model latency of each version covers
+    SHADOW_LOG_INTERVAL: int = 100  # Compared shadow predictions between agreement log lines
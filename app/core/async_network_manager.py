@@ -0,0 +1,209 @@
+"""Network Communication Module on an asyncio event loop"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config.settings import NetworkConfig
+from app.core.network_manager import NetworkManager
+from app.utils.metrics import TX_PACKETS
+
+
+class _ReplyProtocol(asyncio.DatagramProtocol):
+    """Forwards the datagrams of the endpoint to the network manager"""
+
+    def __init__(self, network_manager: 'AsyncNetworkManager'):
+        self._network_manager = network_manager
+
+    def datagram_received(self, data: bytes, addr: tuple):
+        network_manager = self._network_manager
+        now = time.monotonic()
+        network_manager._handle_datagram(data, addr, now, b'|' in data)
+        if network_manager._has_events:
+            network_manager._publish_state_changes()
+
+    def error_received(self, exc: Exception):
+        self._network_manager._logger.error(f'Error receiving packet: {exc}')
+
+
+class AsyncNetworkManager(NetworkManager):
+    """
+    NetworkManager running the receiver, transmitter and discovery on one
+    asyncio event loop instead of a thread each. Replies are read by a
+    datagram protocol, CSI requests are paced with loop timers and the
+    discovery runs as a coroutine. Parsing stays off the loop on one worker.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._loop_thread = None
+        self._transport = None
+        self._tx_handle = None
+        self._discovery_task = None
+        self._discovery_wakeup = None
+        self._loop_ready = threading.Event()
+        # A single worker keeps the packets in order and the loop free
+        self._ingest_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='Ingest')
+        super().__init__()
+
+    # Event loop
+
+    def _start_reader(self):
+        """Start the event loop thread that owns the socket"""
+        self._reader_running = True
+        self._loop_thread = threading.Thread(target=self._run_loop, name='NetworkLoop', daemon=True)
+        self._loop_thread.start()
+        self._loop_ready.wait()
+
+    def _run_loop(self):
+        """Run the endpoint and the discovery until closed"""
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._open_endpoint())
+        except Exception as e:
+            self._logger.error(f'Error setting up datagram endpoint: {e}')
+            self._reader_running = False
+            self._loop_ready.set()
+            return
+        self._loop_ready.set()
+
+        try:
+            self._loop.run_forever()
+        finally:
+            # Let the cancelled discovery finish before closing the loop
+            pending = asyncio.all_tasks(self._loop)
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    async def _open_endpoint(self):
+        """Wrap the socket in a datagram transport and start the discovery"""
+        self._transport, _ = await self._loop.create_datagram_endpoint(
+            lambda: _ReplyProtocol(self), sock=self._socket)
+        self._discovery_wakeup = asyncio.Event()
+        self._discovery_task = self._loop.create_task(self._run_discovery())
+
+    async def _run_discovery(self):
+        """Advance the discovery at the broadcast pacing or when woken up"""
+        while self._reader_running:
+            self._tick(time.monotonic())
+            try:
+                await asyncio.wait_for(self._discovery_wakeup.wait(), NetworkConfig.TX_CONNECT_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._discovery_wakeup.clear()
+
+    def _call_in_loop(self, callback, *args):
+        """Run a callback on the loop, right away if already on the loop thread"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            callback(*args)
+        else:
+            loop.call_soon_threadsafe(callback, *args)
+
+    def check_esp32(self) -> bool:
+        status = super().check_esp32()
+        if self._discovery_wakeup is not None:
+            # Send the first broadcast of a new discovery without waiting for the next tick
+            self._call_in_loop(self._discovery_wakeup.set)
+        return status
+
+    def _send(self, payload: bytes, address: tuple):
+        if self._transport is None:
+            return
+        self._call_in_loop(self._transport.sendto, payload, address)
+
+    def _dispatch(self, on_data, data: bytes, *args):
+        # The protocol hands over a new bytes object per datagram, no buffer to recycle
+        self._dispatched_count += 1
+        self._ingest_executor.submit(self._ingest, on_data, data, *args)
+
+    def _ingest(self, on_data, data: bytes, *args):
+        """Process a reply on the ingest worker"""
+        try:
+            on_data(data, *args)
+        except Exception as e:
+            self._logger.error(f'Error processing packet: {e}')
+        self._ingested_count += 1
+
+    def close(self):
+        """Stop the event loop and close the socket"""
+        self.stop_transmitting()
+        self._receiving = False
+        self._on_data = None
+        self._reader_running = False
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._shutdown)
+            self._loop_thread.join(NetworkConfig.RX_SOCKET_TIMEOUT)
+        self._ingest_executor.shutdown(wait=False)
+
+    def _shutdown(self):
+        """Cancel the loop work and close the transport, on the loop thread"""
+        if self._tx_handle is not None:
+            self._tx_handle.cancel()
+        if self._discovery_task is not None:
+            self._discovery_task.cancel()
+        if self._transport is not None:
+            self._transport.close()
+        self._loop.stop()
+
+    # Transmitter
+
+    def _start_csi_transmission(self):
+        """Start continuous packet transmission paced by loop timers"""
+        self._rate_controller.reset()
+        self._transmitting = True
+        self._call_in_loop(self._schedule_transmission)
+        self._logger.info('Transmitting...')
+
+    def _schedule_transmission(self):
+        """Send the first CSI request, the next ones follow on a fixed schedule"""
+        if self._tx_handle is not None:
+            self._tx_handle.cancel()
+        self._transmit_csi_request(self._loop.time())
+
+    def _transmit_csi_request(self, scheduled: float):
+        """Send a CSI request and schedule the next one"""
+        self._tx_handle = None
+        if not self._transmitting:
+            return
+        try:
+            # Queue the timestamp first since the reply can arrive before sendto returns
+            self._tx_timestamps.append(time.time())
+            self._transport.sendto(NetworkConfig.TX_CSI_REQ_PAYLOAD,
+                                   (NetworkConfig.TX_ESP32_IP, NetworkConfig.TX_PORT))
+            self._tx_packet_count += 1
+            TX_PACKETS.inc()
+            self._transmit_node_requests(self._transport.sendto)
+        except Exception as e:
+            self._logger.error(f'Error sending CSI request packet: {e}')
+            self.stop_transmitting()
+            self.stop_listening()
+            return
+
+        # Keep the schedule from drifting, skip the slots missed while the loop was busy
+        next_time = scheduled + self._rate_controller.interval
+        now = self._loop.time()
+        if next_time < now:
+            next_time = now
+        self._tx_handle = self._loop.call_at(next_time, self._transmit_csi_request, next_time)
+
+    def stop_transmitting(self):
+        """Stop continuous packet transmission and cancel the pending request"""
+        self._transmitting = False
+        self._call_in_loop(self._cancel_transmission)
+        super().stop_transmitting()
+
+    def _cancel_transmission(self):
+        if self._tx_handle is not None:
+            self._tx_handle.cancel()
+            self._tx_handle = None
@@ -0,0 +1,143 @@
+"""Random forest pipeline compiled into NumPy arrays"""
+
+import numpy as np
+
+MAX_DEPTH = 10      # Deepest tree compiled, each tree is padded to a complete tree of this depth
+_CHUNK_ROWS = 256   # Most rows evaluated at once
+_CHUNK_BYTES = 8 * 2 ** 20  # Node features and decisions of a chunk, bounds memory for deep forests
+
+
+class CompiledForest:
+    """
+    Scikit-learn scaler, PCA and random forest pipeline flattened into arrays.
+    The linear steps fold into one matrix product. Every tree is padded to a
+    complete tree in heap order, so all node decisions of a batch come from
+    one comparison and each level is a single vectorized step over every row
+    and tree, instead of a Python call per tree as in scikit-learn.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, feature: np.ndarray,
+                 threshold: np.ndarray, leaf_proba: np.ndarray, depth: int):
+        """
+        Args:
+            weights: Folded linear steps shaped (input features, tree features)
+            bias: Folded linear offset shaped (tree features,)
+            feature: Tree feature of each internal node shaped (heap nodes, trees)
+            threshold: Threshold of each internal node, rows above it go right
+            leaf_proba: Presence probability of each leaf shaped (trees, leaves)
+            depth: Depth of the complete trees
+        """
+        self._weights = weights
+        self._bias = bias
+        self._feature = feature.ravel()
+        self._threshold = threshold.ravel()
+        self._leaf_proba = leaf_proba.ravel()
+        self._depth = depth
+        self._trees = leaf_proba.shape[0]
+        self._leaf_offsets = np.arange(self._trees) * leaf_proba.shape[1]
+        # Each row gathers a float32 feature and a bool decision per internal node of every tree
+        row_bytes = self._feature.size * (np.dtype(np.float32).itemsize + np.dtype(np.bool_).itemsize)
+        self._chunk_rows = int(max(1, min(_CHUNK_ROWS, _CHUNK_BYTES // row_bytes)))
+
+    @classmethod
+    def from_estimator(cls, estimator) -> 'CompiledForest':
+        """
+        Compile a fitted forest or a pipeline of scalers and PCA ending in one
+
+        Args:
+            estimator: RandomForestClassifier, DecisionTreeClassifier or Pipeline ending in one
+
+        Returns:
+            CompiledForest: Compiled equivalent of the estimator
+
+        Raises:
+            ValueError: If a step cannot be compiled or a tree is deeper than MAX_DEPTH
+        """
+        from sklearn.decomposition import PCA
+        from sklearn.preprocessing import StandardScaler
+
+        steps = [step for _, step in estimator.steps] if hasattr(estimator, 'steps') else [estimator]
+        *transforms, forest = steps
+        if not hasattr(forest, 'classes_'):
+            raise ValueError(f'{type(forest).__name__} is not a fitted classifier')
+
+        n_features = (transforms[0] if transforms else forest).n_features_in_
+        # Running composition of the linear steps: x @ weights + bias
+        weights = np.eye(n_features)
+        bias = np.zeros(n_features)
+        for step in transforms:
+            if isinstance(step, StandardScaler):
+                if step.mean_ is not None:
+                    bias = bias - step.mean_
+                if step.scale_ is not None:
+                    weights = weights / step.scale_
+                    bias = bias / step.scale_
+            elif isinstance(step, PCA):
+                bias = (bias - step.mean_) @ step.components_.T
+                weights = weights @ step.components_.T
+                if step.whiten:
+                    scale = np.sqrt(step.explained_variance_)
+                    weights = weights / scale
+                    bias = bias / scale
+            else:
+                raise ValueError(f'Cannot compile pipeline step {type(step).__name__}')
+
+        trees = [tree.tree_ for tree in getattr(forest, 'estimators_', [forest])]
+        depth = max(tree.max_depth for tree in trees)
+        if depth > MAX_DEPTH:
+            raise ValueError(f'Tree depth {depth} is above {MAX_DEPTH}')
+
+        internal = 2 ** depth - 1
+        feature = np.zeros((internal, len(trees)), dtype=np.intp)
+        # Padding nodes always go left and repeat the leaf below them
+        threshold = np.full((internal, len(trees)), np.inf)
+        leaf_proba = np.zeros((len(trees), 2 ** depth))
+        for index, tree in enumerate(trees):
+            # Class fractions of each node, the last class is presence
+            values = tree.value[:, 0, :]
+            proba = values[:, -1] / values.sum(axis=1)
+            stack = [(0, 0, 0)]     # (tree node, heap node, level)
+            while stack:
+                node, heap, level = stack.pop()
+                if level == depth:
+                    leaf_proba[index, heap - internal] = proba[node]
+                    continue
+                left, right = node, node
+                if tree.children_left[node] >= 0:
+                    feature[heap, index] = tree.feature[node]
+                    threshold[heap, index] = tree.threshold[node]
+                    left, right = tree.children_left[node], tree.children_right[node]
+                stack.append((left, 2 * heap + 1, level + 1))
+                stack.append((right, 2 * heap + 2, level + 1))
+
+        return cls(weights, bias, feature, threshold, leaf_proba, depth)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Predict the presence probability of each row
+
+        Args:
+            X: Feature rows shaped (rows, input features)
+
+        Returns:
+            np.ndarray: Presence probability of each row averaged over the trees
+        """
+        X = np.asarray(X, dtype=np.float64)
+        X = X.reshape(len(X), -1)
+        # Trees compare float32 features, the same as scikit-learn
+        Z = (X @ self._weights + self._bias).astype(np.float32)
+        proba = np.empty(len(Z))
+        for start in range(0, len(Z), self._chunk_rows):
+            proba[start:start + self._chunk_rows] = self._predict_chunk(Z[start:start + self._chunk_rows])
+        return proba
+
+    def _predict_chunk(self, Z: np.ndarray) -> np.ndarray:
+        """Walk the rows of a chunk down every tree at once"""
+        go_right = (Z[:, self._feature] > self._threshold).reshape(len(Z), -1, self._trees)
+        # Position of each row within the current level of each tree
+        position = np.zeros((len(Z), self._trees), dtype=np.intp)
+        for level in range(self._depth):
+            first = 2 ** level - 1
+            nodes = go_right[:, first:first + 2 ** level]
+            position = 2 * position + np.take_along_axis(nodes, position[:, None, :], axis=1)[:, 0]
+        return self._leaf_proba[position + self._leaf_offsets].mean(axis=1)
@@ -7,6 +7,7 @@ from scipy.signal import butter, filtfilt
 
 from app.config.settings import CsiConfig, ModelConfig, RecordConfig
 from app.utils.logger import setup_logger
+from app.utils.rolling_stats import RollingStats
 
 
 class CSIProcessor:
@@ -15,7 +16,6 @@ class CSIProcessor:
     def __init__(self):
         self._amplitude_queue = []
         self._phase_queue = []
-        self._amps_variance = 0
         # self._prev_amps_sum = None
 
         parts = [np.arange(sl[0], sl[1]) for sl in CsiConfig.HEAT_SUBCARRIER_SLICES]
@@ -25,10 +25,15 @@ class CSIProcessor:
         self._heat_signal_window = CsiConfig.HEAT_SIGNAL_WINDOW
         self._heat_penalty_factor = CsiConfig.HEAT_PENALTY_FACTOR
         self._heat_diff_threshold = CsiConfig.HEAT_DIFF_THRESHOLD
+        # Rolling mean of the heat subcarriers, updated once per packet
+        self._heat_window_stats = RollingStats(self._heat_signal_window, (self._heat_subcarrier_count,))
 
         self._cutoff = CsiConfig.CUTOFF
         self._fs = CsiConfig.FS
         self._order = CsiConfig.ORDER
+        nyquist = 0.5 * self._fs
+        self._filter_b, self._filter_a = butter(self._order, self._cutoff / nyquist,
+                                                btype='low', analog=False)
         
         self._pred_signal_window = ModelConfig.PRED_SIGNAL_WINDOW
         self._queue_max_packets = RecordConfig.CSI_QUEUE_LIMIT
@@ -41,14 +46,27 @@ class CSIProcessor:
         Args:
             raw_csi: Separated and validated Wi-Fi CSI data from ESP32
         """
-        amplitudes = self._compute_amps_phases(raw_csi)
-        amplitudes = np.array(amplitudes)[self._amps_subcarriers]
+        amplitudes = self.compute_amplitudes(raw_csi)
 
         while len(self._amplitude_queue) > self._queue_max_packets:
             self._amplitude_queue.pop(0)
         
         self._amplitude_queue.append(amplitudes)
+        self._heat_window_stats.push(amplitudes[self._heat_subcarrier_slices])
     
+    def compute_amplitudes(self, raw_csi: list) -> np.ndarray:
+        """
+        Compute the amplitudes of the selected subcarriers
+
+        Args:
+            raw_csi: Separated and validated Wi-Fi CSI data from ESP32
+
+        Returns:
+            np.ndarray: Amplitude of each subcarrier in AMPS_SUBCARRIER
+        """
+        amplitudes = self._compute_amps_phases(raw_csi)
+        return np.array(amplitudes)[self._amps_subcarriers]
+
     def _compute_amps_phases(self, raw_csi: list) -> tuple[list, list]:
         """
         Compute amplitude and phase from raw CSI I/Q data
@@ -79,32 +97,23 @@ class CSIProcessor:
         Returns:
             list: Highlighted amplitudes
         """
-        if len(self._amplitude_queue) < self._heat_signal_window:
+        if not self._heat_window_stats.is_full:
             last = np.asarray(self._amplitude_queue[-1])
             return last[self._heat_subcarrier_slices].tolist()
         
-        latest_window = np.asarray(self._amplitude_queue[-self._heat_signal_window:])
-        # latest_window = self._apply_lowpass_filter(latest_window)
-        diff = self._compute_latest_diff(latest_window)
+        diff = self._compute_latest_diff()
         filtered_data = self._apply_diff_threshold(diff)
         return filtered_data
     
-    def _compute_latest_diff(self, latest_window: np.ndarray) -> np.ndarray:
+    def _compute_latest_diff(self) -> np.ndarray:
         """
         Compute difference between the latest packet and the latest window mean
         over the configured subcarrier slice.
 
-        Args:
-            latest_window: Recent amplitude data window
-
         Returns:
             np.ndarray: Difference array
         """
-        mean_per_subcarrier = np.mean(latest_window[:, self._heat_subcarrier_slices], axis=0)
-        diff = np.abs(latest_window[-1, self._heat_subcarrier_slices] - mean_per_subcarrier)
-        # Store highest absolute diff
-        self._amps_variance = diff.sum()
-        return diff
+        return np.abs(self._heat_window_stats.latest - self._heat_window_stats.mean)
 
     def _apply_diff_threshold(self, diff: np.ndarray) -> list:
         """
@@ -125,38 +134,39 @@ class CSIProcessor:
         ).tolist()
         return highlighted
     
-    def _apply_lowpass_filter(self, data) -> np.ndarray:
+    def _apply_lowpass_filter(self, data, axis: int = 0) -> np.ndarray:
         """
         Remove the high frequency noise using a low-pass Butterworth filter
 
         Args:
             data: Input signal data to be filtered
+            axis: Axis of the data to filter along
 
         Returns:
             np.ndarray: Filtered signal data
         """
-        nyquist = 0.5 * self._fs
-        normal_cutoff = self._cutoff / nyquist
-        b, a = butter(self._order, normal_cutoff, btype='low', analog=False)
-        y = filtfilt(b, a, data, axis=0)
+        y = filtfilt(self._filter_b, self._filter_a, data, axis=axis)
         return y
     
-    def _preprocess_amplitudes(self, amplitudes) -> list:
+    def preprocess_amplitudes(self, amplitudes) -> np.ndarray:
         """
-        Preprocess amplitude data by applying low-pass filter and shrinkage
+        Preprocess amplitude data by applying low-pass filter and shrinkage.
+        Accepts a single window shaped (packets, subcarriers) or a batch of
+        windows shaped (windows, packets, subcarriers).
 
         Args:
-            amplitudes: List of amplitude data arrays
+            amplitudes: Amplitude data window or batch of windows
 
         Returns:
-            list: Preprocessed amplitude data with difference appended
+            np.ndarray: Preprocessed amplitude mean per subcarrier for each window
 
         """
-        amp_data = [self._apply_lowpass_filter(amp) for amp in amplitudes]
-        mean_per_sub = np.mean(amp_data, axis=0)
+        # Filter each packet across its subcarriers
+        amp_data = self._apply_lowpass_filter(np.asarray(amplitudes, dtype=np.float64), axis=-1)
+        mean_per_sub = np.mean(amp_data, axis=-2, keepdims=True)
 
         # Euclidean distance of each packet to the mean vector
-        distances = np.linalg.norm(amp_data - mean_per_sub, axis=1)
+        distances = np.linalg.norm(amp_data - mean_per_sub, axis=-1)
 
         threshold = 8.0     # Threshold for keeping original value
         min_shrink = 0.1    # Minimum shrink factor for very far samples
@@ -168,9 +178,9 @@ class CSIProcessor:
             min_shrink + (1.0 - min_shrink) * np.exp(-decay * (distances - threshold))
         )
 
-        amp_arr = mean_per_sub + shrink_factors[:, None] * (amp_data - mean_per_sub)
+        amp_arr = mean_per_sub + shrink_factors[..., None] * (amp_data - mean_per_sub)
 
-        amplitudes_mean = np.mean(amp_arr, axis=0)
+        amplitudes_mean = np.mean(amp_arr, axis=-2)
         # amplitudes_sum = np.sum(amplitudes_mean[:52])
 
         # if self._prev_amps_sum is None:
@@ -178,7 +188,7 @@ class CSIProcessor:
         # amplitudes_diff = np.abs(amplitudes_sum - self._prev_amps_sum)
         # amplitudes_diff = np.abs(np.diff(amplitudes_sum, prepend=self._prev_amps_sum))
         # self._prev_amps_sum = amplitudes_sum
-        return amplitudes_mean.tolist()
+        return amplitudes_mean
     
     def get_amplitude_window(self) -> list:
         """
@@ -187,12 +197,14 @@ class CSIProcessor:
         Returns:
             list: Amplitude data for the current signal window, or None if not enough data
         """
-        return self._preprocess_amplitudes(self._amplitude_queue[-self._pred_signal_window:])
+        window = self._amplitude_queue[-self._pred_signal_window:]
+        return self.preprocess_amplitudes(window).tolist()
 
     def clear_queues(self):
         """Clear amplitude and phase queues"""
         self._amplitude_queue.clear()
         self._phase_queue.clear()
+        self._heat_window_stats.clear()
         self._logger.info('Cleared amplitude and phase queues.')
     
     @property
@@ -203,14 +215,16 @@ class CSIProcessor:
         Returns:
             float: Amplitude variance
         """
-        if len(self._amplitude_queue) < self._heat_signal_window:
+        if not self._heat_window_stats.is_full:
             return 0.0
         
-        latest_window = np.asarray(self._amplitude_queue[-self._heat_signal_window:])
-        # latest_window = self._apply_lowpass_filter(latest_window)
-        self._compute_latest_diff(latest_window)
-        return round(self._amps_variance, 1)
+        return round(float(self._compute_latest_diff().sum()), 1)
     
+    @property
+    def queue_length(self) -> int:
+        """Get the number of packets in the amplitude queue"""
+        return len(self._amplitude_queue)
+
     @property
     def max_packets(self) -> int:
         """Get maximum number of packets to keep in queues"""
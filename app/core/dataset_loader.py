@@ -0,0 +1,256 @@
+"""Dataset Loader Module"""
+
+import csv
+import glob
+import hashlib
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.config.settings import CsiConfig, FileConfig
+from app.utils.logger import setup_logger
+
+# Bump when the cached array layout changes to invalidate old conversions
+_CACHE_VERSION = 1
+_PARAMETER_COUNT = 9
+_DOPPLER_COUNT = 20
+_GATE_COUNT = 16
+
+
+def _amps_subcarriers() -> list:
+    """Subcarrier indices used by CSIProcessor for the amplitude queue"""
+    return [i for s, e in CsiConfig.AMPS_SUBCARRIER for i in range(s, e)]
+
+
+def _parse_list_cells(cells: list, dtype) -> np.ndarray:
+    """
+    Parse equally sized '[a, b, ...]' CSV cells into a single 2D array with one numpy call
+
+    Args:
+        cells: List of bracketed list strings with the same number of values
+
+    Returns:
+        np.ndarray: Array shaped (len(cells), values per cell)
+    """
+    joined = ','.join(cell.strip()[1:-1] for cell in cells)
+    values = np.fromstring(joined, dtype=np.int64, sep=',')
+    return values.reshape(len(cells), -1).astype(dtype)
+
+
+def _parse_int(value: str) -> int:
+    """Parse an integer CSV cell where empty or non-numeric cells become -1"""
+    try:
+        return int(float(value))
+    except ValueError:
+        return -1
+
+
+def _parse_csv_file(path: str, subcarriers: list) -> dict:
+    """
+    Parse a recorded CSV file into arrays. Runs inside the worker processes.
+
+    Args:
+        path: Full path of the CSV file
+        subcarriers: Subcarrier indices kept for the amplitude array
+
+    Returns:
+        dict: Arrays keyed by name
+    """
+    with open(path, mode='r', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        rows = list(reader)
+
+    count = len(rows)
+    csi_column = header.index('Raw_CSI')
+    doppler_column = header.index('LD2420_Doppler_1')
+    tx_column = header.index('Transmit_Timestamp')
+    rx_column = header.index('Received_Timestamp')
+    rssi_column = header.index('RSSI')
+
+    parameters = np.array([[_parse_int(v) for v in row[:_PARAMETER_COUNT]] for row in rows],
+                          dtype=np.int16).reshape(count, _PARAMETER_COUNT)
+    tx_timestamp = np.array([float(row[tx_column]) for row in rows], dtype=np.float64)
+    rx_timestamp = np.array([_parse_int(row[rx_column]) for row in rows], dtype=np.int64)
+    rssi = np.array([_parse_int(row[rssi_column]) for row in rows], dtype=np.int16)
+
+    # Group CSI rows by length so each group is parsed with a single call
+    amplitude = np.full((count, len(subcarriers)), np.nan, dtype=np.float32)
+    csi_valid = np.zeros(count, dtype=bool)
+    groups = {}
+    for idx, row in enumerate(rows):
+        cell = row[csi_column]
+        if len(cell) > 2:
+            groups.setdefault(cell.count(',') + 1, []).append(idx)
+
+    for length, indices in groups.items():
+        if length not in (256, 384):
+            continue
+        iq = _parse_list_cells([rows[i][csi_column] for i in indices], np.float32)
+        amps = np.hypot(iq[:, 0::2], iq[:, 1::2])
+        amplitude[indices] = amps[:, subcarriers]
+        csi_valid[indices] = True
+
+    # Rows without LD2420 data are written without the doppler columns
+    rdm = np.zeros((count, _DOPPLER_COUNT, _GATE_COUNT), dtype=np.int32)
+    rdm_indices = [i for i, row in enumerate(rows) if len(row) >= doppler_column + _DOPPLER_COUNT]
+    if rdm_indices:
+        cells = [cell for i in rdm_indices
+                 for cell in rows[i][doppler_column:doppler_column + _DOPPLER_COUNT]]
+        values = _parse_list_cells(cells, np.int32)
+        rdm[rdm_indices] = values.reshape(len(rdm_indices), _DOPPLER_COUNT, _GATE_COUNT)
+    rdm_valid = np.zeros(count, dtype=bool)
+    rdm_valid[rdm_indices] = True
+
+    return {
+        'parameters': parameters,
+        'labels': parameters[:, 0].copy(),
+        'tx_timestamp': tx_timestamp,
+        'rx_timestamp': rx_timestamp,
+        'rssi': rssi,
+        'amplitude': amplitude,
+        'csi_valid': csi_valid,
+        'rdm': rdm,
+        'rdm_valid': rdm_valid,
+    }
+
+
+class DatasetLoader:
+    """
+    Loads recorded CSV sessions into NumPy arrays.
+    Parsed files are cached as .npy files and memory-mapped on repeated loads.
+    """
+
+    ARRAY_KEYS = ('parameters', 'labels', 'tx_timestamp', 'rx_timestamp', 'rssi',
+                  'amplitude', 'csi_valid', 'rdm', 'rdm_valid')
+
+    def __init__(self, cache_directory: str = None, max_workers: int = None):
+        self._cache_directory = cache_directory or FileConfig.CACHE_DIRECTORY
+        self._max_workers = max_workers
+        self._subcarriers = _amps_subcarriers()
+        self._logger = setup_logger('DatasetLoader')
+
+    def resolve_paths(self, pattern: str) -> list:
+        """
+        Resolve a file path or glob pattern into CSV file paths
+
+        Args:
+            pattern: File path or glob, relative paths are resolved against the record directory
+
+        Returns:
+            list: Sorted list of matching CSV file paths
+        """
+        if not os.path.isabs(pattern) and not os.path.exists(pattern):
+            pattern = os.path.join(FileConfig.CSV_DIRECTORY, pattern)
+        return sorted(p for p in glob.glob(pattern) if p.endswith('.csv'))
+
+    def _cache_path(self, path: str) -> str:
+        """
+        Get the cache directory of a CSV file keyed by its path, size, mtime and subcarriers
+
+        Args:
+            path: Full path of the CSV file
+
+        Returns:
+            str: Cache directory for the converted arrays
+        """
+        stat = os.stat(path)
+        key = f'{_CACHE_VERSION}|{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{self._subcarriers}'
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self._cache_directory, f'{stem}-{digest}')
+
+    def _read_cache(self, cache_path: str) -> dict:
+        """Memory-map the cached arrays, or return None if the cache is missing"""
+        if not os.path.isdir(cache_path):
+            return None
+        try:
+            return {key: np.load(os.path.join(cache_path, f'{key}.npy'), mmap_mode='r')
+                    for key in self.ARRAY_KEYS}
+        except Exception as e:
+            self._logger.warning(f'Discarding unreadable cache {cache_path}: {e}')
+            shutil.rmtree(cache_path, ignore_errors=True)
+            return None
+
+    def _write_cache(self, cache_path: str, arrays: dict):
+        """Write the arrays into a temporary directory then move it into place"""
+        tmp_path = f'{cache_path}.tmp{os.getpid()}'
+        try:
+            os.makedirs(tmp_path, exist_ok=True)
+            for key in self.ARRAY_KEYS:
+                np.save(os.path.join(tmp_path, f'{key}.npy'), arrays[key])
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            self._logger.error(f'Error writing cache {cache_path}: {e}')
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def load_files(self, paths: list) -> list:
+        """
+        Load several CSV files, parsing uncached files in a process pool
+
+        Args:
+            paths: List of CSV file paths
+
+        Returns:
+            list: One dict of memory-mapped arrays per file in the same order
+        """
+        cache_paths = [self._cache_path(p) for p in paths]
+        results = [self._read_cache(c) for c in cache_paths]
+        missing = [i for i, result in enumerate(results) if result is None]
+
+        if missing:
+            self._logger.info(f'Parsing {len(missing)} of {len(paths)} files')
+            workers = min(len(missing), self._max_workers or os.cpu_count() or 1)
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = {i: pool.submit(_parse_csv_file, paths[i], self._subcarriers)
+                               for i in missing}
+                    parsed = {i: future.result() for i, future in futures.items()}
+            else:
+                parsed = {i: _parse_csv_file(paths[i], self._subcarriers) for i in missing}
+
+            for i, arrays in parsed.items():
+                self._write_cache(cache_paths[i], arrays)
+                results[i] = self._read_cache(cache_paths[i]) or arrays
+
+        return results
+
+    def load_file(self, path: str) -> dict:
+        """
+        Load a single CSV file
+
+        Args:
+            path: CSV file path
+
+        Returns:
+            dict: Memory-mapped arrays of the file
+        """
+        return self.load_files([path])[0]
+
+    def load(self, pattern: str) -> dict:
+        """
+        Load one file or a glob of files into concatenated arrays
+
+        Args:
+            pattern: File path or glob pattern
+
+        Returns:
+            dict: Arrays keyed by name with a 'session' array holding each row's file index,
+                  and 'files' holding the matched paths
+        """
+        paths = self.resolve_paths(pattern)
+        if not paths:
+            self._logger.error(f'No CSV files matched {pattern}')
+            return None
+
+        sessions = self.load_files(paths)
+        if len(sessions) == 1:
+            data = dict(sessions[0])
+        else:
+            data = {key: np.concatenate([s[key] for s in sessions]) for key in self.ARRAY_KEYS}
+        data['session'] = np.concatenate(
+            [np.full(len(s['labels']), i, dtype=np.int32) for i, s in enumerate(sessions)])
+        data['files'] = paths
+        return data
@@ -0,0 +1,232 @@
+"""
+Offline Feature Extraction Module
+Slides the live presence preprocessing over recorded sessions
+
+Usage:
+    python -m app.core.feature_extractor "WRIPLE_DATA_*.csv" --window 120 --stride 30 -o features.npz
+    python -m app.core.feature_extractor "WRIPLE_DATA_*.csv" --evaluate
+"""
+
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.config.settings import CsiConfig, FileConfig, ModelConfig
+from app.core.csi_processor import CSIProcessor
+from app.core.dataset_loader import DatasetLoader
+from app.utils.logger import setup_logger
+
+# Bump when the feature layout changes to invalidate old feature caches
+_FEATURE_VERSION = 1
+_HASH_CHUNK_SIZE = 1 << 20
+_PREPROCESS_BATCH = 256
+
+
+def _file_hash(path: str) -> str:
+    """Hash the content of a recorded file"""
+    digest = hashlib.sha1()
+    with open(path, mode='rb') as file:
+        for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _config_key(window: int, stride: int) -> str:
+    """Key of every setting that changes the extracted features"""
+    return (f'{_FEATURE_VERSION}|{window}|{stride}|{CsiConfig.AMPS_SUBCARRIER}'
+            f'|{CsiConfig.CUTOFF}|{CsiConfig.FS}|{CsiConfig.ORDER}')
+
+
+def build_features(csi_processor: CSIProcessor, data: dict, window: int, stride: int) -> tuple:
+    """
+    Build the live presence features over a session with a sliding window.
+    Each window mirrors WripleSystem._predict_presence: RSSI mean and std over
+    the last `window` packets followed by the preprocessed amplitude window.
+
+    Args:
+        csi_processor: Processor used for the amplitude preprocessing
+        data: Session arrays from DatasetLoader
+        window: Number of packets per window
+        stride: Number of packets between windows
+
+    Returns:
+        tuple: (Feature matrix, labels, end packet index of each window)
+    """
+    rssi = np.asarray(data['rssi'], dtype=np.float64)
+    csi_valid = np.asarray(data['csi_valid'])
+    amps = np.asarray(data['amplitude'])[csi_valid]
+    # Number of queued amplitudes once each packet has been processed
+    amps_count = np.cumsum(csi_valid)
+
+    # The live pipeline predicts only once more than `window` RSSI values are queued
+    ends = np.arange(window, len(rssi), stride)
+    ends = ends[amps_count[ends] >= window]
+    if len(ends) == 0:
+        empty = np.empty((0, 2 + amps.shape[1]), dtype=np.float32)
+        return empty, np.empty(0, dtype=np.int16), np.empty(0, dtype=np.int64)
+
+    rssi_windows = np.lib.stride_tricks.sliding_window_view(rssi, window)[ends + 1 - window]
+    amps_windows = np.lib.stride_tricks.sliding_window_view(amps, window, axis=0)
+
+    amps_features = []
+    for start in range(0, len(ends), _PREPROCESS_BATCH):
+        batch_ends = amps_count[ends[start:start + _PREPROCESS_BATCH]]
+        # sliding_window_view puts the window axis last
+        batch = amps_windows[batch_ends - window].transpose(0, 2, 1)
+        amps_features.append(csi_processor.preprocess_amplitudes(batch))
+
+    X = np.column_stack([
+        rssi_windows.mean(axis=1),
+        rssi_windows.std(axis=1),
+        np.concatenate(amps_features),
+    ]).astype(np.float32)
+    y = np.asarray(data['labels'])[ends]
+    return X, y, ends
+
+
+def _extract_file_features(path: str, window: int, stride: int, cache_directory: str) -> dict:
+    """
+    Extract features of a single file, reusing the cached NPZ when available.
+    Runs inside the worker processes.
+
+    Args:
+        path: CSV file path
+        window: Number of packets per window
+        stride: Number of packets between windows
+        cache_directory: Directory of the feature and dataset caches
+
+    Returns:
+        dict: Feature matrix, labels and window end indices
+    """
+    key = hashlib.sha1(f'{_file_hash(path)}|{_config_key(window, stride)}'.encode('utf-8')).hexdigest()
+    cache_path = os.path.join(cache_directory, 'features', f'{key}.npz')
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            return {name: cached[name] for name in cached.files}
+
+    loader = DatasetLoader(cache_directory=cache_directory, max_workers=1)
+    X, y, ends = build_features(CSIProcessor(), loader.load_file(path), window, stride)
+    result = {'X': X, 'y': y, 'ends': ends}
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f'{cache_path}.tmp{os.getpid()}.npz'
+    np.savez(tmp_path, **result)
+    os.replace(tmp_path, cache_path)
+    return result
+
+
+class FeatureExtractor:
+    """Extracts presence features from recorded sessions in a process pool"""
+
+    def __init__(self, window: int = None, stride: int = None,
+                 cache_directory: str = None, max_workers: int = None):
+        self._window = window or ModelConfig.PRED_SIGNAL_WINDOW
+        self._stride = stride or ModelConfig.FEATURE_STRIDE
+        self._cache_directory = cache_directory or FileConfig.CACHE_DIRECTORY
+        self._max_workers = max_workers
+        self._logger = setup_logger('FeatureExtractor')
+
+    def extract(self, pattern: str) -> dict:
+        """
+        Extract features from one file or a glob of files
+
+        Args:
+            pattern: File path or glob pattern
+
+        Returns:
+            dict: 'X' feature matrix, 'y' labels, 'session' file index, 'ends' window end
+                  packet index and 'files' matched paths, or None if no file matched
+        """
+        paths = DatasetLoader(cache_directory=self._cache_directory).resolve_paths(pattern)
+        if not paths:
+            self._logger.error(f'No CSV files matched {pattern}')
+            return None
+
+        args = (self._window, self._stride, self._cache_directory)
+        workers = min(len(paths), self._max_workers or os.cpu_count() or 1)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_extract_file_features, paths, *[[a] * len(paths) for a in args]))
+        else:
+            results = [_extract_file_features(path, *args) for path in paths]
+
+        self._logger.info(f'Extracted {sum(len(r["y"]) for r in results)} windows from {len(paths)} files')
+        return {
+            'X': np.concatenate([r['X'] for r in results]),
+            'y': np.concatenate([r['y'] for r in results]),
+            'ends': np.concatenate([r['ends'] for r in results]),
+            'session': np.concatenate([np.full(len(r['y']), i, dtype=np.int32)
+                                       for i, r in enumerate(results)]),
+            'files': np.asarray(paths),
+        }
+
+
+def evaluate(features: dict, model_manager) -> dict:
+    """
+    Label the extracted windows with the loaded model, calibrating a new threshold per session
+
+    Args:
+        features: Result of FeatureExtractor.extract
+        model_manager: ModelManager with a loaded model
+
+    Returns:
+        dict: Accuracy over the labelled windows, windows per second and the per-window outputs
+    """
+    from app.core.model_manager import PresenceThreshold
+
+    start = time.perf_counter()
+    proba = model_manager.predict_proba_batch(features['X'])
+    labels = np.full(len(proba), None, dtype=object)
+    for session in np.unique(features['session']):
+        rows = np.flatnonzero(features['session'] == session)
+        labels[rows] = model_manager.label_batch(proba[rows], PresenceThreshold())
+    elapsed = time.perf_counter() - start
+
+    # Windows spent calibrating have no label, like the countdown of the live predictions
+    labelled = labels != None
+    correct = (labels[labelled] == 'Yes') == features['y'][labelled].astype(bool)
+    return {
+        'windows': len(proba),
+        'labelled': int(labelled.sum()),
+        'accuracy': round(float(correct.mean()), 4) if labelled.any() else None,
+        'windows_per_second': round(len(proba) / elapsed, 1) if elapsed > 0 else None,
+        'proba': proba,
+        'labels': labels,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract presence features from recorded sessions')
+    parser.add_argument('pattern', help='CSV file or glob, relative to the record directory')
+    parser.add_argument('-o', '--output', default='features.npz', help='Output NPZ file')
+    parser.add_argument('--window', type=int, default=ModelConfig.PRED_SIGNAL_WINDOW)
+    parser.add_argument('--stride', type=int, default=ModelConfig.FEATURE_STRIDE)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache', default=FileConfig.CACHE_DIRECTORY, help='Cache directory')
+    parser.add_argument('--evaluate', action='store_true', help='Label the windows with the model and report accuracy')
+    args = parser.parse_args()
+
+    extractor = FeatureExtractor(args.window, args.stride, args.cache, args.workers)
+    features = extractor.extract(args.pattern)
+    if features is None:
+        raise SystemExit(1)
+
+    np.savez(args.output, **features)
+    print(f'Saved {features["X"].shape} features to {args.output}')
+
+    if args.evaluate:
+        from app.core.model_manager import ModelManager
+        model_manager = ModelManager()
+        if not model_manager.wait_loaded():
+            raise SystemExit(1)
+        report = evaluate(features, model_manager)
+        print(f'Accuracy: {report["accuracy"]} over {report["labelled"]} of {report["windows"]} windows '
+              f'at {report["windows_per_second"]} windows/s')
+
+
+if __name__ == '__main__':
+    main()
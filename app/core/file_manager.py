@@ -2,6 +2,7 @@
 
 import csv
 import datetime
+import io
 import json
 import os
 import re
@@ -9,6 +10,7 @@ import threading
 
 from app.config.settings import FileConfig, NetworkConfig
 from app.utils.logger import setup_logger
+from app.utils.packet_parser import encode_csi_data
 
 
 class FileManager:
@@ -86,6 +88,104 @@ class FileManager:
         else:
             return None
 
+    def read_recorded_packets(self, filename: str, offset: int = None):
+        """
+        Read a recorded CSV file back into ESP32 packet payloads
+
+        Args:
+            filename: Name of the CSV file in the recording directory or a full path
+            offset: Byte offset of the first row to read, taken from the time index
+
+        Yields:
+            tuple: (Transmit timestamp, packet payload, presence label)
+        """
+        path = os.path.join(FileConfig.CSV_DIRECTORY, filename)
+        with open(path, mode='rb') as raw_file:
+            header = next(csv.reader([raw_file.readline().decode('utf-8')]))
+            meta_columns = [header.index(name) for name in
+                            ('Received_Timestamp', 'RSSI', 'Bandwidth', 'Channel', 'Antenna')]
+            tx_column = header.index('Transmit_Timestamp')
+            csi_column = header.index('Raw_CSI')
+            doppler_column = header.index('LD2420_Doppler_1')
+
+            if offset:
+                raw_file.seek(offset)
+            reader = csv.reader(io.TextIOWrapper(raw_file, encoding='utf-8', newline=''))
+
+            for row in reader:
+                raw_csi_cell = row[csi_column]
+                raw_csi = list(map(int, raw_csi_cell[1:-1].split(','))) if len(raw_csi_cell) > 2 else None
+
+                # Rows without LD2420 data were recorded without the doppler columns
+                ld2420_rdm = None
+                if len(row) > doppler_column:
+                    ld2420_rdm = [list(map(int, cell[1:-1].split(',')))
+                                  for cell in row[doppler_column:doppler_column + 20]]
+
+                payload = encode_csi_data(*[row[i] for i in meta_columns], raw_csi, ld2420_rdm)
+                yield float(row[tx_column]), payload, int(row[0]) if row[0] else None
+
+    def _save_time_index(self, csv_path: str, time_index: dict):
+        """
+        Save the timestamp to byte offset index next to its CSV file
+
+        Args:
+            csv_path: Full path of the indexed CSV file
+            time_index: Dictionary with the indexed 'timestamps' and their row 'offsets'
+        """
+        try:
+            with open(csv_path + FileConfig.TIME_INDEX_SUFFIX, mode='w', encoding='utf-8') as file:
+                json.dump(time_index, file)
+        except Exception as e:
+            self._logger.error(f'Error saving time index of {csv_path}: {e}')
+
+    def _build_time_index(self, csv_path: str) -> dict:
+        """
+        Build the time index of a CSV file recorded without one
+
+        Args:
+            csv_path: Full path of the CSV file
+
+        Returns:
+            dict: Dictionary with the indexed 'timestamps' and their row 'offsets'
+        """
+        time_index = {'timestamps': [], 'offsets': []}
+        with open(csv_path, mode='rb') as file:
+            header = file.readline()
+            tx_column = header.decode('utf-8').strip().split(',').index('Transmit_Timestamp')
+            offset = file.tell()
+            for row_number, line in enumerate(iter(file.readline, b'')):
+                if row_number % FileConfig.TIME_INDEX_STRIDE == 0:
+                    # Columns up to the transmit timestamp are never quoted
+                    time_index['timestamps'].append(float(line.split(b',', tx_column + 1)[tx_column]))
+                    time_index['offsets'].append(offset)
+                offset += len(line)
+        return time_index
+
+    def load_time_index(self, filename: str) -> dict:
+        """
+        Load the time index of a recorded CSV file, building it if missing or outdated
+
+        Args:
+            filename: Name of the CSV file in the recording directory or a full path
+
+        Returns:
+            dict: Dictionary with the indexed 'timestamps' and their row 'offsets', or None on error
+        """
+        csv_path = os.path.join(FileConfig.CSV_DIRECTORY, filename)
+        index_path = csv_path + FileConfig.TIME_INDEX_SUFFIX
+        try:
+            if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(csv_path):
+                with open(index_path, mode='r', encoding='utf-8') as file:
+                    return json.load(file)
+
+            time_index = self._build_time_index(csv_path)
+            self._save_time_index(csv_path, time_index)
+            return time_index
+        except Exception as e:
+            self._logger.error(f'Error loading time index of {filename}: {e}')
+            return None
+
     def _compute_sampling_rate(self, timestamps) -> float:
         """
         Compute sampling rate from transmit timestamps
@@ -218,13 +318,25 @@ class FileManager:
         
         try:
             self._init_new_csv()
+            tx_column = FileConfig.CSV_COLUMNS.index('Transmit_Timestamp')
+            time_index = {'timestamps': [], 'offsets': []}
             with open(self._csv_file_path, mode='a', newline='') as file:
                 writer = csv.writer(file)
-                writer.writerows(self._csv_buffer)
+                for row_number, row in enumerate(self._csv_buffer):
+                    if row_number % FileConfig.TIME_INDEX_STRIDE == 0:
+                        time_index['timestamps'].append(float(row[tx_column]))
+                        time_index['offsets'].append(file.tell())
+                    writer.writerow(row)
+            self._save_time_index(self._csv_file_path, time_index)
             self._csv_buffer.clear()
         except Exception as e:
             self._logger.error(f'Error flushing buffer to CSV file: {e}')
 
+    @property
+    def buffered_rows(self) -> int:
+        """Get the number of rows waiting to be written to the CSV file"""
+        return len(self._csv_buffer)
+
     def close(self):
         """Flush any remaining data and close the file manager"""
         with self._lock:
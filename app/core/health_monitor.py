@@ -0,0 +1,142 @@
+"""Health Monitor Module"""
+
+import threading
+import time
+from collections import deque
+
+from app.config.settings import HealthConfig
+from app.utils.logger import setup_logger
+
+
+class HealthMonitor:
+    """
+    Probes the AP and ESP32 status on a background thread and caches it, so
+    status requests never wait for the connection check commands to run
+    """
+
+    def __init__(self, network_manager, ld2420_miss_count):
+        """
+        Args:
+            network_manager: NetworkManager used to check the AP and ESP32
+            ld2420_miss_count: Function returning the consecutive packets without LD2420 data
+        """
+        from app.core.network_manager import NetworkManager
+        self._network_manager: NetworkManager = network_manager
+        self._ld2420_miss_count = ld2420_miss_count
+
+        self._status = {'ap': False, 'esp32': False, 'ld2420': False}
+        self._probed_at = None
+        self._events = deque(maxlen=HealthConfig.EVENT_HISTORY)
+        self._listeners = []
+
+        self._running = False
+        self._wake_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._logger = setup_logger('HealthMonitor')
+
+    def start(self):
+        """Start probing in the background"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='HealthProbe', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop probing"""
+        self._running = False
+        self._wake_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=HealthConfig.PROBE_INTERVAL + 1.0)
+        self._thread = None
+
+    def refresh(self):
+        """Probe again without waiting for the next interval"""
+        self._wake_event.set()
+
+    def subscribe(self, listener):
+        """
+        Register a function called on every status change
+
+        Args:
+            listener: Function called with (component, old status, new status)
+        """
+        self._listeners.append(listener)
+
+    def _run(self):
+        """Probe every interval or when woken up"""
+        while self._running:
+            try:
+                self._probe()
+            except Exception as e:
+                self._logger.error(f'Error probing system status: {e}')
+            self._wake_event.wait(HealthConfig.PROBE_INTERVAL)
+            self._wake_event.clear()
+
+    def _probe(self):
+        """Check the AP and ESP32 and publish the changes"""
+        network_manager = self._network_manager
+        ap_status = network_manager.check_wifi_connection()
+        if ap_status:
+            esp32_status = network_manager.check_esp32()
+        else:
+            # Keep the last ESP32 state while the AP is down, the same as the status route used to
+            esp32_status = self._status['esp32']
+
+        with self._lock:
+            previous = dict(self._status)
+            self._status['ap'] = ap_status
+            self._status['esp32'] = esp32_status
+            self._status['ld2420'] = self._ld2420_online(esp32_status)
+            self._probed_at = time.monotonic()
+            changes = [(k, previous[k], v) for k, v in self._status.items() if previous[k] != v]
+
+        for component, old, new in changes:
+            self._publish(component, old, new)
+
+    def _ld2420_online(self, esp32_status: bool) -> bool:
+        """Derive the LD2420 status from the packets without its data"""
+        return esp32_status and self._ld2420_miss_count() < HealthConfig.LD2420_MISS_LIMIT
+
+    def _publish(self, component: str, old: bool, new: bool):
+        """Record a status change and notify the listeners"""
+        self._events.append({'time': time.time(), 'component': component, 'status': new})
+        self._logger.info(f'{component} status changed to {new}')
+        for listener in self._listeners:
+            try:
+                listener(component, old, new)
+            except Exception as e:
+                self._logger.error(f'Error notifying status change: {e}')
+
+    def events(self, since: float = None) -> list:
+        """
+        Get the recorded status changes
+
+        Args:
+            since: Only return changes after this Unix time, all if None
+
+        Returns:
+            list: Changes from oldest to newest
+        """
+        events = list(self._events)
+        if since is not None:
+            events = [event for event in events if event['time'] > since]
+        return events
+
+    @property
+    def status(self) -> dict:
+        """
+        Get the cached status, the LD2420 status follows the packets between probes
+
+        Returns:
+            dict: AP, ESP32 and LD2420 status with the age of the probe
+        """
+        with self._lock:
+            status = dict(self._status)
+            probed_at = self._probed_at
+        age = time.monotonic() - probed_at if probed_at is not None else None
+        status['ld2420'] = self._ld2420_online(status['esp32'])
+        status['stale'] = age is None or age > HealthConfig.STATUS_TTL
+        status['age'] = round(age, 2) if age is not None else None
+        return status
@@ -0,0 +1,370 @@
+"""
+Ingest of the monitored link in a child process
+
+The child receives the CSI replies, parses them and computes the amplitudes,
+then appends the signals to ring buffers in shared memory. The web process
+reads its windows straight from those buffers through views with the
+interface of the in-process queues, so inference bursts and the GIL of the
+web process do not hold up the receiver.
+"""
+
+import atexit
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.config.settings import CsiConfig, IngestConfig, ModelConfig, NetworkConfig, RecordConfig
+from app.core.csi_processor import CSIProcessor
+from app.core.rdm_processor import RDMProcessor
+from app.utils.logger import setup_logger
+from app.utils.shared_ring import SharedRing
+
+RDM_SHAPE = (20, 16)    # Doppler rows by range gates of an LD2420 packet
+_READ_ATTEMPTS = 3      # Window reads retried when the writer laps them
+
+# Counters written by the child, indices into the shared counter block
+_RX_COUNT = 0
+_PACKET_LOSS = 1
+_LD2420_MISS_COUNT = 2
+_LAST_PACKET_NS = 3
+_TX_INTERVAL_US = 4
+_SAMPLE_RATE_MHZ = 5
+_COUNTER_SLOTS = 6
+
+
+def read_window(ring: SharedRing, count: int, since: int, compute):
+    """
+    Compute over the latest records of a ring, again if the writer overwrote them meanwhile
+
+    Args:
+        ring: Shared ring to read
+        count: Most records in the window
+        since: Sequence counter before which records are ignored
+        compute: Function of the window view
+
+    Returns:
+        Result of compute over a consistent window
+    """
+    for _ in range(_READ_ATTEMPTS):
+        window, total = ring.window(count, since)
+        result = compute(window)
+        if ring.consistent(total, len(window)):
+            break
+    return result
+
+
+class SharedCSIView(CSIProcessor):
+    """CSIProcessor reading the amplitudes from the shared ring instead of its queue"""
+
+    def __init__(self, ring: SharedRing):
+        """
+        Args:
+            ring: Amplitude ring written by the ingest process
+        """
+        super().__init__()
+        self._ring = ring
+        self._since = 0
+
+    def queue_csi(self, raw_csi: list):
+        raise RuntimeError('Amplitudes are queued by the ingest process')
+
+    def get_amps_heatmap_data(self) -> list:
+        return read_window(self._ring, self._heat_signal_window, self._since, self._heat_data)
+
+    def _heat_data(self, window: np.ndarray) -> list:
+        heat = window[:, self._heat_subcarrier_slices]
+        if len(heat) < self._heat_signal_window:
+            return heat[-1].tolist() if len(heat) else []
+        return self._apply_diff_threshold(np.abs(heat[-1] - heat.mean(axis=0)))
+
+    def get_amplitude_window(self) -> list:
+        return read_window(self._ring, self._pred_signal_window, self._since,
+                           lambda window: self.preprocess_amplitudes(window).tolist())
+
+    def clear_queues(self):
+        self._since = self._ring.total
+
+    @property
+    def amplitude_variance(self) -> float:
+        return read_window(self._ring, self._heat_signal_window, self._since, self._heat_variance)
+
+    def _heat_variance(self, window: np.ndarray) -> float:
+        if len(window) < self._heat_signal_window:
+            return 0.0
+        heat = window[:, self._heat_subcarrier_slices]
+        return round(float(np.abs(heat[-1] - heat.mean(axis=0)).sum()), 1)
+
+    @property
+    def queue_length(self) -> int:
+        return min(self._ring.total - self._since, self._queue_max_packets)
+
+
+class SharedRDMView(RDMProcessor):
+    """RDMProcessor reading the RDM packets from the shared ring, the distance smoothing stays local"""
+
+    def __init__(self, ring: SharedRing):
+        """
+        Args:
+            ring: RDM ring written by the ingest process
+        """
+        super().__init__()
+        self._ring = ring
+        self._since = 0
+
+    def queue_rdm(self, rdm_data):
+        raise RuntimeError('RDM packets are queued by the ingest process')
+
+    def _latest_rdm(self):
+        latest = read_window(self._ring, 1, self._since, np.array)
+        return latest[-1] if len(latest) else None
+
+    def clear_queues(self):
+        """Ignore the RDM packets written so far and clear the distance smoothing"""
+        super().clear_queues()
+        self._since = self._ring.total
+
+    @property
+    def queue_length(self) -> int:
+        return min(self._ring.total - self._since, self._queue_max_packets)
+
+
+class SharedRssiView:
+    """IntRingBuffer interface over the RSSI ring, the statistics are computed on read"""
+
+    def __init__(self, ring: SharedRing, capacity: int, window: int):
+        """
+        Args:
+            ring: RSSI ring written by the ingest process
+            capacity: Number of latest values reported by len
+            window: Number of latest values the statistics cover
+        """
+        self._ring = ring
+        self._capacity = capacity
+        self._window = window
+        self._since = 0
+
+    def clear(self):
+        """Ignore the values written so far"""
+        self._since = self._ring.total
+
+    def __len__(self) -> int:
+        return min(self._ring.total - self._since, self._capacity)
+
+    @property
+    def latest(self) -> int:
+        """Get the last value written, None if empty"""
+        window, _ = self._ring.window(1, self._since)
+        return int(window[-1]) if len(window) else None
+
+    def features(self) -> dict:
+        """
+        Get all the window statistics
+
+        Returns:
+            dict: Mean, std, min, max and slope of the window
+        """
+        return read_window(self._ring, self._window, self._since, self._features)
+
+    @staticmethod
+    def _features(window: np.ndarray) -> dict:
+        n = len(window)
+        if not n:
+            return {'mean': 0.0, 'std': 0.0, 'min': None, 'max': None, 'slope': 0.0}
+        values = window.astype(np.int64)
+        total = int(values.sum())
+        sumsq = int(np.dot(values, values))
+        slope = 0.0
+        if n > 1:
+            # Same integer sums as IntRingBuffer so both modes give identical features
+            sum_xy = int(np.dot(np.arange(n, dtype=np.int64), values))
+            sum_x = n * (n - 1) // 2
+            sum_xx = (n - 1) * n * (2 * n - 1) // 6
+            slope = (n * sum_xy - sum_x * total) / (n * sum_xx - sum_x * sum_x)
+        return {
+            'mean': total / n,
+            'std': (max(n * sumsq - total * total, 0) / (n * n)) ** 0.5,
+            'min': int(values.min()),
+            'max': int(values.max()),
+            'slope': slope,
+        }
+
+
+def _run_ingest_process(ring_specs: tuple, counters_name: str, conn):
+    """
+    Receive and queue the monitored packets until closed, entry point of the child process
+
+    Args:
+        ring_specs: Specs of the amplitude, RSSI and RDM rings
+        counters_name: Shared memory block of the counters
+        conn: Pipe end receiving the start, stop and close commands
+    """
+    # Imported here so the parent does not need the receiver to build the views
+    from app.core.network_manager import NetworkManager
+    from app.utils.packet_parser import parse_csi_data
+
+    logger = setup_logger('IngestProcess')
+    amps_ring, rssi_ring, rdm_ring = (SharedRing.attach(spec) for spec in ring_specs)
+    counters_memory = shared_memory.SharedMemory(name=counters_name)
+    counters = np.ndarray((_COUNTER_SLOTS,), dtype=np.int64, buffer=counters_memory.buf)
+    csi_processor = CSIProcessor()
+    network_manager = NetworkManager()
+
+    def on_data(raw_data, tx_timestamp):
+        received_ns = time.perf_counter_ns()
+        parsed_data = parse_csi_data(raw_data, counters[_LD2420_MISS_COUNT])
+        if parsed_data is None:
+            return
+        counters[_LD2420_MISS_COUNT] = parsed_data[1]
+        if parsed_data[7]:
+            amps_ring.push(csi_processor.compute_amplitudes(parsed_data[7]))
+        if parsed_data[0]:
+            rdm_ring.push(parsed_data[8:])
+        rssi_ring.push(parsed_data[3])
+        counters[_RX_COUNT] = network_manager.packet_count
+        counters[_PACKET_LOSS] = network_manager.packet_loss
+        counters[_LAST_PACKET_NS] = received_ns
+        counters[_TX_INTERVAL_US] = int(network_manager.tx_interval * 1e6)
+        counters[_SAMPLE_RATE_MHZ] = int((network_manager.sample_rate or 0.0) * 1e3)
+
+    try:
+        while True:
+            command = conn.recv()
+            if command[0] == 'start':
+                _, esp32_ip, tx_port, tx_interval = command
+                NetworkConfig.TX_ESP32_IP = esp32_ip
+                NetworkConfig.TX_PORT = tx_port
+                NetworkConfig.TX_INTERVAL = tx_interval
+                counters[:] = (0, 0, -1, 0, int(tx_interval * 1e6), 0)
+                network_manager.start_receiving(on_data, False)
+                network_manager._start_csi_transmission()
+            elif command[0] == 'stop':
+                network_manager.stop_transmitting()
+                network_manager.stop_listening()
+                counters[_RX_COUNT] = counters[_PACKET_LOSS] = 0
+            elif command[0] == 'close':
+                break
+    except (EOFError, KeyboardInterrupt):
+        # The web process exited without closing the ingest
+        pass
+    finally:
+        network_manager.close()
+        for ring in (amps_ring, rssi_ring, rdm_ring):
+            ring.close()
+        counters = None
+        counters_memory.close()
+        logger.info('Ingest process stopped')
+
+
+class IngestProcess:
+    """
+    Child process receiving and queueing the packets of the monitored link.
+    The discovery and heartbeats stay on the network manager of the web
+    process, the child only streams from the ESP32 IP address found by it.
+    """
+
+    def __init__(self):
+        slots = IngestConfig.RING_SLOTS
+        amps_count = sum(end - start for start, end in CsiConfig.AMPS_SUBCARRIER)
+        self._amps_ring = SharedRing(slots, (amps_count,), np.float64)
+        self._rssi_ring = SharedRing(slots, (), np.int32)
+        self._rdm_ring = SharedRing(slots, RDM_SHAPE, np.float64)
+        self._counters_memory = shared_memory.SharedMemory(create=True, size=_COUNTER_SLOTS * 8)
+        self._counters = np.ndarray((_COUNTER_SLOTS,), dtype=np.int64, buffer=self._counters_memory.buf)
+        self._counters[:] = (0, 0, -1, 0, 0, 0)
+
+        self.csi_processor = SharedCSIView(self._amps_ring)
+        self.rdm_processor = SharedRDMView(self._rdm_ring)
+        self.rssi = SharedRssiView(self._rssi_ring, RecordConfig.CSI_QUEUE_LIMIT, ModelConfig.PRED_SIGNAL_WINDOW)
+
+        self._process = None
+        self._conn = None
+        self._receiving = False
+        self._closed = False
+        self._logger = setup_logger('IngestProcess')
+        atexit.register(self.close)
+
+    def _spawn(self):
+        """Start the child process, spawned so it does not inherit the web server threads"""
+        context = multiprocessing.get_context('spawn')
+        self._conn, child_conn = context.Pipe()
+        ring_specs = (self._amps_ring.spec, self._rssi_ring.spec, self._rdm_ring.spec)
+        self._process = context.Process(target=_run_ingest_process, name='WripleIngest', daemon=True,
+                                        args=(ring_specs, self._counters_memory.name, child_conn))
+        self._process.start()
+        child_conn.close()
+        self._logger.info(f'Ingest process started with PID {self._process.pid}')
+
+    def start_capture(self):
+        """Start streaming from the ESP32 found by the discovery"""
+        if self._process is None or not self._process.is_alive():
+            self._spawn()
+        for view in (self.csi_processor, self.rdm_processor):
+            view.clear_queues()
+        self.rssi.clear()
+        self._conn.send(('start', NetworkConfig.TX_ESP32_IP, NetworkConfig.TX_PORT, NetworkConfig.TX_INTERVAL))
+        self._receiving = True
+
+    def stop_capture(self):
+        """Stop streaming, the child process stays up for the next session"""
+        self._receiving = False
+        if self._process is not None and self._process.is_alive():
+            self._conn.send(('stop',))
+
+    def close(self):
+        """Stop the child process and free the shared memory"""
+        if self._closed:
+            return
+        self._closed = True
+        self._receiving = False
+        if self._process is not None:
+            if self._process.is_alive():
+                self._conn.send(('close',))
+                self._process.join(NetworkConfig.RX_SOCKET_TIMEOUT * 4)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._conn.close()
+        self._counters = None
+        self._counters_memory.close()
+        self._counters_memory.unlink()
+        for ring in (self._amps_ring, self._rssi_ring, self._rdm_ring):
+            ring.close()
+
+    @property
+    def is_receiving(self) -> bool:
+        """Check if currently streaming"""
+        return self._receiving
+
+    @property
+    def packet_count(self) -> int:
+        """Get the number of packets received in the session"""
+        return int(self._counters[_RX_COUNT])
+
+    @property
+    def packet_loss(self) -> int:
+        """Get the packet loss percentage of the session"""
+        return int(self._counters[_PACKET_LOSS])
+
+    @property
+    def tx_interval(self) -> float:
+        """Get the current CSI request interval in seconds"""
+        return int(self._counters[_TX_INTERVAL_US]) / 1e6
+
+    @property
+    def sample_rate(self) -> float:
+        """Get the CSI replies per second of the last rate control period, None if not measured"""
+        if not self._receiving or not self._counters[_SAMPLE_RATE_MHZ]:
+            return None
+        return int(self._counters[_SAMPLE_RATE_MHZ]) / 1e3
+
+    @property
+    def ld2420_miss_count(self) -> int:
+        """Get the consecutive packets without LD2420 data"""
+        return int(self._counters[_LD2420_MISS_COUNT])
+
+    @property
+    def last_packet_ns(self) -> int:
+        """Get the perf counter time of the latest packet, the clock is system wide on Linux"""
+        last_packet_ns = int(self._counters[_LAST_PACKET_NS])
+        return last_packet_ns or None
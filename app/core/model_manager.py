@@ -1,156 +1,511 @@
 """Model Manager Module"""
 
+import os
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import joblib
 import numpy as np
 
 from app.config.settings import ModelConfig
+from app.core.compiled_forest import CompiledForest
+from app.utils.instrumentation import record
 from app.utils.logger import setup_logger
+from app.utils.rolling_stats import RollingStats
 
 
-class ModelManager:
+class PresenceThreshold:
     """
-    Handles machine learning predictions and data preprocessing 
-    for human presence detection for different models
+    Probability band calibrated on the first predictions of a link, outside of
+    which presence is detected. Each ESP32 link keeps its own band.
     """
-    
+
     def __init__(self):
-        self._model = 2
-        self._model_loaded = False
+        self.reset()
+
+    def reset(self):
+        """Start the calibration over"""
+        self.low = 100.0
+        self.high = 0.0
+        self.calibrate_count = ModelConfig.THRESHOLD_CALIBRATE_COUNT
+
+    def calibrate(self, proba: float, logger=None) -> bool:
+        """
+        Widen the band to a new probability while calibrating
+
+        Args:
+            proba: Predicted probability
+            logger: Logger for the new thresholds, optional
+
+        Returns:
+            bool: Calibration status
+        """
+        if self.calibrate_count > 1:
+            if proba < self.low:
+                self.low = proba - 0.005
+                if logger: logger.info(f'New Low Threshold: {self.low}')
+            elif proba > self.high:
+                self.high = proba + 0.005
+                if logger: logger.info(f'New High Threshold: {self.high}')
+
+            self.calibrate_count -= 1
+            return True
+        else:
+            return False
+
+    def label(self, proba: float) -> str:
+        """Get the presence label of a probability"""
+        return 'Yes' if proba < self.low or proba > self.high else 'No'
 
-        self._presence_model = None
-        self._scaler_pca_pipeline = None
 
+
+
+class _LoadedModel:
+    """One loaded version of a presence model with its latency statistics"""
+
+    def __init__(self, model: str, path: str = None):
+        """
+        Args:
+            model: 'convlstm' or 'forest'
+            path: Model file, the configured file of the model if None
+        """
+        self.model = model
+        self.path = path or (ModelConfig.RANDOM_FOREST_PATH if model == 'forest' else ModelConfig.CONVLSTM_PATH)
+        self.presence_model = None
+        self.compiled_forest = None
+        self.scaler_pca_pipeline = None
+        self.loaded_at = None
+        self.predictions = 0
+        self.latency = RollingStats(ModelConfig.MODEL_STATS_WINDOW)
+        # Request threads, the node predictions and the shadow worker all record
+        self._stats_lock = threading.Lock()
         self._xheight = ModelConfig.FEATURE_XHEIGHT
         self._xwidth = ModelConfig.FEATURE_XWIDTH
 
-        self._model_low_threshold = 100.0
-        self._model_high_threshold = 0.0
-        self._threshold_calibrate_count = ModelConfig.THRESHOLD_CALIBRATE_COUNT
+    def load(self, logger):
+        """
+        Load the model files, run on the loader thread
 
-        self._logger = setup_logger('ModelManager')
-        threading.Thread(target=self._load_model, daemon=True).start()
-    
-    def _load_model(self):
-        """Load all required models"""
+        Args:
+            logger: Logger for the compilation warning
+        """
         # Peform imports loading here for faster startup time
         # Explicitly import something from sklearn to allow PyInstaller to include sklearn
-        from keras.models import load_model
         from sklearn.pipeline import Pipeline
+        if self.model == 'forest':
+            self.presence_model = joblib.load(self.path)
+            try:
+                self.compiled_forest = CompiledForest.from_estimator(self.presence_model)
+            except ValueError as e:
+                # Scikit-learn predicts if the forest cannot be compiled
+                logger.warning(f'Random forest not compiled: {e}')
+        else:
+            from keras.models import load_model
+            self.presence_model = load_model(self.path)
+            self.scaler_pca_pipeline = joblib.load(ModelConfig.SCALER_PCA_PATH)
+        self.loaded_at = time.time()
+
+    def predict_proba(self, X: np.ndarray, batch_size: int = None) -> np.ndarray:
+        """
+        Predict the presence probability of each row
+
+        Args:
+            X: Feature rows shaped (rows, 166)
+            batch_size: Rows per ConvLSTM call, ModelConfig.PREDICT_BATCH_SIZE if None
+
+        Returns:
+            np.ndarray: Presence probability of each row
+        """
+        if self.model == 'forest':
+            if self.compiled_forest is not None:
+                return self.compiled_forest.predict_proba(X)
+            return self.presence_model.predict_proba(X)[:, -1]
+        X_trans = self.scaler_pca_pipeline.transform(X)    # shape (rows, 20)
+        X_seq = X_trans.reshape(len(X), 1, self._xheight, self._xwidth, 1)
+        batch_size = batch_size or ModelConfig.PREDICT_BATCH_SIZE
+        return self.presence_model.predict(X_seq, batch_size=batch_size, verbose=0).ravel()
+
+    def record(self, elapsed_ns: int, role: str):
+        """Count a live prediction and its latency under the 'active' or 'shadow' span"""
+        with self._stats_lock:
+            self.predictions += 1
+            self.latency.push(elapsed_ns / 1e6)
+        record(f'model_{role}', elapsed_ns)
+
+    @property
+    def n_features(self) -> int:
+        """Get the number of input features the model expects"""
+        if self.model == 'forest':
+            return self.presence_model.n_features_in_
+        return self.scaler_pca_pipeline.n_features_in_
+
+    @property
+    def status(self) -> dict:
+        """Get the model version and its latency"""
+        with self._stats_lock:
+            predictions = self.predictions
+            latency = round(float(self.latency.mean), 3) if self.latency.count else None
+        return {
+            'model': self.model,
+            'file': os.path.basename(self.path),
+            'compiled': self.compiled_forest is not None,
+            'loadedAt': self.loaded_at,
+            'predictions': predictions,
+            'latencyMs': latency,
+        }
+
+
+class ModelManager:
+    """
+    Handles machine learning predictions and data preprocessing 
+    for human presence detection for different models.
+    A new model version loads in the background and is swapped in atomically,
+    or first runs in shadow on the same features as the active model so its
+    latency and agreement can be compared before it is promoted.
+    """
+    
+    def __init__(self, model: str = None):
+        """
+        Args:
+            model: 'convlstm' or 'forest', ModelConfig.PRESENCE_MODEL if None
+        """
+        # Replaced as a whole on a swap, predictions read each one once
+        self._active = None
+        self._shadow = None
+        self._loading = None
+        self._load_error = None
+        self._load_lock = threading.Lock()
+        self._listeners = []
+
+        self._threshold = PresenceThreshold()
+        self._shadow_threshold = PresenceThreshold()
+        self._shadow_executor = None
+        self._shadow_pending = None
+        self._shadow_compared = 0
+        self._shadow_agreed = 0
+        self._shadow_dropped = 0
+        self._cpu_time = 0.0
+        self._load_done = threading.Event()
+
+        self._logger = setup_logger('ModelManager')
+        self.load_model(model or ModelConfig.PRESENCE_MODEL)
+    
+    def load_model(self, model: str, path: str = None, shadow: bool = False) -> bool:
+        """
+        Load a model version in the background, then swap it in or run it in shadow
+
+        Args:
+            model: 'convlstm' or 'forest'
+            path: Model file, the configured file of the model if None
+            shadow: Run the new version next to the active one instead of replacing it
+
+        Returns:
+            bool: True if the loading started, False if another model is still loading
+        """
+        if model not in ('convlstm', 'forest'):
+            raise ValueError(f'Unknown model {model}')
+        with self._load_lock:
+            if self._loading is not None:
+                return False
+            loaded = self._loading = _LoadedModel(model, path)
+            self._load_done.clear()
+        threading.Thread(target=self._load_model, args=(loaded, shadow),
+                         name='ModelLoader', daemon=True).start()
+        return True
+
+    def _load_model(self, loaded: _LoadedModel, shadow: bool):
+        """Load a model version and swap it in, run on the loader thread"""
         try:
-            if self._model == 1:
-                self._presence_model = joblib.load(ModelConfig.RANDOM_FOROREST_PATH)
-            elif self._model == 2:
-                self._presence_model = load_model(ModelConfig.CONVLSTM_PATH)
-                self._scaler_pca_pipeline = joblib.load(ModelConfig.SCALER_PCA_PATH)
+            loaded.load(self._logger)
+            if shadow:
+                self._start_shadow(loaded)
             else:
-                raise Exception
-
-            self._model_loaded = True
-            self._logger.info('Models loaded successfully')
+                self._swap(loaded, PresenceThreshold())
+            self._load_error = None
+            self._logger.info(f'Model {loaded.model} loaded from {os.path.basename(loaded.path)}'
+                              f'{" in shadow" if shadow else ""}')
         except Exception as e:
+            self._load_error = f'{loaded.model}: {e}'
             self._logger.error(f'Error loading models: {e}')
-    
-    def _calibrate_threshold(self, proba: float):
+        finally:
+            with self._load_lock:
+                self._loading = None
+            self._load_done.set()
+
+    def _swap(self, loaded: _LoadedModel, threshold: PresenceThreshold):
+        """Make a loaded version the active model and notify the listeners"""
+        old = self._active
+        # Each link calibrated its band on the probabilities of the previous model
+        self._threshold = threshold
+        self._active = loaded
+        if old is None:
+            return
+        for listener in self._listeners:
+            try:
+                listener(old.model, loaded.model)
+            except Exception as e:
+                self._logger.error(f'Error notifying model swap: {e}')
+
+    def _start_shadow(self, loaded: _LoadedModel):
+        """Run a loaded version in shadow with its own calibration"""
+        if self._shadow_executor is None:
+            self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ModelShadow')
+        self._shadow_threshold = PresenceThreshold()
+        self._shadow_compared = 0
+        self._shadow_agreed = 0
+        self._shadow_dropped = 0
+        self._shadow = loaded
+
+    def promote_shadow(self) -> bool:
         """
-        Calibrate the prediction threshold
+        Make the shadow model the active one, keeping the calibration it made in shadow
 
-        Args:
-            proba: New probability threshold
-        
         Returns:
-            bool: Calibration status
+            bool: True if a shadow model was promoted
         """
-        if self._threshold_calibrate_count > 1:
-            if proba < self._model_low_threshold:
-                self._model_low_threshold = proba - 0.005
-                self._logger.info(f'New Low Threshold: {self._model_low_threshold}')
-            elif proba > self._model_high_threshold:
-                self._model_high_threshold = proba + 0.005
-                self._logger.info(f'New High Threshold: {self._model_high_threshold}')
+        shadow = self._shadow
+        if shadow is None:
+            return False
+        self._shadow = None
+        self._log_shadow_stats(shadow)
+        self._swap(shadow, self._shadow_threshold)
+        self._logger.info(f'Shadow model {shadow.model} promoted')
+        return True
 
-            self._threshold_calibrate_count -= 1
-            return True
-        else:
+    def stop_shadow(self) -> bool:
+        """
+        Stop running the shadow model
+
+        Returns:
+            bool: True if a shadow model was running
+        """
+        shadow = self._shadow
+        if shadow is None:
             return False
+        self._shadow = None
+        self._log_shadow_stats(shadow)
+        return True
 
-    def _predict_classical(self, X: list) -> int:
+    def subscribe(self, listener):
         """
-        Detect human presence using classical ML models
+        Register a function called when another model is swapped in
 
         Args:
+            listener: Function called with (old model, new model)
+        """
+        self._listeners.append(listener)
+
+    def _predict_with(self, loaded: _LoadedModel, X: list, threshold: PresenceThreshold, role: str, logger=None):
+        """
+        Detect human presence with one model version
+
+        Args:
+            loaded: Model version
             X: List of RSSI mean, RSSI std, 163 amplitude values and amplitude sum difference
+            threshold: Calibrated threshold of the link
+            role: 'active' or 'shadow'
+            logger: Logger for the probability and thresholds, optional
+
+        Returns:
+            Presence prediction or calibration countdown
+        """
+        start = time.perf_counter_ns()
+        X = np.asarray(X).reshape(1, -1)                    # shape (1, 166)
+        y_proba = float(loaded.predict_proba(X)[0])
+        loaded.record(time.perf_counter_ns() - start, role)
 
+        calibrating = threshold.calibrate(y_proba, logger)
+        if calibrating:
+            # Display the time until detection starts
+            return threshold.calibrate_count
+
+        label = threshold.label(y_proba)
+        if logger: logger.info(f'PRED PROBA: {y_proba}')
+        return label
+
+    def predict(self, data: list, threshold: PresenceThreshold = None) -> str:
+        """
+        Make presence prediction using the selected model
+
+        Args:
+            data: Input data for prediction
+            threshold: Calibrated threshold of the link, the main link if None
+        
         Returns:
             str: Presence prediction
         """
+        loaded = self._active
+        main_link = threshold is None
+        threshold = threshold or self._threshold
+        start = time.thread_time()
         try:
-            X2 = np.asarray(X).reshape(1, -1)
-            y_proba = self._presence_model.predict_proba(X2)[0]
-
-            calibrating = self._calibrate_threshold(y_proba)
-            if calibrating:
-                # Display the time until detection starts
-                return self._threshold_calibrate_count
-            
-            label = 'Yes' if y_proba < self._model_low_threshold or y_proba > self._model_high_threshold else 'No'
-            self._logger.info(f'Probability: {y_proba}')
-            return label
+            presence = self._predict_with(loaded, data, threshold, 'active', self._logger)
         except Exception as e:
-            self._logger.error(f'Error in Logistic Regression prediction: {e}')
-            return 'No'
+            self._logger.error(f'Error in {loaded.model} prediction: {e}')
+            presence = 'No'
+        finally:
+            self._cpu_time += time.thread_time() - start
+
+        shadow = self._shadow
+        if shadow is not None and main_link:
+            self._submit_shadow(shadow, data, presence)
+        return presence
+
+    def _submit_shadow(self, shadow: _LoadedModel, data: list, presence):
+        """Queue the shadow prediction of the main link features, dropped while the last one runs"""
+        if self._shadow_pending is not None and not self._shadow_pending.done():
+            self._shadow_dropped += 1
+            return
+        self._shadow_pending = self._shadow_executor.submit(self._predict_shadow, shadow, data, presence)
+
+    def _predict_shadow(self, shadow: _LoadedModel, data: list, presence):
+        """Predict with the shadow model and compare it to the active prediction, run on the shadow thread"""
+        if shadow is not self._shadow:
+            return
+        try:
+            shadow_presence = self._predict_with(shadow, data, self._shadow_threshold, 'shadow')
+        except Exception as e:
+            self._logger.error(f'Error in shadow {shadow.model} prediction: {e}')
+            return
+
+        # Calibration countdowns are not predictions
+        if presence in ('Yes', 'No') and shadow_presence in ('Yes', 'No'):
+            self._shadow_compared += 1
+            self._shadow_agreed += presence == shadow_presence
+            if self._shadow_compared % ModelConfig.SHADOW_LOG_INTERVAL == 0:
+                self._log_shadow_stats(shadow)
+
+    def _log_shadow_stats(self, shadow: _LoadedModel):
+        """Log the agreement and latencies of the shadow model"""
+        active = self._active
+        stats = self.shadow_stats
+        agreement = f'{stats["agreement"] * 100:.1f}%' if stats['agreement'] is not None else 'n/a'
+        active_latency = active.status['latencyMs'] if active is not None else None
+        self._logger.info(f'Shadow {shadow.model}: agreement {agreement} over {stats["compared"]} predictions, '
+                          f'latency {active_latency} ms active, {shadow.status["latencyMs"]} ms shadow, '
+                          f'{stats["dropped"]} dropped')
     
-    def _predict_convlstm(self, X: list) -> str:
+    def predict_proba_batch(self, X, batch_size: int = None) -> np.ndarray:
         """
-        Detect human presence using ConvLSTM model
+        Predict the presence probability of many windows with one transform and batched model calls
 
         Args:
-            X: List of RSSI mean, RSSI std, 163 amplitude values and amplitude sum difference
+            X: Feature matrix shaped (windows, 166)
+            batch_size: Windows per model call, ModelConfig.PREDICT_BATCH_SIZE if None
 
         Returns:
-            str: Presence prediction
+            np.ndarray: Presence probability of each window
         """
+        loaded = self._active
+        if loaded is None:
+            raise RuntimeError('Model is not loaded')
+        X = np.asarray(X)
+        if len(X) == 0:
+            return np.empty(0)
+        X = X.reshape(len(X), -1)
+
+        start = time.thread_time()
         try:
-            X = np.asarray(X).reshape(1, -1)                    # shape (1, 166)
-            X_trans = self._scaler_pca_pipeline.transform(X)    # shape (1, 20)
-            X_seq = X_trans.reshape(1, 1, self._xheight, self._xwidth, 1)
-            y_proba = self._presence_model.predict(X_seq, verbose=0).ravel()[0]
-            
-            calibrating = self._calibrate_threshold(y_proba)
-            if calibrating:
-                # Display the time until detection starts
-                return self._threshold_calibrate_count
-
-            label = 'Yes' if y_proba < self._model_low_threshold or y_proba > self._model_high_threshold else 'No'
-            self._logger.info(f'PRED PROBA: {y_proba}')
-            return label
-        except Exception as e:
-            self._logger.error(f'Error in ConvLSTM prediction: {e}')
-            return 'No'
+            return loaded.predict_proba(X, batch_size)
+        finally:
+            self._cpu_time += time.thread_time() - start
 
-    def predict(self, data: list) -> str:
+    @staticmethod
+    def label_batch(proba, threshold: PresenceThreshold) -> np.ndarray:
         """
-        Make presence prediction using the selected model
+        Label consecutive windows of a session the way the live predictions do: the
+        first probabilities calibrate the threshold while it is still calibrating
 
         Args:
-            data: Input data for prediction
-        
+            proba: Presence probability of each window in order
+            threshold: Threshold of the session, updated by the calibration
+
         Returns:
-            str: Presence prediction
+            np.ndarray: 'Yes' or 'No' for each window, None for the windows spent calibrating
         """
-        if self._model == 1:
-            return self._predict_classical(data)
-        elif self._model == 2:
-            return self._predict_convlstm(data)
-    
+        proba = np.asarray(proba)
+        labels = np.full(len(proba), None, dtype=object)
+        index = 0
+        while index < len(proba) and threshold.calibrate(float(proba[index])):
+            index += 1
+
+        rest = proba[index:]
+        labels[index:] = np.where((rest < threshold.low) | (rest > threshold.high), 'Yes', 'No')
+        return labels
+
+    def predict_batch(self, X, threshold: PresenceThreshold = None, batch_size: int = None) -> dict:
+        """
+        Predict presence over the consecutive windows of a session, for offline evaluation
+
+        Args:
+            X: Feature matrix shaped (windows, 166)
+            threshold: Threshold of the session, a new one calibrated on the first windows if None
+            batch_size: Windows per model call, ModelConfig.PREDICT_BATCH_SIZE if None
+
+        Returns:
+            dict: 'proba' presence probability and 'labels' presence label of each window
+        """
+        proba = self.predict_proba_batch(X, batch_size)
+        labels = self.label_batch(proba, threshold or PresenceThreshold())
+        return {'proba': proba, 'labels': labels}
+
+    def wait_loaded(self, timeout: float = None) -> bool:
+        """
+        Wait for the background model loading to finish
+
+        Args:
+            timeout: Most seconds to wait, no limit if None
+
+        Returns:
+            bool: True if the model is loaded
+        """
+        self._load_done.wait(timeout)
+        return self.model_loaded
+
     def reset_threshold(self):
         """Reset the model threshold calibration"""
-        self._model_low_threshold = 100.0
-        self._model_high_threshold = 0.0
-        self._threshold_calibrate_count = ModelConfig.THRESHOLD_CALIBRATE_COUNT
+        self._threshold.reset()
+        self._shadow_threshold.reset()
+
+    @property
+    def cpu_time(self) -> float:
+        """
+        Get the CPU seconds predictions spent on the threads that called them. The shadow model
+        runs on its own ModelShadow thread and TensorFlow runs the ConvLSTM operations on its own
+        worker threads, neither is counted here, the resource monitor groups them by thread name.
+        """
+        return self._cpu_time
+
+    @property
+    def n_features(self) -> int:
+        """Get the number of input features the loaded model expects, None if not loaded"""
+        loaded = self._active
+        return loaded.n_features if loaded is not None else None
 
     @property
     def model_loaded(self) -> bool:
         """Check if the model is loaded"""
-        return self._model_loaded
+        return self._active is not None
+
+    @property
+    def shadow_stats(self) -> dict:
+        """Get how often the shadow model agreed with the active one, None without predictions"""
+        compared = self._shadow_compared
+        return {
+            'compared': compared,
+            'agreement': self._shadow_agreed / compared if compared else None,
+            'dropped': self._shadow_dropped,
+        }
+
+    @property
+    def status(self) -> dict:
+        """Get the active and shadow model versions, their latencies and agreement"""
+        active, shadow, loading = self._active, self._shadow, self._loading
+        return {
+            'active': active.status if active is not None else None,
+            'shadow': shadow.status if shadow is not None else None,
+            'loading': loading.model if loading is not None else None,
+            'error': self._load_error,
+            'shadowStats': self.shadow_stats,
+        }
@@ -0,0 +1,66 @@
+"""Motion pre-gate of the presence inference"""
+
+import time
+
+from app.config.settings import ModelConfig
+
+
+class MotionGate:
+    """
+    Cheap check run before the presence inference of a link. While the
+    amplitude variance and the RSSI mean stay close to their values at the
+    last inference and the radar sees no target, the scene is static and the
+    previous prediction is reused, for at most MODEL_MAX_STALENESS seconds.
+    """
+
+    def __init__(self):
+        self.skipped = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the last inference, the next poll always runs the model"""
+        self._result = None
+        self._reference = None
+        self._inferred_at = None
+        self._signals = None
+
+    def reuse(self, csi_processor, rdm_processor, rssi):
+        """
+        Measure the scene and decide if the last prediction still holds
+
+        Args:
+            csi_processor: CSI processor of the link
+            rdm_processor: RDM processor of the link
+            rssi: RSSI readings of the link
+
+        Returns:
+            The last prediction if the scene is static, None if the model has to run
+        """
+        self._signals = (csi_processor.amplitude_variance, rssi.features()['mean'])
+        # Calibration countdowns change on every prediction and are never reused
+        if not ModelConfig.CASCADE or self._result not in ('Yes', 'No'):
+            return None
+        if time.monotonic() - self._inferred_at >= ModelConfig.MODEL_MAX_STALENESS:
+            return None
+        if rdm_processor.target_detected:
+            return None
+
+        variance, rssi_mean = self._signals
+        reference_variance, reference_rssi_mean = self._reference
+        if (abs(variance - reference_variance) >= ModelConfig.MOTION_VARIANCE_DELTA
+                or abs(rssi_mean - reference_rssi_mean) >= ModelConfig.MOTION_RSSI_DELTA):
+            return None
+
+        self.skipped += 1
+        return self._result
+
+    def record(self, result):
+        """
+        Keep the prediction of the model and the scene it was made in
+
+        Args:
+            result: Prediction returned by the model
+        """
+        self._result = result
+        self._reference = self._signals
+        self._inferred_at = time.monotonic()
@@ -1,13 +1,53 @@
 """Network Communication Module"""
 
 import platform
+import queue
+import select
 import socket
 import threading
 import time
+from collections import deque
 
-from app.config.settings import NetworkConfig
+from app.config.settings import NetworkConfig, NodeConfig
+from app.core.rate_controller import TxRateController
 from app.utils.logger import setup_logger
-from app.utils.system_command import check_ap_connection, get_local_ip, ping_esp32
+from app.utils.metrics import RX_PACKETS, TX_PACKETS
+from app.utils.rolling_stats import RollingStats
+from app.utils.system_command import (check_ap_connection, get_local_ip, get_udp_rcvbuf_errors,
+                                      get_udp_socket_drops)
+
+# Discovery states of the ESP32
+DISCOVERY_IDLE = 'idle'                 # Not looking for the ESP32
+DISCOVERY_BROADCASTING = 'broadcasting' # Sending discovery bursts until a reply
+DISCOVERY_ESTABLISHED = 'established'   # ESP32 IP known and answering
+DISCOVERY_LOST = 'lost'                 # ESP32 stopped answering, rediscovery after the backoff
+
+_MAX_PENDING_REQUESTS = 1000            # Unanswered CSI requests remembered per extra link
+
+
+class _NodeLink:
+    """Request timestamps and counters of an extra ESP32 link"""
+
+    __slots__ = ('tx_timestamps', 'tx_count', 'rx_count', 'last_seen')
+
+    def __init__(self, now: float):
+        self.tx_timestamps = deque(maxlen=_MAX_PENDING_REQUESTS)
+        self.tx_count = 0
+        self.rx_count = 0
+        self.last_seen = now
+
+
+def create_network_manager() -> 'NetworkManager':
+    """
+    Create the network manager of the configured transport
+
+    Returns:
+        NetworkManager: Threaded manager, or the asyncio one if NetworkConfig.TRANSPORT is 'asyncio'
+    """
+    if NetworkConfig.TRANSPORT == 'asyncio':
+        from app.core.async_network_manager import AsyncNetworkManager
+        return AsyncNetworkManager()
+    return NetworkManager()
 
 
 class NetworkManager:
@@ -23,19 +63,60 @@ class NetworkManager:
         
         self._receiving = False
         self._transmitting = False
-        self._port_established = False
         self._wifi_connected = False
+        self._recording = False
+        self._on_data = None
+        self._on_node_data = None
 
         self._socket = None
         self._rx_packet_count = 0
         self._tx_packet_count = 0
         self._tx_timestamps = []
+        self._last_rx_time = 0.0
+        self._rtt_stats = RollingStats(NetworkConfig.HEARTBEAT_RTT_WINDOW)
+        self._rate_controller = TxRateController()
+
+        # Discovery state machine, advanced by the receiver thread
+        self._discovery_state = DISCOVERY_IDLE
+        self._state_lock = threading.Lock()
+        self._state_changes = []
+        self._listeners = []
+        self._backoff = NetworkConfig.DISCOVERY_BACKOFF_MIN
+        self._next_attempt = 0.0
+        self._broadcast_count = 0
+        self._heartbeat_sent = None
+        self._heartbeat_misses = 0
+
+        # Extra ESP32 links by IP address, captured next to the main one up to NodeConfig.MAX_NODES
+        self._extra_links = {}
+        self._node_events = []
+        self._node_listeners = []
+        self._next_node_scan = 0.0
+
+        # Receive buffers reused across datagrams and the batches waiting for the ingest worker
+        self._free_buffers = deque(bytearray(NetworkConfig.RX_BUFFER_SIZE)
+                                   for _ in range(NetworkConfig.RX_BUFFER_POOL))
+        self._pool_size = NetworkConfig.RX_BUFFER_POOL
+        self._batch = []
+        self._ingest_queue = queue.SimpleQueue()
+        # Replies handed to and done by the ingest, their difference is the backlog
+        self._dispatched_count = 0
+        self._ingested_count = 0
+        self._rcvbuf = None
+        self._session_drops = None
 
         self._logger = setup_logger('NetworkManager')
-        self._init_socket()
+        self._reader_running = False
+        if self._init_socket():
+            self._start_reader()
     
     def _update_broadcast_ip(self):
         """Update the broadcast IP based on local IP address"""
+        if NetworkConfig.AP_CHECK_BYPASS and NetworkConfig.AP_BROADCAST_IP:
+            # Keep the configured address of a simulated ESP32
+            self._logger.info(f'Bypassed AP check, using {NetworkConfig.AP_BROADCAST_IP}')
+            return
+
         if self._system == 'Windows' or self._system == 'Linux':
             NetworkConfig.SERVER_IP_ADDR = socket.gethostbyname(socket.gethostname())
         elif self._system == 'Darwin':
@@ -54,7 +135,8 @@ class NetworkManager:
         
         if NetworkConfig.AP_BROADCAST_IP != broadcast_ip:
             NetworkConfig.TX_ESP32_IP = None
-            self._port_established = False
+            with self._state_lock:
+                self._set_discovery_state(DISCOVERY_IDLE)
             NetworkConfig.AP_BROADCAST_IP = broadcast_ip
         
         self._logger.info(f'Current Broadcast IP: {NetworkConfig.AP_BROADCAST_IP}')
@@ -67,7 +149,8 @@ class NetworkManager:
             bool: True if connected, False otherwise
         """
         try:
-            connected = check_ap_connection(NetworkConfig.AP_SSID, self._system)
+            connected = (NetworkConfig.AP_CHECK_BYPASS or
+                         check_ap_connection(NetworkConfig.AP_SSID, self._system))
             if connected:
                 # Update broadcast IP only if connected and after reconnection
                 if not self._wifi_connected:
@@ -84,47 +167,184 @@ class NetworkManager:
 
     def check_esp32(self) -> bool:
         """
-        Check if ESP32 is reachable by pinging its IP address
+        Check if ESP32 is reachable, starting the discovery if it has not been found yet.
+        The receiver thread runs the discovery and liveness checks, so this never blocks.
         
         Returns:
             bool: True if ESP32 is reachable, False otherwise
         """
-        try:
-            if self._wifi_connected and NetworkConfig.TX_ESP32_IP and self._port_established:
-                esp32_status = ping_esp32(NetworkConfig.TX_ESP32_IP, self._system)
-                # Reset ESP32 IP if unreachable due to potential IP change
-                if not esp32_status:
-                    NetworkConfig.TX_ESP32_IP = None
-                    self._logger.info('ESP32 IP is unreachable')
-                return esp32_status
-            elif not self._wifi_connected:
-                return False
-            else:
+        if not self._wifi_connected:
+            return False
+        
+        with self._state_lock:
+            if self._discovery_state == DISCOVERY_IDLE:
                 # If got disconnected to AP while ESP32 is online
                 # This will cause the ESP32 to restarts
                 if NetworkConfig.TX_ESP32_IP:
                     self._transmit_reconnection_packet()
+                self._start_broadcasting(time.monotonic())
+            return self._discovery_state == DISCOVERY_ESTABLISHED
 
-                # Attempt to discover ESP32 IP via broadcast
-                threading.Thread(target=self._transmit_ip_broadcast_packet, daemon=True).start()
-                _, addr = self._socket.recvfrom(8)
+    def subscribe(self, listener):
+        """
+        Register a function called on every discovery state change
 
-                if addr[0] != NetworkConfig.TX_ESP32_IP:
-                    NetworkConfig.TX_ESP32_IP = addr[0]
-                    self._logger.info(f'ESP32 IP: {NetworkConfig.TX_ESP32_IP}')
-                    # self.file_manager.save_settings()
-                self._port_established = True
-                return True
-                
-        except Exception as e:
-            self._logger.error(f'Receiving socket {e}')
-            return False
+        Args:
+            listener: Function called with (old state, new state)
+        """
+        self._listeners.append(listener)
+
+    def subscribe_nodes(self, listener):
+        """
+        Register a function called when an extra ESP32 link is discovered or answers a scan
+
+        Args:
+            listener: Function called with the IP address of the link
+        """
+        self._node_listeners.append(listener)
+
+    def _set_discovery_state(self, state: str):
+        """Change the discovery state, the caller holds the state lock"""
+        old = self._discovery_state
+        if old == state:
+            return
+        self._discovery_state = state
+        self._state_changes.append((old, state))
+
+    def _publish_state_changes(self):
+        """Notify the listeners of the state changes outside the state lock"""
+        with self._state_lock:
+            changes = self._state_changes
+            self._state_changes = []
+            node_events = self._node_events
+            self._node_events = []
+        for old, new in changes:
+            self._logger.info(f'Discovery {old} -> {new}')
+            for listener in self._listeners:
+                try:
+                    listener(old, new)
+                except Exception as e:
+                    self._logger.error(f'Error notifying discovery change: {e}')
+        for esp32_ip in node_events:
+            for listener in self._node_listeners:
+                try:
+                    listener(esp32_ip)
+                except Exception as e:
+                    self._logger.error(f'Error notifying node: {e}')
+
+    @property
+    def _has_events(self) -> bool:
+        """Check if state changes or node events wait to be published"""
+        return bool(self._state_changes or self._node_events)
+
+    def _start_broadcasting(self, now: float):
+        """Start a discovery burst right away"""
+        self._broadcast_count = 0
+        self._next_attempt = now
+        self._set_discovery_state(DISCOVERY_BROADCASTING)
+
+    def _establish(self, esp32_ip: str, now: float):
+        """Accept the ESP32 that replied and start the heartbeats"""
+        # A rediscovered extra link becomes the main one
+        self._extra_links.pop(esp32_ip, None)
+        if esp32_ip != NetworkConfig.TX_ESP32_IP:
+            NetworkConfig.TX_ESP32_IP = esp32_ip
+            self._logger.info(f'ESP32 IP: {NetworkConfig.TX_ESP32_IP}')
+            # self.file_manager.save_settings()
+        self._backoff = NetworkConfig.DISCOVERY_BACKOFF_MIN
+        self._heartbeat_sent = None
+        self._heartbeat_misses = 0
+        self._next_attempt = now + NetworkConfig.HEARTBEAT_INTERVAL
+        self._set_discovery_state(DISCOVERY_ESTABLISHED)
+
+    def _lose(self, now: float):
+        """Mark the ESP32 unreachable and schedule the rediscovery"""
+        # Reset ESP32 IP if unreachable due to potential IP change, the stream keeps it while receiving
+        if not self._receiving:
+            NetworkConfig.TX_ESP32_IP = None
+            self._logger.info('ESP32 IP is unreachable')
+        self._heartbeat_sent = None
+        self._next_attempt = now + self._backoff
+        self._set_discovery_state(DISCOVERY_LOST)
+
+    def _step_discovery(self, now: float):
+        """Send the broadcasts and heartbeats that are due and time out the missing replies"""
+        state = self._discovery_state
+        if state == DISCOVERY_IDLE or not self._wifi_connected:
+            return
+
+        if state == DISCOVERY_BROADCASTING:
+            if now < self._next_attempt:
+                return
+            if self._broadcast_count < NetworkConfig.DISCOVERY_BURST:
+                self._transmit_ip_broadcast_packet()
+                self._broadcast_count += 1
+                # Leave the last broadcast of the burst the socket timeout to be answered
+                last = self._broadcast_count == NetworkConfig.DISCOVERY_BURST
+                self._next_attempt = now + (NetworkConfig.TX_SOCKET_TIMEOUT if last
+                                            else NetworkConfig.TX_CONNECT_INTERVAL)
+            else:
+                # Unanswered burst, back off exponentially before the next one
+                self._broadcast_count = 0
+                self._next_attempt = now + self._backoff
+                self._backoff = min(self._backoff * 2.0, NetworkConfig.DISCOVERY_BACKOFF_MAX)
+
+        elif state == DISCOVERY_ESTABLISHED:
+            if NodeConfig.MAX_NODES > 1 and now >= self._next_node_scan:
+                # Look for ESP32 links that joined after the discovery and keep the known ones seen
+                self._next_node_scan = now + NodeConfig.NODE_SCAN_INTERVAL
+                self._transmit_ip_broadcast_packet()
+
+            if self._receiving:
+                # The transmitter keeps the ESP32 busy, rely on the reply stream
+                if now - self._last_rx_time >= NetworkConfig.LIVENESS_TIMEOUT:
+                    self._lose(now)
+            elif self._heartbeat_sent is not None:
+                if time.perf_counter() - self._heartbeat_sent >= NetworkConfig.TX_SOCKET_TIMEOUT:
+                    self._heartbeat_misses += 1
+                    if self._heartbeat_misses >= NetworkConfig.HEARTBEAT_RETRIES:
+                        self._lose(now)
+                    else:
+                        self._transmit_heartbeat_packet()
+            elif now >= self._next_attempt:
+                self._transmit_heartbeat_packet()
+
+        elif state == DISCOVERY_LOST:
+            if not self._receiving and now >= self._next_attempt:
+                self._start_broadcasting(now)
+
+    def _handle_control_reply(self, esp32_ip: str, now: float):
+        """Match a discovery or heartbeat reply to the current state"""
+        state = self._discovery_state
+        if state == DISCOVERY_BROADCASTING:
+            self._establish(esp32_ip, now)
+        elif esp32_ip != NetworkConfig.TX_ESP32_IP:
+            # Discovery reply of another ESP32
+            self._add_node(esp32_ip, now)
+        elif state == DISCOVERY_ESTABLISHED and self._heartbeat_sent is not None:
+            self._rtt_stats.push(time.perf_counter() - self._heartbeat_sent)
+            self._heartbeat_sent = None
+            self._heartbeat_misses = 0
+            self._next_attempt = now + NetworkConfig.HEARTBEAT_INTERVAL
+        elif state == DISCOVERY_LOST:
+            self._establish(esp32_ip, now)
+    
+    def _add_node(self, esp32_ip: str, now: float):
+        """Capture another ESP32 as an extra link if the node limit allows it"""
+        link = self._extra_links.get(esp32_ip)
+        if link is None:
+            if 1 + len(self._extra_links) >= NodeConfig.MAX_NODES:
+                return
+            link = self._extra_links[esp32_ip] = _NodeLink(now)
+            self._logger.info(f'Extra ESP32 IP: {esp32_ip}')
+        link.last_seen = now
+        self._node_events.append(esp32_ip)
     
     # Receiver
 
     def _init_socket(self) -> bool:
         """
-        Setup UDP socket for transmitting packets
+        Setup UDP socket shared by the transmitter and the receiver
 
         Returns:
             bool: True if socket setup is successful, False otherwise
@@ -132,56 +352,199 @@ class NetworkManager:
         try:
             self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-            self._socket.settimeout(NetworkConfig.TX_SOCKET_TIMEOUT)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, NetworkConfig.RX_SOCKET_BUFFER)
+            # The kernel may round or cap the request (net.core.rmem_max on Linux)
+            self._rcvbuf = self._socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+            self._logger.info(f'Receive buffer: {self._rcvbuf} bytes')
+            # The receiver waits in select and drains the socket until it would block
+            self._socket.setblocking(False)
             return True
         except Exception as e:
             self._logger.error(f'Error setting up transmitter socket: {e}')
             return False
+
+    def _start_reader(self):
+        """Start the receiver thread that owns the socket reads and the ingest worker"""
+        self._reader_running = True
+        threading.Thread(target=self._read_packets, name='Receiver', daemon=True).start()
+        threading.Thread(target=self._run_ingest, name='Ingest', daemon=True).start()
+
+    def _read_packets(self):
+        """
+        Read every reply on the socket and demultiplex it: CSI replies go to the
+        data path while receiving, short replies answer the discovery and heartbeats
+        """
+        while self._reader_running:
+            try:
+                # Wake the receiver often enough to pace the discovery broadcasts
+                readable, _, _ = select.select([self._socket], [], [], NetworkConfig.TX_CONNECT_INTERVAL)
+            except (OSError, ValueError) as e:
+                if not self._reader_running:
+                    break
+                self._logger.error(f'Error receiving packet: {e}')
+                time.sleep(NetworkConfig.TX_CONNECT_INTERVAL)
+                continue
+
+            now = time.monotonic()
+            if readable:
+                self._receive_batch(now)
+            self._tick(now)
+
+    def _receive_batch(self, now: float):
+        """Read the queued datagrams into pooled buffers and pass the CSI replies on in one batch"""
+        for _ in range(NetworkConfig.RX_BATCH_SIZE):
+            buffer = self._acquire_buffer()
+            try:
+                nbytes, addr = self._socket.recvfrom_into(buffer)
+            except (BlockingIOError, InterruptedError):
+                self._free_buffers.append(buffer)
+                break
+            except OSError as e:
+                self._free_buffers.append(buffer)
+                if self._reader_running:
+                    self._logger.error(f'Error receiving packet: {e}')
+                break
+
+            dispatched = len(self._batch)
+            is_csi = buffer.find(b'|', 0, nbytes) >= 0
+            self._handle_datagram(memoryview(buffer)[:nbytes], addr, now, is_csi)
+            if len(self._batch) == dispatched:
+                # Not passed on, the buffer can take the next datagram
+                self._free_buffers.append(buffer)
+
+        if self._batch:
+            self._ingest_queue.put(self._batch)
+            self._batch = []
+
+    def _acquire_buffer(self) -> bytearray:
+        """Take a free receive buffer, growing the pool if the ingest holds all of them"""
+        try:
+            return self._free_buffers.pop()
+        except IndexError:
+            self._pool_size += 1
+            return bytearray(NetworkConfig.RX_BUFFER_SIZE)
+
+    def _run_ingest(self):
+        """Process the received batches in order and recycle their buffers"""
+        while True:
+            batch = self._ingest_queue.get()
+            if batch is None:
+                break
+            for on_data, data, args in batch:
+                try:
+                    on_data(data, *args)
+                except Exception as e:
+                    self._logger.error(f'Error processing packet: {e}')
+                self._ingested_count += 1
+                self._free_buffers.append(data.obj)
+
+    def _handle_datagram(self, data: bytes, addr: tuple, now: float, is_csi: bool):
+        """
+        Route a datagram to the data path or the discovery
+
+        Args:
+            data: Datagram payload, bytes or a view of a pooled buffer
+            addr: Sender address
+            now: Monotonic receive time
+            is_csi: True for CSI replies, which carry the '|' section separator
+        """
+        try:
+            if is_csi:
+                self._handle_csi_reply(data, addr, now)
+            else:
+                with self._state_lock:
+                    self._handle_control_reply(addr[0], now)
+        except Exception as e:
+            self._logger.error(f'Error receiving packet: {e}')
+
+    def _tick(self, now: float):
+        """Advance the discovery and the request rate, and publish the state changes"""
+        with self._state_lock:
+            self._step_discovery(now)
+        if self._has_events:
+            self._publish_state_changes()
+        if self._transmitting and not self._recording and NetworkConfig.TX_ADAPTIVE:
+            # Recordings keep the configured rate so the sessions stay comparable
+            rtt = float(self._rtt_stats.mean) if self._rtt_stats.count else None
+            self._rate_controller.update(now, self._tx_packet_count, self._rx_packet_count,
+                                         self.ingest_backlog, rtt)
+
+    def _handle_csi_reply(self, data: bytes, addr: tuple, now: float):
+        """Pass a CSI reply to the data path of the link that sent it"""
+        if self._extra_links:
+            link = self._extra_links.get(addr[0])
+            if link is not None:
+                self._handle_node_reply(link, data, addr[0], now)
+                return
+
+        on_data = self._on_data
+        if on_data is None or not self._tx_timestamps:
+            # Late reply of a stopped stream without a pending CSI request
+            return
+        self._rx_packet_count += 1
+        self._last_rx_time = now
+        RX_PACKETS.inc()
+        if self._discovery_state == DISCOVERY_LOST and addr[0] == NetworkConfig.TX_ESP32_IP:
+            with self._state_lock:
+                self._establish(addr[0], now)
+
+        self._dispatch(on_data, data, self._tx_timestamps.pop(0))
+        
+        if self._recording and self._rx_packet_count >= NetworkConfig.RECORD_PACKET_LIMIT:
+            self._logger.info(f'Recording completed with {self._rx_packet_count} packets')
+            self.stop_listening()
+            self.stop_transmitting()
     
-    def start_receiving(self, parse_received_data, is_recording):
+    def _handle_node_reply(self, link: _NodeLink, data: bytes, esp32_ip: str, now: float):
+        """Pass a CSI reply of an extra link to its data path"""
+        on_node_data = self._on_node_data
+        if on_node_data is None or not link.tx_timestamps:
+            return
+        link.rx_count += 1
+        link.last_seen = now
+        RX_PACKETS.inc()
+        self._dispatch(on_node_data, data, link.tx_timestamps.popleft(), esp32_ip)
+
+    def _dispatch(self, on_data, data: memoryview, *args):
+        """Add received data to the batch for the ingest worker"""
+        self._dispatched_count += 1
+        self._batch.append((on_data, data, args))
+    
+    def start_receiving(self, parse_received_data, is_recording, parse_node_data=None):
         """
-        Start listening for UDP packets from ESP32
+        Start passing the CSI replies to the data path, returns right away
         
         Args:
             parse_received_data: Function to call when data is received
             is_recording: Current mode
+            parse_node_data: Function to call with the data and IP address of the extra links, optional
         """
+        self._recording = is_recording
+        self._on_node_data = parse_node_data
+        # Give the first reply the liveness timeout to arrive
+        self._last_rx_time = time.monotonic()
+        self._session_drops = get_udp_socket_drops(self._socket)
+        self._on_data = parse_received_data
         self._receiving = True
         self._logger.info('Listening...')
-        
-        while self._receiving:
-            try:
-                data, _ = self._socket.recvfrom(NetworkConfig.RX_BUFFER_SIZE)
-                self._rx_packet_count += 1
-                
-                # Process received data in separate thread
-                threading.Thread(
-                    target=parse_received_data, 
-                    args=(data, self._tx_timestamps.pop(0)), 
-                    daemon=True
-                ).start()
-                
-                if is_recording and self._rx_packet_count >= NetworkConfig.RECORD_PACKET_LIMIT:
-                    self._logger.info(f'Recording completed with {self._rx_packet_count} packets')
-                    break
-            
-            # Implement a timeout to avoid continuous listening
-            except socket.timeout:
-                if not self._receiving:
-                    break
-                continue
-            except Exception as e:
-                self._logger.error(f'Error receiving packet: {e}')
-                continue
-        
-        self.stop_listening()
-        self.stop_transmitting()
     
     def stop_listening(self):
         """Stop listening for packets"""
         self._receiving = False
+        self._on_data = None
+        self._on_node_data = None
         self._logger.info(f'Receiving stopped at {self._rx_packet_count} packets')
         self._rx_packet_count = 0
+
+    def close(self):
+        """Stop the receiver thread and close the socket"""
+        self.stop_transmitting()
+        self._receiving = False
+        self._on_data = None
+        self._reader_running = False
+        self._ingest_queue.put(None)
+        if self._socket:
+            self._socket.close()
     
     # Transmitter
 
@@ -190,49 +553,80 @@ class NetworkManager:
         # Removed the error handling to reduce overhead
         while self._transmitting:
             try:
+                # Queue the timestamp first since the reply can arrive before sendto returns
+                self._tx_timestamps.append(time.time())
                 self._socket.sendto(NetworkConfig.TX_CSI_REQ_PAYLOAD,
                                 (NetworkConfig.TX_ESP32_IP, NetworkConfig.TX_PORT))
-                self._tx_timestamps.append(time.time())
                 self._tx_packet_count += 1
-                time.sleep(NetworkConfig.TX_INTERVAL)
+                TX_PACKETS.inc()
+                self._transmit_node_requests(self._socket.sendto)
+                time.sleep(self._rate_controller.interval)
             except:
                 self._logger.error('Error sending stop packet')
                 self.stop_transmitting()
                 self.stop_listening()
                 return
     
+    def _transmit_node_requests(self, sendto):
+        """
+        Send a CSI request to every extra link seen within the node timeout
+
+        Args:
+            sendto: Send function of the transport
+        """
+        if not self._extra_links:
+            return
+        now = time.monotonic()
+        for esp32_ip, link in list(self._extra_links.items()):
+            if now - link.last_seen >= NodeConfig.NODE_TIMEOUT:
+                continue
+            link.tx_timestamps.append(time.time())
+            sendto(NetworkConfig.TX_CSI_REQ_PAYLOAD, (esp32_ip, NetworkConfig.TX_PORT))
+            link.tx_count += 1
+            TX_PACKETS.inc()
+
+    def _send(self, payload: bytes, address: tuple):
+        """Send a control packet, callable from any thread"""
+        self._socket.sendto(payload, address)
+
     def _transmit_stop_csi_packet(self):
         """Send a single UDP packet to signal ESP32 to stop CSI request"""
         try:
-            self._socket.sendto(NetworkConfig.TX_STOP_REQ_PAYLOAD,
-                                   (NetworkConfig.TX_ESP32_IP, NetworkConfig.TX_PORT))
+            self._send(NetworkConfig.TX_STOP_REQ_PAYLOAD,
+                       (NetworkConfig.TX_ESP32_IP, NetworkConfig.TX_PORT))
         except Exception as e:
             self._logger.error(f'Error sending stop packet: {e}')
     
     def _transmit_reconnection_packet(self):
         """Send a single UDP packet to signal ESP32 to start CSI request"""
         try:
-            self._socket.sendto(NetworkConfig.TX_RECONNECT_PAYLOAD,
-                                   (NetworkConfig.TX_ESP32_IP, NetworkConfig.TX_PORT))
+            self._send(NetworkConfig.TX_RECONNECT_PAYLOAD,
+                       (NetworkConfig.TX_ESP32_IP, NetworkConfig.TX_PORT))
         except Exception as e:
             self._logger.error(f'Error sending start packet: {e}')
     
     def _transmit_ip_broadcast_packet(self):
         """Send a single UDP packet to request ESP32 IP address"""
-        tx_counter = 0
-        while tx_counter < 5:
-            try:
-                self._socket.sendto(NetworkConfig.TX_IP_BROADCAST_PAYLOAD,
-                                       (NetworkConfig.AP_BROADCAST_IP, NetworkConfig.TX_PORT))
-                tx_counter += 1
-                time.sleep(NetworkConfig.TX_CONNECT_INTERVAL)
-            except Exception as e:
-                self._logger.error(f'Error sending IP request packet: {e}')
+        try:
+            self._send(NetworkConfig.TX_IP_BROADCAST_PAYLOAD,
+                       (NetworkConfig.AP_BROADCAST_IP, NetworkConfig.TX_PORT))
+        except Exception as e:
+            self._logger.error(f'Error sending IP request packet: {e}')
+
+    def _transmit_heartbeat_packet(self):
+        """Send the discovery payload to the ESP32 only, the receiver matches the reply"""
+        try:
+            self._heartbeat_sent = time.perf_counter()
+            self._send(NetworkConfig.TX_IP_BROADCAST_PAYLOAD,
+                       (NetworkConfig.TX_ESP32_IP, NetworkConfig.TX_PORT))
+        except Exception as e:
+            self._logger.error(f'Error sending heartbeat packet: {e}')
     
     def _start_csi_transmission(self):
         """Start continuous packet transmission at specified intervals"""
+        self._rate_controller.reset()
         self._transmitting = True
-        threading.Thread(target=self._transmit_csi_generating_packet, daemon=True).start()
+        threading.Thread(target=self._transmit_csi_generating_packet, name='Transmitter', daemon=True).start()
         self._logger.info('Transmitting...')
     
     def stop_transmitting(self):
@@ -243,6 +637,13 @@ class NetworkManager:
             self._tx_timestamps.clear()
             self._logger.info('Transmission stopped')
             self._transmit_stop_csi_packet()
+            for esp32_ip, link in list(self._extra_links.items()):
+                link.tx_timestamps.clear()
+                link.tx_count = link.rx_count = 0
+                try:
+                    self._send(NetworkConfig.TX_STOP_REQ_PAYLOAD, (esp32_ip, NetworkConfig.TX_PORT))
+                except Exception as e:
+                    self._logger.error(f'Error sending stop packet to {esp32_ip}: {e}')
 
     @property
     def packet_loss(self) -> int:
@@ -253,6 +654,86 @@ class NetworkManager:
         loss = (self._tx_packet_count - self._rx_packet_count) / self._tx_packet_count
         return int(loss * 100)
 
+    @property
+    def heartbeat_rtt(self) -> dict:
+        """Get the latest and mean heartbeat round trip in milliseconds"""
+        if not self._rtt_stats.count:
+            return {'last': None, 'mean': None}
+        return {
+            'last': round(float(self._rtt_stats.latest) * 1000.0, 2),
+            'mean': round(float(self._rtt_stats.mean) * 1000.0, 2),
+        }
+
+    @property
+    def receive_stats(self) -> dict:
+        """
+        Get the receive buffer sizes and drop counters, to tell the datagrams the
+        network lost apart from the ones the host dropped
+
+        Returns:
+            dict: Socket buffer size, kernel drops in total and in the current
+                session (None where unavailable), buffer pool, ingest backlog,
+                request interval and reply rate
+        """
+        drops = get_udp_socket_drops(self._socket)
+        session_drops = None
+        if drops is not None and self._session_drops is not None:
+            session_drops = drops - self._session_drops
+        return {
+            'rcvbuf_requested': NetworkConfig.RX_SOCKET_BUFFER,
+            'rcvbuf': self._rcvbuf,
+            'kernel_drops': drops,
+            'session_kernel_drops': session_drops,
+            'udp_rcvbuf_errors': get_udp_rcvbuf_errors(),
+            'pool_buffers': self._pool_size,
+            'pool_free': len(self._free_buffers),
+            'ingest_backlog': self.ingest_backlog,
+            'tx_interval': self.tx_interval,
+            'sample_rate': self.sample_rate,
+        }
+
+    @property
+    def node_stats(self) -> dict:
+        """
+        Get the counters of the extra links
+
+        Returns:
+            dict: Per IP address requests, replies, packet loss percentage and online status
+        """
+        now = time.monotonic()
+        stats = {}
+        for esp32_ip, link in list(self._extra_links.items()):
+            loss = (link.tx_count - link.rx_count) / link.tx_count if link.tx_count else 0.0
+            stats[esp32_ip] = {
+                'tx': link.tx_count,
+                'rx': link.rx_count,
+                'packetLoss': int(loss * 100),
+                'online': now - link.last_seen < NodeConfig.NODE_TIMEOUT,
+            }
+        return stats
+
+    @property
+    def ingest_backlog(self) -> int:
+        """Get the number of replies waiting for the ingest"""
+        return self._dispatched_count - self._ingested_count
+
+    @property
+    def tx_interval(self) -> float:
+        """Get the current CSI request interval in seconds"""
+        return self._rate_controller.interval
+
+    @property
+    def sample_rate(self) -> float:
+        """Get the CSI replies per second of the last rate control period, None if not measured"""
+        if not self._transmitting:
+            return None
+        return self._rate_controller.sample_rate
+
+    @property
+    def discovery_state(self) -> str:
+        """Get the ESP32 discovery state"""
+        return self._discovery_state
+
     @property
     def is_receiving(self) -> bool:
         """Check if currently receiving packets"""
@@ -0,0 +1,193 @@
+"""Registry of the extra ESP32 links captured next to the main one"""
+
+import threading
+import time
+
+from app.config.settings import ModelConfig, NodeConfig, RecordConfig
+from app.core.csi_processor import CSIProcessor
+from app.core.model_manager import PresenceThreshold
+from app.core.motion_gate import MotionGate
+from app.core.rdm_processor import RDMProcessor
+from app.utils.packet_parser import parse_csi_data
+from app.utils.rolling_stats import IntRingBuffer
+
+
+def presence_features(rssi: IntRingBuffer, csi_processor: CSIProcessor) -> list:
+    """
+    Build the model input of a link
+
+    Args:
+        rssi: RSSI readings of the link
+        csi_processor: CSI processor of the link
+
+    Returns:
+        list: RSSI mean, RSSI std and the amplitude window, None until the RSSI window is full
+    """
+    if len(rssi) <= ModelConfig.PRED_SIGNAL_WINDOW:
+        return None
+    features = rssi.features()
+    return [features['mean'], features['std']] + csi_processor.get_amplitude_window()
+
+
+class NodePipeline:
+    """Processing state and latest prediction of one ESP32 link"""
+
+    def __init__(self, ip: str, room: str):
+        """
+        Args:
+            ip: IP address of the ESP32
+            room: Room the link covers
+        """
+        self.ip = ip
+        self.room = room
+        self.csi_processor = CSIProcessor()
+        self.rdm_processor = RDMProcessor()
+        self.threshold = PresenceThreshold()
+        self.motion_gate = MotionGate()
+        self._rssi = IntRingBuffer(RecordConfig.CSI_QUEUE_LIMIT, ModelConfig.PRED_SIGNAL_WINDOW)
+        self._ld2420_miss_count = -1
+        self.packet_count = 0
+        self.last_seen = time.monotonic()
+        self.presence = 'Starting'
+
+    def ingest(self, raw_data: bytes):
+        """
+        Parse a packet of the link and queue its signals
+
+        Args:
+            raw_data: Raw data bytes received from the ESP32
+        """
+        self.last_seen = time.monotonic()
+        parsed_data = parse_csi_data(raw_data, self._ld2420_miss_count)
+        if parsed_data is None:
+            return
+
+        self._ld2420_miss_count = parsed_data[1]
+        if parsed_data[7]:
+            self.csi_processor.queue_csi(parsed_data[7])
+        if parsed_data[0]:
+            self.rdm_processor.queue_rdm(parsed_data[8:])
+        self._rssi.push(parsed_data[3])
+        self.packet_count += 1
+
+    def predict(self, model_manager) -> str:
+        """
+        Update the presence prediction of the link
+
+        Args:
+            model_manager: Loaded ModelManager shared by the links
+
+        Returns:
+            str: Presence prediction, calibration countdown or 'Starting'
+        """
+        if not model_manager.model_loaded:
+            self.presence = 'Starting'
+            return self.presence
+        reused = self.motion_gate.reuse(self.csi_processor, self.rdm_processor, self._rssi)
+        if reused is not None:
+            self.presence = reused
+            return self.presence
+
+        X = presence_features(self._rssi, self.csi_processor)
+        if X is None:
+            self.presence = 'Starting'
+        else:
+            self.presence = model_manager.predict(X, self.threshold)
+            self.motion_gate.record(self.presence)
+        return self.presence
+
+    def reset(self):
+        """Clear the signal windows and the calibration"""
+        self.csi_processor.clear_queues()
+        self._rssi.clear()
+        self.threshold.reset()
+        self.motion_gate.reset()
+        self._ld2420_miss_count = -1
+        self.packet_count = 0
+        self.presence = 'Starting'
+
+    @property
+    def online(self) -> bool:
+        """Check if the link replied within the node timeout"""
+        return time.monotonic() - self.last_seen < NodeConfig.NODE_TIMEOUT
+
+    @property
+    def status(self) -> dict:
+        """Get the link status"""
+        return {
+            'ip': self.ip,
+            'room': self.room,
+            'online': self.online,
+            'packetCount': self.packet_count,
+            'rssi': self._rssi.latest or 0,
+            'presence': self.presence,
+        }
+
+
+class NodeRegistry:
+    """Extra ESP32 links by IP address, each with its own pipeline"""
+
+    def __init__(self):
+        self._nodes = {}
+        self._lock = threading.Lock()
+
+    def add(self, ip: str) -> NodePipeline:
+        """
+        Register a discovered link, or refresh it if already known
+
+        Args:
+            ip: IP address of the ESP32
+
+        Returns:
+            NodePipeline: Pipeline of the link
+        """
+        with self._lock:
+            node = self._nodes.get(ip)
+            if node is None:
+                node = self._nodes[ip] = NodePipeline(ip, room_of(ip))
+            node.last_seen = time.monotonic()
+        return node
+
+    def get(self, ip: str) -> NodePipeline:
+        """Get the pipeline of a link, None if unknown"""
+        return self._nodes.get(ip)
+
+    def nodes(self) -> list:
+        """Get the pipelines of every link"""
+        with self._lock:
+            return list(self._nodes.values())
+
+    def reset(self):
+        """Clear the signal windows of every link"""
+        for node in self.nodes():
+            node.reset()
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+
+def room_of(ip: str) -> str:
+    """Get the room of an ESP32 link"""
+    return NodeConfig.NODE_ROOMS.get(ip, NodeConfig.DEFAULT_ROOM)
+
+
+def aggregate_rooms(predictions: list) -> dict:
+    """
+    Combine the link predictions of each room, a room is occupied if any of its links detects presence
+
+    Args:
+        predictions: (room, presence) of every online link
+
+    Returns:
+        dict: Room presence, 'Yes', 'No' or 'Starting' while no link of the room has a prediction
+    """
+    rooms = {}
+    for room, presence in predictions:
+        current = rooms.get(room, 'Starting')
+        if presence == 'Yes' or current == 'Yes':
+            rooms[room] = 'Yes'
+        elif presence == 'No' or current == 'No':
+            rooms[room] = 'No'
+        else:
+            rooms[room] = current
+    return rooms
@@ -0,0 +1,250 @@
+"""Playback Manager Module"""
+
+import bisect
+import threading
+import time
+
+from app.config.settings import PlaybackConfig
+from app.utils.logger import setup_logger
+
+
+class PlaybackManager:
+    """
+    Replays a recorded session in real time with play, pause, seek and speed control.
+    Seeking jumps through the file time index instead of parsing the skipped rows.
+    """
+
+    def __init__(self, file_manager):
+        from app.core.file_manager import FileManager
+        self._file_manager: FileManager = file_manager
+
+        self._filename = None
+        self._time_index = None
+        self._on_packet = None
+        self._on_seek = None
+        self._start_timestamp = 0.0
+        self._end_timestamp = 0.0
+
+        self._active = False
+        self._playing = False
+        self._speed = 1.0
+        self._position = 0.0
+        self._seek_target = None
+        self._packet_count = 0
+
+        self._cond = threading.Condition()
+        self._thread = None
+        self._logger = setup_logger('PlaybackManager')
+
+    def open(self, filename: str, on_packet, on_seek) -> dict:
+        """
+        Open a recorded session paused at its beginning
+
+        Args:
+            filename: Name of the CSV file in the recording directory
+            on_packet: Function called with (payload, tx_timestamp) for each replayed packet
+            on_seek: Function called before the packets of a new position are replayed
+
+        Returns:
+            dict: Playback status, or None if the file cannot be indexed
+        """
+        self.stop()
+        time_index = self._file_manager.load_time_index(filename)
+        if not time_index or not time_index['timestamps']:
+            return None
+
+        last_packet = None
+        for last_packet in self._file_manager.read_recorded_packets(filename, time_index['offsets'][-1]):
+            pass
+
+        with self._cond:
+            self._filename = filename
+            self._time_index = time_index
+            self._on_packet = on_packet
+            self._on_seek = on_seek
+            self._start_timestamp = time_index['timestamps'][0]
+            self._end_timestamp = last_packet[0] if last_packet else self._start_timestamp
+            self._active = True
+            self._playing = False
+            self._position = 0.0
+            self._seek_target = 0.0
+            self._packet_count = 0
+
+        self._thread = threading.Thread(target=self._run, name='Playback', daemon=True)
+        self._thread.start()
+        self._logger.info(f'Opened {filename} ({self.duration:.1f}s)')
+        return self.status
+
+    def play(self):
+        """Resume the playback"""
+        with self._cond:
+            self._playing = self._active
+            self._cond.notify()
+
+    def pause(self):
+        """Pause the playback"""
+        with self._cond:
+            self._playing = False
+            self._cond.notify()
+
+    def seek(self, position: float):
+        """
+        Jump to a position of the session
+
+        Args:
+            position: Seconds from the start of the session
+        """
+        with self._cond:
+            self._seek_target = min(max(0.0, float(position)), self.duration)
+            self._cond.notify()
+
+    def set_speed(self, speed: float):
+        """
+        Change the playback speed
+
+        Args:
+            speed: Speed multiplier within the configured bounds
+        """
+        with self._cond:
+            self._speed = min(max(PlaybackConfig.MIN_SPEED, float(speed)), PlaybackConfig.MAX_SPEED)
+            self._cond.notify()
+
+    def stop(self):
+        """Stop the playback and close the session"""
+        with self._cond:
+            if not self._active:
+                return
+            self._active = False
+            self._playing = False
+            self._cond.notify()
+
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        self._logger.info(f'Playback of {self._filename} stopped')
+
+    def _open_reader(self, target_timestamp: float):
+        """
+        Open a packet reader positioned at the last indexed row before the target
+
+        Args:
+            target_timestamp: Transmit timestamp to start reading from
+
+        Returns:
+            generator: Packet reader starting at or before the target
+        """
+        timestamps = self._time_index['timestamps']
+        entry = max(0, bisect.bisect_right(timestamps, target_timestamp) - 1)
+        return self._file_manager.read_recorded_packets(self._filename, self._time_index['offsets'][entry])
+
+    def _start_at(self, position: float):
+        """
+        Start reading at a position, feeding the preroll packets without pacing
+        so the signal windows are filled once playback resumes
+
+        Args:
+            position: Seconds from the start of the session
+
+        Returns:
+            generator: Packet reader positioned at the target
+        """
+        target = self._start_timestamp + position
+        preroll_start = target - PlaybackConfig.PREROLL
+        reader = self._open_reader(preroll_start)
+        self._on_seek()
+
+        for tx_timestamp, payload, _ in reader:
+            if tx_timestamp < preroll_start:
+                continue
+            self._on_packet(payload, tx_timestamp)
+            self._packet_count += 1
+            if tx_timestamp >= target:
+                break
+        return reader
+
+    def _run(self):
+        """Replay packets paced by their transmit timestamps"""
+        reader = None
+        anchor = None   # (wall time, transmit timestamp) that paces the following packets
+        pending = None  # Packet interrupted while waiting, replayed once resumed
+        speed = self._speed
+
+        while True:
+            with self._cond:
+                if not self._active:
+                    break
+                if self._seek_target is not None:
+                    position, self._seek_target = self._seek_target, None
+                    self._position = position
+                    anchor = None
+                else:
+                    position = None
+
+                if position is None and not self._playing:
+                    anchor = None
+                    self._cond.wait()
+                    continue
+
+                if speed != self._speed:
+                    speed = self._speed
+                    anchor = None
+
+            if position is not None:
+                reader = self._start_at(position)
+                pending = None
+                continue
+
+            packet, pending = pending or next(reader, None), None
+            if packet is None:
+                # End of session, wait paused for a seek or stop
+                with self._cond:
+                    self._playing = False
+                    self._position = self.duration
+                continue
+
+            tx_timestamp, payload, _ = packet
+            if anchor is None:
+                anchor = (time.perf_counter(), tx_timestamp)
+
+            delay = anchor[0] + (tx_timestamp - anchor[1]) / speed - time.perf_counter()
+            if delay > 0:
+                with self._cond:
+                    # Wake up early on pause, seek, speed change or stop
+                    if self._cond.wait_for(lambda: (not self._playing or not self._active or
+                                                    self._seek_target is not None or
+                                                    speed != self._speed), timeout=delay):
+                        if self._seek_target is None and self._active:
+                            # Replay the interrupted packet once resumed
+                            pending = packet
+                        continue
+
+            self._on_packet(payload, tx_timestamp)
+            self._packet_count += 1
+            self._position = tx_timestamp - self._start_timestamp
+
+    @property
+    def duration(self) -> float:
+        """Get the duration of the opened session in seconds"""
+        return self._end_timestamp - self._start_timestamp
+
+    @property
+    def is_active(self) -> bool:
+        """Check if a session is opened"""
+        return self._active
+
+    @property
+    def packet_count(self) -> int:
+        """Get the number of replayed packets"""
+        return self._packet_count
+
+    @property
+    def status(self) -> dict:
+        """Get the playback status"""
+        return {
+            'filename': self._filename,
+            'active': self._active,
+            'playing': self._active and self._playing,
+            'speed': self._speed,
+            'position': round(self._position, 2),
+            'duration': round(self.duration, 2),
+        }
@@ -0,0 +1,82 @@
+"""Adaptive CSI request rate"""
+
+from app.config.settings import NetworkConfig
+
+
+class TxRateController:
+    """
+    Additive-increase multiplicative-decrease control of the CSI request rate.
+    Every control period the loss and the ingest backlog are measured: the
+    interval grows by TX_BACKOFF_FACTOR when either shows congestion and
+    otherwise shrinks by TX_INTERVAL_STEP back towards the shortest interval.
+    The ESP32 answers one request at a time, so the interval never goes below
+    the heartbeat round trip when one was measured.
+    """
+
+    def __init__(self):
+        self.interval = NetworkConfig.TX_INTERVAL
+        self._sample_rate = None
+        self._period_start = None
+        self._tx_count = 0
+        self._rx_count = 0
+        self._last_loss = 0
+
+    def reset(self):
+        """Start again from the configured interval, called when a stream starts"""
+        self.interval = NetworkConfig.TX_INTERVAL
+        self._sample_rate = None
+        self._period_start = None
+        self._tx_count = 0
+        self._rx_count = 0
+        self._last_loss = 0
+
+    def update(self, now: float, tx_count: int, rx_count: int, backlog: int, rtt: float = None) -> float:
+        """
+        Measure the current period and adjust the interval once it is over
+
+        Args:
+            now: Monotonic time in seconds
+            tx_count: Requests sent in the stream
+            rx_count: Replies received in the stream
+            backlog: Replies waiting for the ingest
+            rtt: Mean heartbeat round trip in seconds, None if not measured
+
+        Returns:
+            float: Request interval in seconds
+        """
+        if self._period_start is None:
+            self._period_start = now
+            self._tx_count = tx_count
+            self._rx_count = rx_count
+            return self.interval
+
+        elapsed = now - self._period_start
+        if elapsed < NetworkConfig.TX_CONTROL_PERIOD:
+            return self.interval
+
+        sent = tx_count - self._tx_count
+        received = rx_count - self._rx_count
+        self._sample_rate = received / elapsed
+        loss = int((sent - received) * 100 / sent) if sent > 0 else 0
+
+        shortest = NetworkConfig.TX_INTERVAL_MIN or NetworkConfig.TX_INTERVAL
+        if rtt:
+            shortest = max(shortest, rtt)
+        # Steady loss is the radio, only loss that grows with the rate is congestion
+        congested = backlog > NetworkConfig.TX_BACKLOG_LIMIT or (
+            loss > NetworkConfig.TX_LOSS_TARGET and loss > self._last_loss)
+        if congested:
+            self.interval = min(self.interval * NetworkConfig.TX_BACKOFF_FACTOR, NetworkConfig.TX_INTERVAL_MAX)
+        else:
+            self.interval = max(self.interval - NetworkConfig.TX_INTERVAL_STEP, shortest)
+
+        self._last_loss = loss
+        self._period_start = now
+        self._tx_count = tx_count
+        self._rx_count = rx_count
+        return self.interval
+
+    @property
+    def sample_rate(self) -> float:
+        """Get the replies per second of the last control period, None before the first one"""
+        return self._sample_rate
@@ -68,7 +68,7 @@ class RDMProcessor:
         Returns:
             float: Smoothed distance estimate in meters.
         """
-        energies = np.array(self._rdm_queue[-1][9])
+        energies = np.array(self._latest_rdm()[9])
         if len(energies) == 0:
             return 0.0
 
@@ -128,10 +128,10 @@ class RDMProcessor:
         Returns:
             list: Filtered RDM data suitable for visualization.
         """
-        if len(self._rdm_queue) == 0:
+        raw = self._latest_rdm()
+        if raw is None:
             return None
 
-        raw = self._rdm_queue[-1]
         filtered_data = []
         
         # Apply Thresholds
@@ -146,6 +146,31 @@ class RDMProcessor:
 
         return filtered_data
 
+    def _latest_rdm(self):
+        """Get the latest RDM data packet, None if the queue is empty"""
+        return self._rdm_queue[-1] if self._rdm_queue else None
+
+    @property
+    def target_detected(self) -> bool:
+        """Check if any range gate of the latest RDM packet is above its presence threshold"""
+        latest = self._latest_rdm()
+        if latest is None:
+            return False
+        return bool(np.any(np.asarray(latest[9]) >= self._gates_threshold))
+
+    @property
+    def queue_length(self) -> int:
+        """Get the number of packets in the RDM queue"""
+        return len(self._rdm_queue)
+
+    def clear_queues(self):
+        """Clear the RDM queue and the distance smoothing"""
+        self._rdm_queue.clear()
+        self._last_distance = None
+        self._target_distance = 0.0
+        self._absence_counter = 0
+        self._prev_distance.clear()
+
     def queue_rdm(self, rdm_data):
         """
         Queue new RDM data packet.
@@ -1,18 +1,26 @@
 import os
-import threading
+import time
 from pathlib import Path
 
-import numpy as np
 from flask import Flask
 
 from app.api.routes import create_api_routes
-from app.config.settings import RecordConfig, ModelConfig
+from app.config.settings import IngestConfig, NetworkConfig, RecordConfig, ModelConfig, ResourceConfig
 from app.core.csi_processor import CSIProcessor
 from app.core.file_manager import FileManager
+from app.core.health_monitor import HealthMonitor
+from app.core.ingest_process import IngestProcess
 from app.core.model_manager import ModelManager
-from app.core.network_manager import NetworkManager
+from app.core.motion_gate import MotionGate
+from app.core.network_manager import create_network_manager
+from app.core.node_registry import NodeRegistry, aggregate_rooms, presence_features, room_of
+from app.core.playback_manager import PlaybackManager
 from app.core.rdm_processor import RDMProcessor
+from app.utils.instrumentation import instrumentation, span
+from app.utils.metrics import CallbackCounter, Gauge, LatencySummary, register_process_metrics, registry
 from app.utils.packet_parser import parse_csi_data
+from app.utils.resource_monitor import ResourceMonitor
+from app.utils.rolling_stats import IntRingBuffer, RollingStats
 
 
 class WripleSystem:
@@ -26,24 +34,83 @@ class WripleSystem:
         self.csi_processor = CSIProcessor()
         self.rdm_processor = RDMProcessor()
         self.model_manager = ModelManager()
-        self.network_manager = NetworkManager()
+        self.network_manager = create_network_manager()
+        self.node_registry = NodeRegistry()
+        self.network_manager.subscribe_nodes(self.node_registry.add)
+        self.playback_manager = PlaybackManager(self.file_manager)
+        self.health_monitor = HealthMonitor(self.network_manager, lambda: self.ld2420_miss_count)
+        # Publish discovery changes without waiting for the next probe
+        self.network_manager.subscribe(lambda old, new: self.health_monitor.refresh())
+        self.model_manager.subscribe(self._on_model_swap)
+        self.resource_monitor = ResourceMonitor(inference_cpu=lambda: self.model_manager.cpu_time)
+        # Monitoring can receive and queue the packets in a child process, recording and playback stay here
+        self.ingest_process = IngestProcess() if IngestConfig.MODE == 'process' else None
+        # Source of the session counters, the network manager or the ingest process
+        self._capture = self.network_manager
         
         # Application state and counter
         self._recording = False
         self._monitoring = False
         self._noisy = True
         self._restart = False
-        self._ld2420_status = False
         self._ld2420_miss_count = -1
-        self._esp32_status = False
+        self._last_packet_ns = None
+        self._last_presence = 'Starting'
 
         # Initialize parameters and data storage
-        self._rssi = []
-        self._amp_variance = []
         self._csi_queue_limit = RecordConfig.CSI_QUEUE_LIMIT
         self._calibrate_count = ModelConfig.THRESHOLD_CALIBRATE_COUNT
+        self._noise_threshold = ModelConfig.NOISE_THRESHOLD
+        # Signal noise of the latest presence polls for the calibration gate
+        self._noise_stats = RollingStats(self._calibrate_count)
+        self._motion_gate = MotionGate()
         self._pred_signal_window = ModelConfig.PRED_SIGNAL_WINDOW
+        self._rssi = IntRingBuffer(self._csi_queue_limit, self._pred_signal_window)
+        self._local_signals = (self.csi_processor, self.rdm_processor, self._rssi)
         self._record_parameters = RecordConfig.RECORD_PARAMETERS
+        self._register_metrics()
+
+    def _on_model_swap(self, old: str, new: str):
+        """Calibrate the extra links again and stop reusing predictions of the previous model"""
+        self._motion_gate.reset()
+        for node in self.node_registry.nodes():
+            node.threshold.reset()
+            node.motion_gate.reset()
+
+    def _register_metrics(self):
+        """Expose the component state in the metrics registry"""
+        network_manager = self.network_manager
+        registry.register(Gauge('wriple_packet_loss_percent', 'Packet loss of the current session',
+                                function=lambda: self._capture.packet_loss))
+        registry.register(Gauge('wriple_heartbeat_rtt_seconds', 'Mean round trip of the ESP32 heartbeat',
+                                function=lambda: (network_manager.heartbeat_rtt['mean'] or float('nan')) / 1000.0))
+        registry.register(CallbackCounter('wriple_kernel_drops', 'Datagrams the kernel dropped on the receive socket',
+                                          function=lambda: network_manager.receive_stats['kernel_drops']))
+        registry.register(Gauge('wriple_socket_rcvbuf_bytes', 'Kernel receive buffer of the socket',
+                                function=lambda: network_manager.receive_stats['rcvbuf']))
+        registry.register(Gauge('wriple_tx_interval_seconds', 'Current CSI request interval',
+                                function=lambda: self._capture.tx_interval))
+        registry.register(Gauge('wriple_sample_rate_hz', 'CSI replies per second of the last rate control period',
+                                function=lambda: self._capture.sample_rate or 0.0))
+        registry.register(Gauge('wriple_session_packets', 'Packets received in the current session',
+                                function=lambda: self._capture.packet_count))
+        registry.register(Gauge('wriple_queue_depth', 'Items in the signal queues', ('queue',),
+                                function=lambda: {
+                                    ('csi',): self.csi_processor.queue_length,
+                                    ('rdm',): self.rdm_processor.queue_length,
+                                    ('rssi',): len(self._rssi),
+                                }))
+        registry.register(Gauge('wriple_ld2420_miss_count', 'Consecutive packets without LD2420 data',
+                                function=lambda: self.ld2420_miss_count))
+        registry.register(CallbackCounter('wriple_inference_skipped', 'Presence polls answered by the motion gate',
+                                          function=lambda: self._motion_gate.skipped))
+        registry.register(Gauge('wriple_writer_backlog_rows', 'Rows waiting to be written to the CSV file',
+                                function=lambda: self.file_manager.buffered_rows))
+        registry.register(Gauge('wriple_mode', 'Current mode, 0 recording, 1 monitoring, -1 idle',
+                                function=lambda: self.get_monitor_status()['modeStatus']))
+        registry.register(LatencySummary('wriple_stage_latency_seconds',
+                                         'Latency of the instrumented pipeline stages', instrumentation))
+        register_process_metrics()
 
     def _record_data_packet(self, parsed_data, tx_timestamp):
         """
@@ -65,8 +132,11 @@ class WripleSystem:
             raw_data: Raw data bytes received from ESP32 including the data from other sensors
             tx_timestamp: Timestamp of the transmitted packet
         """
+        received_ns = time.perf_counter_ns()
+
         # Extract radar and CSI data from parsed data
-        parsed_data = parse_csi_data(raw_data, self._ld2420_miss_count)
+        with span('parse'):
+            parsed_data = parse_csi_data(raw_data, self._ld2420_miss_count)
 
         if parsed_data is None:
             return
@@ -74,19 +144,34 @@ class WripleSystem:
         self._ld2420_miss_count = parsed_data[1]
 
         if self._monitoring:
-            if parsed_data[7]:
-                self.csi_processor.queue_csi(parsed_data[7])
+            with span('queue'):
+                if parsed_data[7]:
+                    self.csi_processor.queue_csi(parsed_data[7])
 
-            if parsed_data[0]: # If LD24020 data is valid
-                self.rdm_processor.queue_rdm(parsed_data[8:])
+                if parsed_data[0]: # If LD24020 data is valid
+                    self.rdm_processor.queue_rdm(parsed_data[8:])
 
-            self._rssi.append(parsed_data[3])
-            while len(self._rssi) > self._csi_queue_limit:
-                self._rssi.pop(0)
+                self._rssi.push(parsed_data[3])
+            self._last_packet_ns = received_ns
         
         # Record data to csv file if recording
         if self._recording:
             self._record_data_packet(parsed_data[2:], tx_timestamp)
+
+    def parse_node_data(self, raw_data: bytes, tx_timestamp: int, node_ip: str):
+        """
+        Process data received from an extra ESP32 link, only used while monitoring
+
+        Args:
+            raw_data: Raw data bytes received from the ESP32
+            tx_timestamp: Timestamp of the transmitted packet
+            node_ip: IP address of the ESP32
+        """
+        if not self._monitoring:
+            return
+        node = self.node_registry.get(node_ip) or self.node_registry.add(node_ip)
+        with span('node_ingest'):
+            node.ingest(raw_data)
     
     def start_capturing(self, is_recording: bool):
         """Start recording Wi-Fi CSI data into CSV file"""
@@ -96,13 +181,51 @@ class WripleSystem:
         if is_recording: self._recording = True
         else: self._monitoring = True
 
-        threading.Thread(
-            target=self.network_manager.start_receiving,
-            args=(self.parse_received_data, self._recording),
-            daemon=True
-        ).start()
+        if self.ingest_process is not None and not is_recording:
+            self._start_process_capture()
+            return
+
+        self.network_manager.start_receiving(self.parse_received_data, self._recording, self.parse_node_data)
         self.network_manager._start_csi_transmission()
     
+    def _start_process_capture(self):
+        """Monitor from the ingest process, reading the signal windows from its shared memory"""
+        self.ingest_process.start_capture()
+        self.csi_processor = self.ingest_process.csi_processor
+        self.rdm_processor = self.ingest_process.rdm_processor
+        self._rssi = self.ingest_process.rssi
+        self._capture = self.ingest_process
+
+    def start_playback(self, filename: str) -> dict:
+        """
+        Start replaying a recorded session through the monitoring pipeline
+
+        Args:
+            filename: Name of the CSV file in the recording directory
+
+        Returns:
+            dict: Playback status, or None if the file cannot be replayed
+        """
+        if filename not in self.file_manager.list_csv_files():
+            return None
+
+        self.stop_operations()
+        status = self.playback_manager.open(filename, self.parse_received_data, self._clear_signal_queues)
+        if status is None:
+            return None
+
+        self._monitoring = True
+        self.playback_manager.play()
+        return self.playback_manager.status
+
+    def _clear_signal_queues(self):
+        """Clear the signal windows when the playback jumps to a new position"""
+        self.csi_processor.clear_queues()
+        self.rdm_processor.clear_queues()
+        self._rssi.clear()
+        # A prediction made before the jump does not describe the new position
+        self._motion_gate.reset()
+
     def stop_operations(self):
         """Stop all recording/monitoring operations"""
         self._recording = False
@@ -110,13 +233,22 @@ class WripleSystem:
         self._noisy = True
         self._restart = False
 
+        self.playback_manager.stop()
+        if self._capture is self.ingest_process:
+            self.ingest_process.stop_capture()
+            self.csi_processor, self.rdm_processor, self._rssi = self._local_signals
+            self._capture = self.network_manager
         self.network_manager.stop_transmitting()
         self.network_manager.stop_listening()
         self.model_manager.reset_threshold()
+        self._motion_gate.reset()
         self.csi_processor.clear_queues()
         self.file_manager.close()
         self._rssi.clear()
-        self._amp_variance.clear()
+        self._noise_stats.clear()
+        self._last_packet_ns = None
+        self._last_presence = 'Starting'
+        self.node_registry.reset()
     
     def get_system_status(self) -> dict:
         """
@@ -125,21 +257,17 @@ class WripleSystem:
         Returns:
             dict: Dictionary with status of each system component
         """
-        ap_status = self.network_manager.check_wifi_connection()
-        if ap_status:
-            if self.network_manager.check_esp32():
-                self._esp32_status = True
-                self._ld2420_status = self._ld2420_miss_count < 35
-            else:
-                self._esp32_status = False
-                self._ld2420_status = False
-
+        # Probed in the background by the health monitor, never blocks on the check commands
+        health = self.health_monitor.status
         return {
-            'ap': ap_status,
-            'esp32': self._esp32_status,
-            'ld2420': self._ld2420_status,
+            'ap': health['ap'],
+            'esp32': health['esp32'],
+            'ld2420': health['ld2420'],
+            'stale': health['stale'],
+            'rtt': self.network_manager.heartbeat_rtt['last'],
+            'discovery': self.network_manager.discovery_state,
             'model': self.model_manager.model_loaded,
-            'rssi': self._rssi[-1] if self._rssi else 0
+            'rssi': self._rssi.latest or 0
         }
     
     def get_monitor_status(self) -> dict:
@@ -149,12 +277,18 @@ class WripleSystem:
         Returns:
             dict: Dictionary with monitoring status and metrics
         """
-        mode_status = (0 if self._recording and self.network_manager.is_receiving else 
+        mode_status = (0 if self._recording and self._capture.is_receiving else 
                        1 if self._monitoring else -1)
+        if self.playback_manager.is_active:
+            packet_count = self.playback_manager.packet_count
+        else:
+            packet_count = self._capture.packet_count
+
         return {
             'modeStatus': mode_status,
-            'packetCount': self.network_manager.packet_count,
-            'rssi': self._rssi[-1] if self._rssi else 0
+            'packetCount': packet_count,
+            'sampleRate': self._capture.sample_rate,
+            'rssi': self._rssi.latest or 0
         }
     
     def _predict_presence(self) -> int:
@@ -164,16 +298,19 @@ class WripleSystem:
         Returns:
             int: Presence prediction (1 for presence, 0 for absence)
         """
-        if len(self._rssi) > self._pred_signal_window and self.model_manager.model_loaded:
-            rssi_window = self._rssi[-self._pred_signal_window:]
-            rssi_std = np.std(rssi_window)
-            rssi_mean = np.mean(rssi_window)
-            amps_window = self.csi_processor.get_amplitude_window()
-
-            X = [float(rssi_mean), float(rssi_std)] + amps_window
-            return self.model_manager.predict(X)
-        else:
-            return 'Starting'
+        if self.model_manager.model_loaded:
+            with span('motion_gate'):
+                reused = self._motion_gate.reuse(self.csi_processor, self.rdm_processor, self._rssi)
+            if reused is not None:
+                return reused
+            with span('preprocess'):
+                X = presence_features(self._rssi, self.csi_processor)
+            if X is not None:
+                with span('inference'):
+                    presence = self.model_manager.predict(X)
+                self._motion_gate.record(presence)
+                return presence
+        return 'Starting'
     
     def get_presence_status(self) -> dict:
         """
@@ -182,36 +319,94 @@ class WripleSystem:
         Returns:
             dict: Dictionary with presence prediction and related metrics
         """
+        status = self._get_presence_status()
+        self._last_presence = status['presence']
+        return status
+
+    def _get_presence_status(self) -> dict:
+        """Run the noise gate and the prediction of the main link"""
         if self._noisy:
-            self._amp_variance.append(self.csi_processor.amplitude_variance)
-            # Signal noise greater than 100.0 is unreliable
-            noisy = np.mean(self._amp_variance[-self._calibrate_count:]) > 50.0
+            amp_variance = self.csi_processor.amplitude_variance
+            self._noise_stats.push(amp_variance)
+            # Signal noise above the threshold is unreliable
+            noisy = self._noise_stats.mean > self._noise_threshold
             
             if noisy:
                 self._restart = True
                 self.model_manager.reset_threshold()
+                self._motion_gate.reset()
                 return {
                     'presence': 'Noisy',
-                    'packetLoss': self.network_manager.packet_loss,
-                    'ampVariance': self._amp_variance[-1]
+                    'packetLoss': self._capture.packet_loss,
+                    'ampVariance': amp_variance
                 }
             
-            if len(self._amp_variance) >= self._calibrate_count and not self._restart:
+            if self._noise_stats.is_full and not self._restart:
                 self._noisy = False
-            elif len(self._amp_variance) >= self._calibrate_count and self._restart:
+            elif self._noise_stats.is_full and self._restart:
                 # Prompt user to restart monitoring
                 return {
                     'presence': 'Restart',
-                    'packetLoss': self.network_manager.packet_loss,
-                    'ampVariance': self._amp_variance[-1]
+                    'packetLoss': self._capture.packet_loss,
+                    'ampVariance': amp_variance
                 }
         
         return {
             'presence': self._predict_presence(),
-            'packetLoss': self.network_manager.packet_loss,
+            'packetLoss': self._capture.packet_loss,
             'ampVariance': self.csi_processor.amplitude_variance
         }
     
+    def get_room_presence(self) -> dict:
+        """
+        Predict presence on every extra link and combine the links of each room
+
+        Returns:
+            dict: Presence of each room and the status of each link
+        """
+        main_ip = NetworkConfig.TX_ESP32_IP
+        nodes = [{
+            'ip': main_ip,
+            'room': room_of(main_ip),
+            'online': self.health_monitor.status['esp32'],
+            'packetCount': self._capture.packet_count,
+            'rssi': self._rssi.latest or 0,
+            'presence': self._last_presence,
+            'packetLoss': self._capture.packet_loss,
+        }]
+        node_stats = self.network_manager.node_stats
+        for node in self.node_registry.nodes():
+            if self._monitoring and node.online:
+                with span('node_inference'):
+                    node.predict(self.model_manager)
+            status = node.status
+            status['packetLoss'] = node_stats.get(node.ip, {}).get('packetLoss', 0)
+            nodes.append(status)
+
+        return {
+            'rooms': aggregate_rooms([(n['room'], n['presence']) for n in nodes if n['online']]),
+            'nodes': nodes,
+        }
+
+    @property
+    def rssi_features(self) -> dict:
+        """Get the mean, std, min, max and slope of the RSSI prediction window"""
+        return self._rssi.features()
+
+    @property
+    def last_packet_ns(self) -> int:
+        """Get the perf counter time the latest monitored packet was received"""
+        if self._capture is self.ingest_process:
+            return self.ingest_process.last_packet_ns
+        return self._last_packet_ns
+
+    @property
+    def ld2420_miss_count(self) -> int:
+        """Get the consecutive packets without LD2420 data"""
+        if self._capture is self.ingest_process:
+            return self.ingest_process.ld2420_miss_count
+        return self._ld2420_miss_count
+
     def get_radar_status(self) -> dict:
         """
         Get radar data and predictions
@@ -246,6 +441,9 @@ def init_app_backend(app):
     """Initialize the Human Detection System backend"""
     wriple_system = WripleSystem()
     create_api_routes(app, wriple_system)
+    wriple_system.health_monitor.start()
+    if ResourceConfig.AUTO_START:
+        wriple_system.resource_monitor.start()
     return wriple_system
 
 def create_app():
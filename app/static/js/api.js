@@ -43,4 +43,8 @@ export const API = {
   
   getCsvFiles: () => getJson('/get_csv_files'),
   readCsvFileMeta: (filename) => postJson('/read_csv_file_meta', filename),
+
+  startPlayback: (filename) => postJson('/start_playback', filename),
+  controlPlayback: (action, value) => postJson('/control_playback', { action, value }),
+  getPlaybackStatus: () => getJson('/get_playback_status'),
 };
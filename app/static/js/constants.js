@@ -76,6 +76,11 @@ export const SELECTORS = {
   detectionChartContainer: '#detection-chart-container',
 
   datasetList: '#dataset-list',
+
+  playbackBtn: '#playback-btn',
+  playbackSpeed: '#playback-speed',
+  playbackSeek: '#playback-seek',
+  playbackTime: '#playback-time',
 };
 
 export const OPTIONS = {
@@ -165,6 +170,12 @@ export const MAIN_DELAYS = {
   delayRecordingAction: 1000
 };
 
+export const PLAYBACK = {
+  speeds: [0.5, 1, 2, 4, 8],
+  defaultSpeed: 1,
+  delayStatus: 250
+};
+
 export const RADAR = {
   refreshRate: 333,
   maxDistance: 10_000
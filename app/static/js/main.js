@@ -4,10 +4,12 @@ import { OptionsUI } from './options.js';
 import { HeatmapVisualizer } from './visualizers/heatmap.js';
 import { RadarVisualizer } from './visualizers/radar.js';
 import { LineChart } from './visualizers/linechart.js';
-import { MAIN_DELAYS } from './constants.js';
+import { MAIN_DELAYS, PLAYBACK } from './constants.js';
 
 let monitorInterval = null;
 let predictionInterval = null;
+let playbackInterval = null;
+let playbackSeeking = false;
 
 const ampHeatmap = new HeatmapVisualizer({
   canvas: UI.visualizerNodes.amplitudeCanvas,
@@ -169,6 +171,52 @@ async function updateStatusBar() {
   }
 }
 
+async function updatePlaybackDisplay() {
+  const status = await API.getPlaybackStatus();
+  if (!status.active) {
+    stopPlayback();
+    return;
+  }
+  UI.setPlaybackTexts(status, playbackSeeking);
+  UI.setHeaderTexts(await API.getMonitorStatus());
+}
+
+async function startPlayback() {
+  const filename = UI.nodes.datasetList.value;
+  if (!filename) return;
+
+  const status = await API.startPlayback(filename);
+  await API.controlPlayback('speed', parseFloat(UI.playbackNodes.playbackSpeed.value));
+  UI.playbackNodes.playbackBtn.dataset.active = '1';
+  UI.setPlaybackTexts(status);
+
+  playbackInterval = setInterval(() => updatePlaybackDisplay(), PLAYBACK.delayStatus);
+  predictionInterval = setInterval(() => updatePresenceDisplay(), MAIN_DELAYS.delayPresenceInterval);
+
+  radar.start();
+  ampHeatmap.show();
+  ampHeatmap.start();
+  dopplerHeatmap.show();
+  dopplerHeatmap.start();
+  noiseChart.start();
+  detectionChart.init();
+}
+
+function stopPlayback() {
+  if (!UI.isPlaybackActive()) return;
+  clearInterval(playbackInterval);
+  clearInterval(predictionInterval);
+  UI.playbackNodes.playbackBtn.dataset.active = '0';
+  UI.setPlaybackTexts();
+  stopVisualizers();
+  UI.setPresenceTexts();
+  // Delay the stopCapturing to ensure all visualizers have stopped fetching data
+  setTimeout(() => {
+    API.stopCapturing();
+    UI.setPresenceTexts();
+  }, 100);
+}
+
 function wireSidebar() {
   UI.sidebarNodes.collapseBtn.addEventListener('click', () => {
     UI.sidebarNodes.sidebarContainer.classList.toggle('w-20');
@@ -178,6 +226,7 @@ function wireSidebar() {
   });
 
   UI.sidebarNodes.monitorTabBtn.addEventListener('click', () => {
+    stopPlayback();
     if (UI.sidebarNodes.monitorTabBtn.dataset.active === '0') {
       UI.setTabSelected(UI.sidebarNodes.monitorTabBtn);
       UI.setTabDefault(UI.sidebarNodes.historyTabBtn);
@@ -201,6 +250,7 @@ function wireSidebar() {
   });
 
   UI.sidebarNodes.historyTabBtn.addEventListener('click', () => {
+    stopPlayback();
     if (UI.sidebarNodes.historyTabBtn.dataset.active === '0') {
       UI.setTabDefault(UI.sidebarNodes.monitorTabBtn);
       UI.setTabSelected(UI.sidebarNodes.historyTabBtn);
@@ -225,6 +275,7 @@ function wireSidebar() {
   });
 
   UI.sidebarNodes.datasetTabBtn.addEventListener('click', () => {
+    stopPlayback();
     if (UI.sidebarNodes.datasetTabBtn.dataset.active === '0') {
       UI.setTabDefault(UI.sidebarNodes.monitorTabBtn);
       UI.setTabDefault(UI.sidebarNodes.historyTabBtn);
@@ -326,8 +377,36 @@ function wireHeatmapSliders() {
   });
 }
 
+function wirePlayback() {
+  const n = UI.playbackNodes;
+  n.playbackSpeed.innerHTML = PLAYBACK.speeds.map(s => `<option value="${s}">${s}x</option>`).join('\n');
+  n.playbackSpeed.value = PLAYBACK.defaultSpeed;
+
+  n.playbackBtn.addEventListener('click', async () => {
+    if (!UI.isPlaybackActive()) {
+      await startPlayback();
+      return;
+    }
+    const status = await API.getPlaybackStatus();
+    UI.setPlaybackTexts(await API.controlPlayback(status.playing ? 'pause' : 'play'));
+  });
+
+  n.playbackSpeed.addEventListener('change', async (e) => {
+    if (UI.isPlaybackActive())
+      UI.setPlaybackTexts(await API.controlPlayback('speed', parseFloat(e.target.value)));
+  });
+
+  n.playbackSeek.addEventListener('input', () => { playbackSeeking = true; });
+  n.playbackSeek.addEventListener('change', async (e) => {
+    playbackSeeking = false;
+    if (UI.isPlaybackActive())
+      UI.setPlaybackTexts(await API.controlPlayback('seek', parseFloat(e.target.value)));
+  });
+}
+
 function wireSelections() {
   UI.nodes.datasetList.addEventListener('change', async (e) => {
+    stopPlayback();
     const selectedDataset = e.target.value;
     if (selectedDataset) {
       const meta = await API.readCsvFileMeta(selectedDataset);
@@ -354,6 +433,7 @@ function init() {
   wireFloatingActionButtons();
   wireHeatmapSliders();
   wireSelections();
+  wirePlayback();
 
   setInterval(() => updateStatusBar(), MAIN_DELAYS.delaySystemIconStatus);
   updateStatusBar();
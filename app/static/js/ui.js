@@ -97,6 +97,13 @@ export const UI = {
     datasetList: $(SELECTORS.datasetList),
   },
 
+  playbackNodes: {
+    playbackBtn: $(SELECTORS.playbackBtn),
+    playbackSpeed: $(SELECTORS.playbackSpeed),
+    playbackSeek: $(SELECTORS.playbackSeek),
+    playbackTime: $(SELECTORS.playbackTime),
+  },
+
   statusBarStates: {
     ap: false,
     flask: false,
@@ -233,6 +240,28 @@ export const UI = {
     n.metaRecordingDate.textContent = meta?.recording_date ?? '';
   },
 
+  formatPlaybackTime(seconds) {
+    const total = Math.floor(seconds || 0);
+    const minutes = Math.floor(total / 60);
+    return `${minutes}:${String(total % 60).padStart(2, '0')}`;
+  },
+
+  setPlaybackTexts(status = {}, seeking = false) {
+    const n = this.playbackNodes;
+    const position = status?.position || 0;
+    const duration = status?.duration || 0;
+
+    n.playbackBtn.textContent = status?.playing ? 'Pause' : 'Play';
+    n.playbackSeek.max = duration;
+    // Keep the slider where the user is dragging it
+    if (!seeking) n.playbackSeek.value = position;
+    n.playbackTime.textContent = `${this.formatPlaybackTime(position)} / ${this.formatPlaybackTime(duration)}`;
+  },
+
+  isPlaybackActive() {
+    return this.playbackNodes.playbackBtn.dataset.active === '1';
+  },
+
   setButtonActive(buttonNode) {
     buttonNode.style.backgroundColor = UI_COLORS.btnActiveColor;
     buttonNode.dataset.active = '1';
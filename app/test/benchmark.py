@@ -0,0 +1,369 @@
+"""
+Per-stage benchmark of the signal pipeline with a JSON baseline regression gate
+
+Usage:
+    python -m app.test.benchmark run --output baseline.json
+    python -m app.test.benchmark run --record "WRIPLE_DATA_*.csv" --output recorded.json
+    python -m app.test.benchmark compare baseline.json --max-regression 15
+    python -m app.test.benchmark models --batch 4096
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.config.settings import ModelConfig, RecordConfig
+from app.core.csi_processor import CSIProcessor
+from app.core.rdm_processor import RDMProcessor
+from app.test.esp32_simulator import generate_synthetic_packets, load_recorded_packets
+from app.test.replay import StageTimer
+from app.utils.packet_parser import parse_csi_data
+
+_WARMUP_ITERATIONS = 20
+
+
+def _parse_packets(packets: list) -> list:
+    """Parse payloads, skipping the ones the live pipeline would drop"""
+    parsed = [parse_csi_data(payload, -1) for payload in packets]
+    return [p for p in parsed if p is not None]
+
+
+class PipelineBenchmark:
+    """
+    Times each pipeline stage in isolation on a fixed set of packets.
+    Stateful stages are primed with full queues, the same as during monitoring.
+    """
+
+    def __init__(self, packets: list, iterations: int = 500, model_manager=None):
+        """
+        Args:
+            packets: Packet payloads in the ESP32 format
+            iterations: Timed calls per stage
+            model_manager: Loaded ModelManager to time inference with, skipped if None
+        """
+        self._packets = packets
+        self._parsed = _parse_packets(packets)
+        self._csi = [p[7] for p in self._parsed if p[7]]
+        self._rdm = [p[8:] for p in self._parsed if p[0]]
+        self._iterations = iterations
+        self._model_manager = model_manager
+        self._timer = StageTimer()
+
+    def _time(self, stage: str, func, inputs=None):
+        """
+        Call a function repeatedly and record each duration
+
+        Args:
+            stage: Stage name used in the report
+            func: Function to time
+            inputs: Iterable cycled as the function argument, no argument if None
+        """
+        args = itertools.cycle(inputs) if inputs is not None else itertools.repeat(None)
+        for i in range(_WARMUP_ITERATIONS + self._iterations):
+            arg = next(args)
+            start = time.perf_counter_ns()
+            if inputs is None:
+                func()
+            else:
+                func(arg)
+            elapsed = time.perf_counter_ns() - start
+            if i >= _WARMUP_ITERATIONS:
+                self._timer.record(stage, elapsed)
+
+    def _primed_csi_processor(self) -> CSIProcessor:
+        """Create a CSIProcessor with a full amplitude queue"""
+        processor = CSIProcessor()
+        for raw_csi in itertools.islice(itertools.cycle(self._csi), RecordConfig.CSI_QUEUE_LIMIT + 1):
+            processor.queue_csi(raw_csi)
+        return processor
+
+    def _primed_rdm_processor(self) -> RDMProcessor:
+        """Create an RDMProcessor with a full RDM queue"""
+        processor = RDMProcessor()
+        for rdm in itertools.islice(itertools.cycle(self._rdm), RecordConfig.RDM_QUEUE_LIMIT):
+            processor.queue_rdm(rdm)
+        return processor
+
+    def _model_features(self, csi_processor: CSIProcessor) -> list:
+        """Build a model input the same way WripleSystem does"""
+        rssi_window = [p[3] for p in itertools.islice(itertools.cycle(self._parsed),
+                                                      ModelConfig.PRED_SIGNAL_WINDOW)]
+        amps_window = csi_processor.get_amplitude_window()
+        return [float(np.mean(rssi_window)), float(np.std(rssi_window))] + amps_window
+
+    def run(self) -> dict:
+        """
+        Time every stage
+
+        Returns:
+            dict: Count and microsecond statistics for each stage
+        """
+        self._time('parse', lambda payload: parse_csi_data(payload, -1), self._packets)
+
+        if self._csi:
+            queue_processor = CSIProcessor()
+            self._time('queue_csi', queue_processor.queue_csi, self._csi)
+
+            csi_processor = self._primed_csi_processor()
+            self._time('heatmap', csi_processor.get_amps_heatmap_data)
+            self._time('amplitude_window', csi_processor.get_amplitude_window)
+
+            if self._model_manager is not None and self._model_manager.model_loaded:
+                features = self._model_features(csi_processor)
+                n_features = self._model_manager.n_features
+                if len(features) == n_features:
+                    self._time('inference', lambda: self._model_manager.predict(features))
+                else:
+                    # A prediction on the wrong width only times the error path
+                    print(f'Skipping inference: the live pipeline builds {len(features)} features '
+                          f'but the model expects {n_features}', file=sys.stderr)
+
+        if self._rdm:
+            rdm_processor = self._primed_rdm_processor()
+            self._time('rdm_filter', rdm_processor.get_filtered_data)
+            self._time('distance', rdm_processor.estimate_distance)
+
+        return self._timer.summary()
+
+
+def benchmark_models(packets: list, iterations: int = 500, batch: int = 4096, wait: float = 30.0) -> dict:
+    """
+    Time the presence models on the same input, one window at a time as the live
+    predictions and a batch of windows as the offline evaluation
+
+    Args:
+        packets: Packet payloads in the ESP32 format
+        iterations: Timed single window predictions per model
+        batch: Windows per timed batch prediction
+        wait: Seconds to wait for each model to load
+
+    Returns:
+        dict: Single window statistics and batch windows per second of each model
+            that loaded, the random forest with and without compilation
+
+    Raises:
+        ValueError: If the live features do not have the width a loaded model expects
+    """
+    from app.core.model_manager import ModelManager
+
+    benchmark = PipelineBenchmark(packets, iterations)
+    live_features = np.asarray(benchmark._model_features(benchmark._primed_csi_processor()))
+    rng = np.random.default_rng(0)
+
+    timer = StageTimer()
+    throughput = {}
+    for model in ('forest', 'convlstm'):
+        model_manager = ModelManager(model)
+        if not model_manager.wait_loaded(wait):
+            continue
+        # Timing made-up inputs would hide that the live pipeline and the model disagree
+        if len(live_features) != model_manager.n_features:
+            raise ValueError(f'The live pipeline builds {len(live_features)} features but the {model} '
+                             f'model expects {model_manager.n_features}')
+        features = live_features
+        # Jitter the batch rows so they do not all take the same tree paths
+        batch_features = features * (1.0 + 0.05 * rng.standard_normal((batch, len(features))))
+        variants = [(model, None)]
+        loaded = model_manager._active
+        if model == 'forest' and loaded.compiled_forest is not None:
+            variants.append(('forest_sklearn', loaded.compiled_forest))
+
+        for name, compiled_forest in variants:
+            if compiled_forest is not None:
+                # Predict through scikit-learn for comparison
+                loaded.compiled_forest = None
+            for i in range(_WARMUP_ITERATIONS + iterations):
+                start = time.perf_counter_ns()
+                model_manager.predict_proba_batch(features[None, :])
+                if i >= _WARMUP_ITERATIONS:
+                    timer.record(name, time.perf_counter_ns() - start)
+            start = time.perf_counter()
+            model_manager.predict_proba_batch(batch_features)
+            throughput[name] = round(batch / (time.perf_counter() - start), 1)
+            if compiled_forest is not None:
+                loaded.compiled_forest = compiled_forest
+
+    stages = timer.summary()
+    for name, stats in stages.items():
+        stats['batch_windows_per_s'] = throughput[name]
+    return stages
+
+
+def run_benchmark(packets: list, source: str, iterations: int = 500, model_manager=None) -> dict:
+    """
+    Run the benchmark and wrap the results with the environment details
+
+    Args:
+        packets: Packet payloads in the ESP32 format
+        source: Description of where the packets came from
+        iterations: Timed calls per stage
+        model_manager: Loaded ModelManager to time inference with, skipped if None
+
+    Returns:
+        dict: Benchmark report that can be saved as a baseline
+    """
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'source': source,
+        'packets': len(packets),
+        'iterations': iterations,
+        'stages': PipelineBenchmark(packets, iterations, model_manager).run(),
+    }
+
+
+def compare_reports(baseline: dict, current: dict, metric: str = 'p50_us',
+                    max_regression: float = 10.0, allow_missing: bool = False) -> dict:
+    """
+    Compare a benchmark report against a baseline
+
+    Args:
+        baseline: Baseline benchmark report
+        current: New benchmark report
+        metric: Stage statistic to compare
+        max_regression: Highest allowed slowdown in percent
+        allow_missing: Pass even if baseline stages did not run, such as inference without a model
+
+    Returns:
+        dict: Per-stage changes, the regressed stages and whether the gate passed
+    """
+    stages = {}
+    regressions = []
+    for stage, base_stats in baseline['stages'].items():
+        current_stats = current['stages'].get(stage)
+        if current_stats is None or not base_stats.get(metric):
+            continue
+        change = (current_stats[metric] - base_stats[metric]) / base_stats[metric] * 100.0
+        stages[stage] = {
+            'baseline': base_stats[metric],
+            'current': current_stats[metric],
+            'change_pct': round(change, 2),
+        }
+        if change > max_regression:
+            regressions.append(stage)
+
+    missing = sorted(set(baseline['stages']) - set(current['stages']))
+    return {
+        'metric': metric,
+        'max_regression': max_regression,
+        'stages': stages,
+        'missing': missing,
+        'regressions': regressions,
+        'passed': not regressions and (allow_missing or not missing),
+    }
+
+
+def _load_packets(record_pattern: str) -> tuple[list, str]:
+    """Load recorded packets matching a pattern, or synthetic packets if None"""
+    if not record_pattern:
+        return generate_synthetic_packets(seed=0), 'synthetic'
+
+    from app.core.dataset_loader import DatasetLoader
+    filenames = DatasetLoader().resolve_paths(record_pattern)
+    if not filenames:
+        raise SystemExit(f'No CSV files matched {record_pattern}')
+    packets = [payload for filename in filenames for payload in load_recorded_packets(filename)]
+    return packets, f'recorded:{record_pattern}'
+
+
+def _load_model_manager(wait: float):
+    """Load the presence model, or None if it is not available in time"""
+    if wait <= 0:
+        return None
+
+    from app.core.model_manager import ModelManager
+    model_manager = ModelManager()
+    deadline = time.monotonic() + wait
+    while not model_manager.model_loaded and time.monotonic() < deadline:
+        time.sleep(0.1)
+    return model_manager if model_manager.model_loaded else None
+
+
+def _print_stages(stages: dict):
+    for stage, stats in stages.items():
+        print(f'{stage:>16}: n={stats["count"]} mean={stats["mean_us"]}us p50={stats["p50_us"]}us '
+              f'p95={stats["p95_us"]}us p99={stats["p99_us"]}us')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the signal pipeline stages')
+    parser.add_argument('--record', default=None,
+                        help='CSV file or glob of recorded sessions, synthetic packets if omitted')
+    parser.add_argument('--iterations', type=int, default=500, help='Timed calls per stage')
+    parser.add_argument('--wait-model', type=float, default=30.0,
+                        help='Seconds to wait for the model to load, 0 skips inference')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmark and save the results')
+    run_parser.add_argument('--output', default=None, help='JSON file to write the results to')
+
+    models_parser = subparsers.add_parser('models', help='Compare the latency of the presence models')
+    models_parser.add_argument('--batch', type=int, default=ModelConfig.PREDICT_BATCH_SIZE,
+                               help='Windows per timed batch prediction')
+
+    compare_parser = subparsers.add_parser('compare', help='Fail if a stage regressed against a baseline')
+    compare_parser.add_argument('baseline', help='Baseline JSON file')
+    compare_parser.add_argument('--current', default=None,
+                                help='JSON results to compare instead of running the benchmark')
+    compare_parser.add_argument('--metric', default='p50_us',
+                                choices=['mean_us', 'p50_us', 'p95_us', 'p99_us', 'max_us'])
+    compare_parser.add_argument('--max-regression', type=float, default=10.0,
+                                help='Highest allowed slowdown in percent')
+    compare_parser.add_argument('--allow-missing', action='store_true',
+                                help='Pass even if baseline stages are missing from the current results')
+    args = parser.parse_args()
+
+    if args.command == 'models':
+        packets, _ = _load_packets(args.record)
+        try:
+            stages = benchmark_models(packets, args.iterations, args.batch, args.wait_model)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        if not stages:
+            raise SystemExit('No presence model could be loaded')
+        for name, stats in stages.items():
+            print(f'{name:>16}: p50={stats["p50_us"]}us p99={stats["p99_us"]}us '
+                  f'batch={stats["batch_windows_per_s"]} windows/s')
+        return
+
+    if args.command == 'compare' and args.current:
+        with open(args.current, mode='r', encoding='utf-8') as file:
+            report = json.load(file)
+    else:
+        packets, source = _load_packets(args.record)
+        report = run_benchmark(packets, source, args.iterations, _load_model_manager(args.wait_model))
+        _print_stages(report['stages'])
+
+    if args.command == 'run':
+        if args.output:
+            with open(args.output, mode='w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2)
+        return
+
+    with open(args.baseline, mode='r', encoding='utf-8') as file:
+        baseline = json.load(file)
+    result = compare_reports(baseline, report, args.metric, args.max_regression, args.allow_missing)
+
+    for stage, change in result['stages'].items():
+        flag = ' REGRESSION' if stage in result['regressions'] else ''
+        print(f'{stage:>16}: {change["baseline"]}us -> {change["current"]}us '
+              f'({change["change_pct"]:+.1f}%){flag}')
+    for stage in result['missing']:
+        print(f'{stage:>16}: missing from the current results')
+
+    if result['regressions']:
+        raise SystemExit(f'{len(result["regressions"])} stage(s) regressed more than {args.max_regression}%')
+    if not result['passed']:
+        raise SystemExit(f'{len(result["missing"])} baseline stage(s) missing, use --allow-missing to ignore them')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""
+Local UDP simulator of the ESP32 transceiver for load-testing the network path
+
+Usage:
+    python -m app.test.esp32_simulator --serve --loss 0.05 --jitter 0.005
+    python -m app.test.esp32_simulator --load-test --intervals 0.016 0.008 0.004 0.002
+"""
+
+import argparse
+import heapq
+import itertools
+import random
+import socket
+import threading
+import time
+
+from app.config.settings import NetworkConfig
+from app.utils.logger import setup_logger
+from app.utils.packet_parser import encode_csi_data
+
+_DISCOVERY_REPLY = b'Wriple'
+_RDM_PACKET_INTERVAL = 20   # LD2420 produces one RDM for about every 20 CSI packets
+
+
+def generate_synthetic_packets(count: int = 600, csi_length: int = 256, seed: int = None) -> list:
+    """
+    Generate packets with random CSI and periodic RDM data
+
+    Args:
+        count: Number of packets to generate
+        csi_length: Number of I/Q values per CSI sample
+        seed: Random seed for repeatable packets
+
+    Returns:
+        list: Packet payloads in the ESP32 format
+    """
+    rng = random.Random(seed)
+    packets = []
+    for i in range(count):
+        raw_csi = [rng.randint(-40, 40) for _ in range(csi_length)]
+        ld2420_rdm = None
+        if i % _RDM_PACKET_INTERVAL == 0:
+            ld2420_rdm = [[rng.randint(0, 2000) for _ in range(16)] for _ in range(20)]
+        packets.append(encode_csi_data(i * 16000, rng.randint(-55, -35), 1, 6, 0, raw_csi, ld2420_rdm))
+    return packets
+
+
+def load_recorded_packets(filename: str) -> list:
+    """
+    Load the packets of a recorded session
+
+    Args:
+        filename: CSV file name in the recording directory or a full path
+
+    Returns:
+        list: Packet payloads in the ESP32 format
+    """
+    from app.core.file_manager import FileManager
+    return [payload for _, payload, _ in FileManager().read_recorded_packets(filename)]
+
+
+class ESP32Simulator:
+    """
+    Answers the station like the ESP32 firmware does: discovery broadcasts get a
+    short reply and every CSI request gets the next packet of the replayed set.
+    Replies can be rate limited, dropped, reordered and delayed.
+    """
+
+    def __init__(self, packets: list = None, host: str = '127.0.0.1', port: int = None,
+                 max_rate: float = None, loss: float = 0.0, reorder: float = 0.0,
+                 jitter: float = 0.0, seed: int = None):
+        """
+        Args:
+            packets: Packet payloads to reply with, synthetic packets if None
+            host: Address to bind to
+            port: Port to bind to, NetworkConfig.TX_PORT if None
+            max_rate: Maximum replies per second, requests above it are dropped
+            loss: Probability of dropping a reply
+            reorder: Probability of holding a reply until after the next one
+            jitter: Maximum random reply delay in seconds
+            seed: Random seed for repeatable impairments
+        """
+        self._packets = packets or generate_synthetic_packets(seed=seed)
+        self._address = (host, port or NetworkConfig.TX_PORT)
+        self._min_reply_interval = 1.0 / max_rate if max_rate else 0.0
+        self._loss = loss
+        self._reorder = reorder
+        self._jitter = jitter
+        self._rng = random.Random(seed)
+
+        self._socket = None
+        self._running = False
+        self._streaming = False
+        self._packet_cycle = itertools.cycle(self._packets)
+        self._held_reply = None
+        self._last_reply_time = 0.0
+
+        # Replies waiting for their send time as (send_time, sequence, payload, address)
+        self._pending = []
+        self._pending_cond = threading.Condition()
+        self._sequence = itertools.count()
+
+        self.stats = {'requests': 0, 'sent': 0, 'dropped': 0, 'rate_limited': 0,
+                      'reordered': 0, 'discovery': 0}
+        self._logger = setup_logger('ESP32Simulator')
+
+    def start(self):
+        """Bind the socket and start the request and reply threads"""
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(self._address)
+        self._socket.settimeout(NetworkConfig.RX_SOCKET_TIMEOUT)
+        self._running = True
+        threading.Thread(target=self._serve_requests, name='SimulatorRX', daemon=True).start()
+        threading.Thread(target=self._send_replies, name='SimulatorTX', daemon=True).start()
+        self._logger.info(f'Listening on {self._address[0]}:{self._address[1]}')
+
+    def stop(self):
+        """Stop the simulator and close its socket"""
+        self._running = False
+        with self._pending_cond:
+            self._pending_cond.notify()
+        if self._socket:
+            self._socket.close()
+        self._logger.info(f'Stopped with {self.stats}')
+
+    def _schedule(self, payload: bytes, address: tuple, delay: float = 0.0):
+        """Queue a reply to be sent after the delay"""
+        with self._pending_cond:
+            heapq.heappush(self._pending, (time.perf_counter() + delay, next(self._sequence), payload, address))
+            self._pending_cond.notify()
+
+    def _handle_csi_request(self, address: tuple):
+        """Reply to a CSI request applying the rate limit and impairments"""
+        now = time.perf_counter()
+        if now - self._last_reply_time < self._min_reply_interval:
+            self.stats['rate_limited'] += 1
+            return
+        self._last_reply_time = now
+
+        payload = next(self._packet_cycle)
+        if self._rng.random() < self._loss:
+            self.stats['dropped'] += 1
+            return
+
+        delay = self._rng.uniform(0.0, self._jitter) if self._jitter else 0.0
+        if self._held_reply is None and self._rng.random() < self._reorder:
+            # Send this reply right after the next one
+            self._held_reply = payload
+            self.stats['reordered'] += 1
+            return
+
+        self._schedule(payload, address, delay)
+        if self._held_reply is not None:
+            self._schedule(self._held_reply, address, delay)
+            self._held_reply = None
+
+    def _serve_requests(self):
+        """Receive and answer station requests"""
+        while self._running:
+            try:
+                data, address = self._socket.recvfrom(64)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            if data == NetworkConfig.TX_CSI_REQ_PAYLOAD:
+                self.stats['requests'] += 1
+                self._streaming = True
+                self._handle_csi_request(address)
+            elif data == NetworkConfig.TX_IP_BROADCAST_PAYLOAD:
+                self.stats['discovery'] += 1
+                self._schedule(_DISCOVERY_REPLY, address)
+            elif data == NetworkConfig.TX_STOP_REQ_PAYLOAD:
+                self._streaming = False
+                self._held_reply = None
+            elif data == NetworkConfig.TX_RECONNECT_PAYLOAD:
+                # The firmware restarts, start the replayed packets over
+                self._streaming = False
+                self._held_reply = None
+                self._packet_cycle = itertools.cycle(self._packets)
+
+    def _send_replies(self):
+        """Send the queued replies once they are due"""
+        while self._running:
+            with self._pending_cond:
+                if not self._pending:
+                    self._pending_cond.wait(NetworkConfig.RX_SOCKET_TIMEOUT)
+                    continue
+                send_time, _, payload, address = self._pending[0]
+                wait = send_time - time.perf_counter()
+                if wait > 0:
+                    self._pending_cond.wait(wait)
+                    continue
+                heapq.heappop(self._pending)
+
+            try:
+                self._socket.sendto(payload, address)
+                self.stats['sent'] += 1
+            except OSError as e:
+                self._logger.error(f'Error sending reply: {e}')
+
+
+def run_load_test(simulator: ESP32Simulator, intervals: list, duration: float = 5.0,
+                  max_loss: float = 5.0, transport: str = None) -> dict:
+    """
+    Drive a NetworkManager against the simulator at several TX intervals
+
+    Args:
+        simulator: Started simulator to test against
+        intervals: TX intervals in seconds to try
+        duration: Seconds to transmit for each interval
+        max_loss: Highest packet loss percentage considered sustainable
+        transport: Network manager to test, 'thread' or 'asyncio', NetworkConfig.TRANSPORT if None
+
+    Returns:
+        dict: Per-interval results and the highest sustainable packet rate. The CPU
+            usage and thread count include the simulator running in the same process.
+    """
+    from app.core.network_manager import create_network_manager
+
+    NetworkConfig.AP_CHECK_BYPASS = True
+    NetworkConfig.AP_BROADCAST_IP = simulator._address[0]
+    NetworkConfig.TX_PORT = simulator._address[1]
+    # Measure each interval as configured instead of the adapted rate
+    NetworkConfig.TX_ADAPTIVE = False
+    if transport:
+        NetworkConfig.TRANSPORT = transport
+
+    network_manager = create_network_manager()
+    if not network_manager.check_wifi_connection():
+        raise RuntimeError('Simulator was not discovered')
+    # Discovery runs on the receiver thread
+    deadline = time.monotonic() + NetworkConfig.DISCOVERY_BACKOFF_MAX
+    while not network_manager.check_esp32():
+        if time.monotonic() > deadline:
+            raise RuntimeError('Simulator was not discovered')
+        time.sleep(NetworkConfig.TX_CONNECT_INTERVAL)
+
+    processed = []
+    results = []
+    for interval in intervals:
+        NetworkConfig.TX_INTERVAL = interval
+        processed.clear()
+        network_manager.start_receiving(lambda data, tx_timestamp: processed.append(len(data)), False)
+        cpu_start = time.process_time()
+        network_manager._start_csi_transmission()
+        time.sleep(duration)
+        cpu_time = time.process_time() - cpu_start
+        threads = threading.active_count()
+
+        tx_count = network_manager._tx_packet_count
+        rx_count = network_manager.packet_count
+        loss = network_manager.packet_loss
+        network_manager.stop_transmitting()
+        network_manager.stop_listening()
+        # Let late replies drain before the next round
+        time.sleep(NetworkConfig.RX_SOCKET_TIMEOUT)
+
+        results.append({
+            'tx_interval': interval,
+            'tx_rate': round(tx_count / duration, 1),
+            'rx_rate': round(rx_count / duration, 1),
+            'processed': len(processed),
+            'packet_loss': loss,
+            'cpu_percent': round(cpu_time / duration * 100.0, 1),
+            'threads': threads,
+        })
+
+    network_manager.close()
+    sustainable = [r['rx_rate'] for r in results if r['packet_loss'] <= max_loss]
+    return {
+        'transport': NetworkConfig.TRANSPORT,
+        'results': results,
+        'max_sustainable_rate': max(sustainable) if sustainable else None,
+        'simulator': dict(simulator.stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate the ESP32 transceiver over local UDP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=NetworkConfig.TX_PORT)
+    parser.add_argument('--record', default=None, help='Recorded CSV file to replay instead of synthetic packets')
+    parser.add_argument('--max-rate', type=float, default=None, help='Maximum replies per second')
+    parser.add_argument('--loss', type=float, default=0.0, help='Reply drop probability')
+    parser.add_argument('--reorder', type=float, default=0.0, help='Reply reorder probability')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Maximum reply delay in seconds')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--serve', action='store_true', help='Serve until interrupted')
+    parser.add_argument('--load-test', action='store_true', help='Measure the sustainable packet rate')
+    parser.add_argument('--intervals', type=float, nargs='+',
+                        default=[0.016, 0.008, 0.004, 0.002, 0.001])
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per load test interval')
+    parser.add_argument('--transport', choices=['thread', 'asyncio'], default=None,
+                        help='Network manager to load test, NetworkConfig.TRANSPORT if omitted')
+    args = parser.parse_args()
+
+    packets = load_recorded_packets(args.record) if args.record else None
+    simulator = ESP32Simulator(packets, args.host, args.port, args.max_rate,
+                               args.loss, args.reorder, args.jitter, args.seed)
+    simulator.start()
+
+    try:
+        if args.load_test:
+            report = run_load_test(simulator, args.intervals, args.duration, transport=args.transport)
+            print(f'Transport: {report["transport"]}')
+            for result in report['results']:
+                print(f'TX interval {result["tx_interval"]}s: tx={result["tx_rate"]}/s '
+                      f'rx={result["rx_rate"]}/s loss={result["packet_loss"]}% '
+                      f'cpu={result["cpu_percent"]}% threads={result["threads"]}')
+            print(f'Max sustainable rate: {report["max_sustainable_rate"]} packets/s')
+        elif args.serve:
+            while True:
+                time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""
+Headless replay of recorded sessions through the live WripleSystem pipeline
+
+Usage:
+    python -m app.test.replay "WRIPLE_DATA_*.csv" --speed 0 --json replay.json
+"""
+
+import argparse
+import functools
+import json
+import time
+
+import numpy as np
+
+from app.core.file_manager import FileManager
+
+
+class StageTimer:
+    """Collects per-stage durations of wrapped methods"""
+
+    def __init__(self):
+        self._durations = {}
+
+    def wrap(self, owner, method_name: str, stage: str):
+        """
+        Replace an instance method with a timed version
+
+        Args:
+            owner: Instance that owns the method
+            method_name: Name of the method to wrap
+            stage: Stage name used in the report
+        """
+        method = getattr(owner, method_name)
+        durations = self._durations.setdefault(stage, [])
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                durations.append(time.perf_counter_ns() - start)
+
+        setattr(owner, method_name, timed)
+
+    def record(self, stage: str, elapsed_ns: int):
+        """Record a duration measured by the caller"""
+        self._durations.setdefault(stage, []).append(elapsed_ns)
+
+    def summary(self) -> dict:
+        """
+        Summarize the recorded durations
+
+        Returns:
+            dict: Count and microsecond statistics for each stage
+        """
+        summary = {}
+        for stage, durations in self._durations.items():
+            if not durations:
+                continue
+            us = np.asarray(durations, dtype=np.float64) / 1000.0
+            summary[stage] = {
+                'count': len(us),
+                'mean_us': round(float(us.mean()), 2),
+                'p50_us': round(float(np.percentile(us, 50)), 2),
+                'p95_us': round(float(np.percentile(us, 95)), 2),
+                'p99_us': round(float(np.percentile(us, 99)), 2),
+                'max_us': round(float(us.max()), 2),
+            }
+        return summary
+
+
+class ReplayEngine:
+    """
+    Feeds recorded packets through WripleSystem.parse_received_data and polls
+    the presence and radar status on the same schedule as the UI
+    """
+
+    def __init__(self, wriple_system, speed: float = 0.0,
+                 presence_interval: float = 1.0, radar_interval: float = 0.333,
+                 heatmap_interval: float = 0.1):
+        """
+        Args:
+            wriple_system: System to replay packets through
+            speed: Playback speed multiplier, 0 replays as fast as possible
+            presence_interval: Seconds of recording between presence polls
+            radar_interval: Seconds of recording between radar polls
+            heatmap_interval: Seconds of recording between amplitude heatmap polls
+        """
+        self._system = wriple_system
+        self._speed = speed
+        self._intervals = {
+            'presence': presence_interval,
+            'radar': radar_interval,
+            'heatmap': heatmap_interval,
+        }
+        self._timer = StageTimer()
+        self._wrap_stages()
+
+    def _wrap_stages(self):
+        """Time the pipeline stages of the system components"""
+        system = self._system
+        self._timer.wrap(system, 'parse_received_data', 'packet')
+        self._timer.wrap(system.csi_processor, 'queue_csi', 'queue_csi')
+        self._timer.wrap(system.rdm_processor, 'queue_rdm', 'queue_rdm')
+        self._timer.wrap(system.csi_processor, 'get_amps_heatmap_data', 'heatmap')
+        self._timer.wrap(system.csi_processor, 'get_amplitude_window', 'preprocess')
+        self._timer.wrap(system.model_manager, 'predict', 'inference')
+        self._timer.wrap(system.rdm_processor, 'estimate_distance', 'distance')
+        self._timer.wrap(system.rdm_processor, 'get_filtered_data', 'rdm_filter')
+
+    def _poll(self, kind: str, outputs: dict, label):
+        """Poll the system the same way the UI visualizers do"""
+        system = self._system
+        if kind == 'presence':
+            start = time.perf_counter_ns()
+            status = system.get_presence_status()
+            self._timer.record('presence_poll', time.perf_counter_ns() - start)
+            outputs['presence'].append((status['presence'], label))
+        elif kind == 'radar' and system.rdm_processor._rdm_queue:
+            outputs['distance'].append(system.get_radar_status()['distance'])
+            system.rdm_processor.get_filtered_data()
+        elif kind == 'heatmap' and system.csi_processor._amplitude_queue:
+            system.csi_processor.get_amps_heatmap_data()
+
+    def replay_file(self, filename: str) -> dict:
+        """
+        Replay a single recorded session
+
+        Args:
+            filename: CSV file name in the recording directory or a full path
+
+        Returns:
+            dict: Presence and distance outputs with throughput of the session
+        """
+        # Decode the whole file first so file parsing is not part of the measurement
+        packets = list(FileManager().read_recorded_packets(filename))
+        outputs = {'presence': [], 'distance': []}
+        if not packets:
+            return {'file': filename, 'packets': 0, **outputs}
+
+        system = self._system
+        system.stop_operations()
+        system._monitoring = True
+
+        first_timestamp = packets[0][0]
+        next_poll = {kind: first_timestamp + interval for kind, interval in self._intervals.items()}
+        wall_start = time.perf_counter()
+
+        for tx_timestamp, payload, label in packets:
+            if self._speed > 0:
+                delay = (tx_timestamp - first_timestamp) / self._speed - (time.perf_counter() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            system.parse_received_data(payload, tx_timestamp)
+
+            for kind, due in next_poll.items():
+                if tx_timestamp >= due:
+                    self._poll(kind, outputs, label)
+                    next_poll[kind] = due + self._intervals[kind]
+
+        elapsed = time.perf_counter() - wall_start
+        system.stop_operations()
+        duration = packets[-1][0] - first_timestamp
+        return {
+            'file': filename,
+            'packets': len(packets),
+            'elapsed_s': round(elapsed, 3),
+            'packets_per_s': round(len(packets) / elapsed, 1) if elapsed > 0 else None,
+            'realtime_factor': round(duration / elapsed, 2) if elapsed > 0 else None,
+            **outputs
+        }
+
+    def replay(self, filenames: list) -> dict:
+        """
+        Replay several recorded sessions and summarize them
+
+        Args:
+            filenames: CSV file names or full paths
+
+        Returns:
+            dict: Per-file results, presence accuracy against the recorded labels and stage timings
+        """
+        sessions = [self.replay_file(filename) for filename in filenames]
+
+        # Only 'Yes'/'No' outputs are predictions, the rest are calibration states
+        predictions = [(status, label) for s in sessions for status, label in s['presence']
+                       if status in ('Yes', 'No') and label is not None]
+        correct = sum((status == 'Yes') == bool(label) for status, label in predictions)
+        return {
+            'sessions': sessions,
+            'predictions': len(predictions),
+            'accuracy': round(correct / len(predictions), 4) if predictions else None,
+            'stages': self._timer.summary(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded sessions through WripleSystem')
+    parser.add_argument('pattern', help='CSV file or glob, relative to the record directory')
+    parser.add_argument('--speed', type=float, default=0.0,
+                        help='Speed multiplier, 0 replays as fast as possible')
+    parser.add_argument('--wait-model', type=float, default=30.0,
+                        help='Seconds to wait for the model to load')
+    parser.add_argument('--json', default=None, help='Write the full report to a JSON file')
+    args = parser.parse_args()
+
+    from app.core.dataset_loader import DatasetLoader
+    from app.main import WripleSystem
+
+    filenames = DatasetLoader().resolve_paths(args.pattern)
+    if not filenames:
+        raise SystemExit(f'No CSV files matched {args.pattern}')
+
+    system = WripleSystem()
+    deadline = time.monotonic() + args.wait_model
+    while not system.model_manager.model_loaded and time.monotonic() < deadline:
+        time.sleep(0.1)
+
+    report = ReplayEngine(system, speed=args.speed).replay(filenames)
+
+    for session in report['sessions']:
+        print(f'{session["file"]}: {session["packets"]} packets, '
+              f'{session.get("packets_per_s")} packets/s, {session.get("realtime_factor")}x real-time')
+    print(f'Accuracy: {report["accuracy"]} over {report["predictions"]} predictions')
+    for stage, stats in report['stages'].items():
+        print(f'{stage:>14}: n={stats["count"]} mean={stats["mean_us"]}us '
+              f'p95={stats["p95_us"]}us p99={stats["p99_us"]}us')
+
+    if args.json:
+        with open(args.json, mode='w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, default=str)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Low overhead latency instrumentation for the pipeline hot path
+
+Durations are recorded into fixed-bucket log-linear histograms owned by the
+recording thread, so recording never takes a lock. The histograms of every
+thread are merged when the statistics are read.
+"""
+
+import threading
+import time
+
+_SUB_BUCKET_BITS = 5                        # 32 buckets per power of two, about 3% precision
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS
+_MAX_VALUE_NS = (1 << 36) - 1               # About 68 seconds
+_SWEEP_INTERVAL = 64                        # Thread registrations between dead thread sweeps
+
+
+def _bucket_index(value: int) -> int:
+    """Get the bucket of a value in nanoseconds"""
+    msb = value.bit_length()
+    if msb <= _SUB_BUCKET_BITS:
+        return value
+    return ((msb - _SUB_BUCKET_BITS) << _SUB_BUCKET_BITS) + (value >> (msb - 1 - _SUB_BUCKET_BITS)) - _SUB_BUCKET_COUNT
+
+
+def _bucket_bounds(index: int) -> tuple[int, int]:
+    """Get the lowest and the first excluded value of a bucket"""
+    if index < _SUB_BUCKET_COUNT:
+        return index, index + 1
+    magnitude, sub_bucket = divmod(index, _SUB_BUCKET_COUNT)
+    shift = magnitude - 1
+    return (_SUB_BUCKET_COUNT + sub_bucket) << shift, (_SUB_BUCKET_COUNT + sub_bucket + 1) << shift
+
+
+class LatencyHistogram:
+    """HDR-style histogram of durations in nanoseconds with sparse bucket counts"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int):
+        """
+        Record a duration
+
+        Args:
+            value: Duration in nanoseconds
+        """
+        if value < 0:
+            value = 0
+        elif value > _MAX_VALUE_NS:
+            value = _MAX_VALUE_NS
+        index = _bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Add the counts of another histogram"""
+        for index, count in list(other.counts.items()):
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Get the value at a percentile
+
+        Args:
+            percent: Percentile between 0 and 100
+
+        Returns:
+            float: Midpoint of the bucket holding the percentile in nanoseconds
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, round(percent / 100.0 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = _bucket_bounds(index)
+                return min((low + high - 1) / 2.0, self.max)
+        return float(self.max)
+
+    def summary(self) -> dict:
+        """
+        Summarize the histogram
+
+        Returns:
+            dict: Count and microsecond statistics
+        """
+        return {
+            'count': self.count,
+            'mean_us': round(self.total / self.count / 1000.0, 2) if self.count else 0.0,
+            'p50_us': round(self.percentile(50) / 1000.0, 2),
+            'p90_us': round(self.percentile(90) / 1000.0, 2),
+            'p99_us': round(self.percentile(99) / 1000.0, 2),
+            'p999_us': round(self.percentile(99.9) / 1000.0, 2),
+            'max_us': round(self.max / 1000.0, 2),
+        }
+
+
+class _Span:
+    """Context manager recording its duration, cheaper than a generator based one"""
+
+    __slots__ = ('_owner', '_name', '_start')
+
+    def __init__(self, owner: 'Instrumentation', name: str):
+        self._owner = owner
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._owner.record(self._name, time.perf_counter_ns() - self._start)
+        return False
+
+
+class Instrumentation:
+    """Named latency spans recorded per thread and merged on read"""
+
+    def __init__(self):
+        self.enabled = True
+        self._local = threading.local()
+        # Histograms of every live thread as (thread, {span: histogram})
+        self._threads = []
+        # Histograms folded in from threads that have exited
+        self._retired = {}
+        self._registrations = 0
+        self._lock = threading.Lock()
+
+    def _thread_histograms(self) -> dict:
+        """Get the histograms of the current thread, registering it on first use"""
+        histograms = getattr(self._local, 'histograms', None)
+        if histograms is None:
+            histograms = self._local.histograms = {}
+            with self._lock:
+                self._threads.append((threading.current_thread(), histograms))
+                self._registrations += 1
+                # Short lived threads would otherwise pile up until the next read
+                if self._registrations % _SWEEP_INTERVAL == 0:
+                    self._sweep()
+        return histograms
+
+    def _sweep(self):
+        """Fold the histograms of exited threads into the retired histograms"""
+        live = []
+        for thread, histograms in self._threads:
+            if thread.is_alive():
+                live.append((thread, histograms))
+                continue
+            for name, histogram in histograms.items():
+                self._retired.setdefault(name, LatencyHistogram()).merge(histogram)
+        self._threads = live
+
+    def record(self, name: str, elapsed_ns: int):
+        """
+        Record a duration measured by the caller
+
+        Args:
+            name: Span name
+            elapsed_ns: Duration in nanoseconds
+        """
+        if not self.enabled:
+            return
+        histograms = self._thread_histograms()
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = LatencyHistogram()
+        histogram.record(elapsed_ns)
+
+    def span(self, name: str) -> '_Span':
+        """
+        Time the enclosed block
+
+        Args:
+            name: Span name
+
+        Returns:
+            _Span: Context manager recording the duration of the block
+        """
+        return _Span(self, name)
+
+    def merged(self) -> dict:
+        """
+        Merge the histograms of every thread
+
+        Returns:
+            dict: Merged histogram of each span
+        """
+        with self._lock:
+            self._sweep()
+            merged = {}
+            for name, histogram in self._retired.items():
+                merged.setdefault(name, LatencyHistogram()).merge(histogram)
+            for _, histograms in self._threads:
+                for name, histogram in list(histograms.items()):
+                    merged.setdefault(name, LatencyHistogram()).merge(histogram)
+        return merged
+
+    def summary(self) -> dict:
+        """
+        Summarize every span
+
+        Returns:
+            dict: Count and microsecond percentiles of each span
+        """
+        return {name: histogram.summary() for name, histogram in sorted(self.merged().items())}
+
+    def reset(self):
+        """Clear the recorded durations of every thread"""
+        with self._lock:
+            self._retired.clear()
+            for _, histograms in self._threads:
+                histograms.clear()
+
+
+# Shared instance used by the application
+instrumentation = Instrumentation()
+span = instrumentation.span
+record = instrumentation.record
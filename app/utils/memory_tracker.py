@@ -0,0 +1,207 @@
+"""
+Memory growth tracking with tracemalloc snapshots
+
+Snapshots are compared by allocation site to find what keeps growing during
+long sessions. Tracing slows down allocations, so it only runs once started.
+"""
+
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+from app.config.settings import MemoryConfig
+from app.utils.logger import setup_logger
+
+_GROUP_KEYS = ('lineno', 'filename', 'traceback')
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class MemoryTracker:
+    """Takes tracemalloc snapshots and reports the top growing allocation sites"""
+
+    def __init__(self):
+        self._baseline = None
+        self._baseline_time = None
+        self._watching = False
+        self._watch_event = threading.Event()
+        self._watch_thread = None
+        self._watch_interval = MemoryConfig.WATCH_INTERVAL
+        self._watch_history = deque(maxlen=MemoryConfig.WATCH_HISTORY)
+        self._lock = threading.Lock()
+        self._logger = setup_logger('MemoryTracker')
+
+    def start(self, frames: int = None):
+        """
+        Start tracing allocations
+
+        Args:
+            frames: Frames stored per allocation, MemoryConfig.TRACE_FRAMES if None
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or MemoryConfig.TRACE_FRAMES)
+            self._logger.info(f'Tracing allocations with {tracemalloc.get_traceback_limit()} frame(s)')
+
+    def stop(self):
+        """Stop the periodic mode and tracing, dropping the snapshots"""
+        self.stop_watch()
+        with self._lock:
+            self._baseline = None
+            self._baseline_time = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self._logger.info('Stopped tracing allocations')
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        """Take a snapshot without the tracer and import machinery allocations"""
+        return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+    def snapshot(self) -> dict:
+        """
+        Take a snapshot to compare the later ones against, starting tracing if needed
+
+        Returns:
+            dict: Traced memory of the snapshot
+        """
+        self.start()
+        snapshot = self._take_snapshot()
+        with self._lock:
+            self._baseline = snapshot
+            self._baseline_time = time.time()
+        return self.status
+
+    def _compare(self, new: tracemalloc.Snapshot, old: tracemalloc.Snapshot,
+                 group_by: str, top: int) -> list:
+        """Get the allocation sites that grew the most between two snapshots"""
+        sites = []
+        for stat in new.compare_to(old, group_by)[:top]:
+            if group_by == 'traceback':
+                site = [f'{frame.filename}:{frame.lineno}' for frame in stat.traceback]
+            elif group_by == 'filename':
+                site = stat.traceback[0].filename
+            else:
+                site = f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}'
+            sites.append({
+                'site': site,
+                'size_diff_kb': round(stat.size_diff / 1024.0, 2),
+                'size_kb': round(stat.size / 1024.0, 2),
+                'count_diff': stat.count_diff,
+                'count': stat.count,
+            })
+        return sites
+
+    def diff(self, group_by: str = 'lineno', top: int = None) -> dict:
+        """
+        Compare the current allocations against the last snapshot
+
+        Args:
+            group_by: Group allocations by 'lineno', 'filename' or 'traceback'
+            top: Number of allocation sites to report, MemoryConfig.TOP_COUNT if None
+
+        Returns:
+            dict: Top growing allocation sites, or None without a snapshot
+        """
+        if group_by not in _GROUP_KEYS:
+            raise ValueError(f'group_by must be one of {_GROUP_KEYS}')
+
+        with self._lock:
+            baseline, baseline_time = self._baseline, self._baseline_time
+        if baseline is None or not tracemalloc.is_tracing():
+            return None
+
+        current = self._take_snapshot()
+        current_size = sum(stat.size for stat in current.statistics('filename'))
+        baseline_size = sum(stat.size for stat in baseline.statistics('filename'))
+        return {
+            'elapsed_s': round(time.time() - baseline_time, 1),
+            'total_kb': round(current_size / 1024.0, 2),
+            'total_diff_kb': round((current_size - baseline_size) / 1024.0, 2),
+            'top': self._compare(current, baseline, group_by, top or MemoryConfig.TOP_COUNT),
+        }
+
+    def start_watch(self, interval: float = None):
+        """
+        Start logging the allocation growth between periodic snapshots
+
+        Args:
+            interval: Seconds between snapshots, MemoryConfig.WATCH_INTERVAL if None
+        """
+        if interval:
+            self._watch_interval = interval
+        if self._watching:
+            return
+        self.start()
+        self._watching = True
+        self._watch_event.clear()
+        self._watch_thread = threading.Thread(target=self._watch, name='MemoryWatch', daemon=True)
+        self._watch_thread.start()
+        self._logger.info(f'Watching memory growth every {self._watch_interval}s')
+
+    def stop_watch(self):
+        """Stop the periodic mode"""
+        if not self._watching:
+            return
+        self._watching = False
+        self._watch_event.set()
+        if self._watch_thread and self._watch_thread is not threading.current_thread():
+            self._watch_thread.join(timeout=5.0)
+        self._watch_thread = None
+
+    def _watch(self):
+        """Compare consecutive snapshots and log the top growers"""
+        previous = self._take_snapshot()
+        while not self._watch_event.wait(self._watch_interval):
+            try:
+                current = self._take_snapshot()
+                growers = self._compare(current, previous, 'lineno', MemoryConfig.TOP_COUNT)
+                traced, peak = tracemalloc.get_traced_memory()
+                self._watch_history.append({
+                    'timestamp': time.time(),
+                    'traced_kb': round(traced / 1024.0, 2),
+                    'peak_kb': round(peak / 1024.0, 2),
+                    'top': growers,
+                })
+
+                growing = [g for g in growers if g['size_diff_kb'] > 0][:3]
+                summary = ', '.join(f'{g["site"]} +{g["size_diff_kb"]}KB' for g in growing)
+                self._logger.info(f'Traced {traced / 1024.0:.1f}KB, top growth: {summary or "none"}')
+                previous = current
+            except Exception as e:
+                self._logger.error(f'Error comparing memory snapshots: {e}')
+
+    def watch_history(self, last: int = None) -> list:
+        """
+        Get the periodic snapshot results
+
+        Args:
+            last: Number of latest results to return, all if None
+
+        Returns:
+            list: Traced memory and top growers of each period from oldest to newest
+        """
+        history = list(self._watch_history)
+        return history[-last:] if last else history
+
+    @property
+    def status(self) -> dict:
+        """Get the tracing state and traced memory"""
+        tracing = tracemalloc.is_tracing()
+        traced, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            'tracing': tracing,
+            'frames': tracemalloc.get_traceback_limit() if tracing else 0,
+            'traced_kb': round(traced / 1024.0, 2),
+            'peak_kb': round(peak / 1024.0, 2),
+            'baseline_time': self._baseline_time,
+            'watching': self._watching,
+            'watch_interval': self._watch_interval,
+        }
+
+
+# Shared instance used by the application
+memory_tracker = MemoryTracker()
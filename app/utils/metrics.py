@@ -0,0 +1,312 @@
+"""
+Metrics registry rendered in the Prometheus text exposition format
+
+Counters and histograms are updated where the events happen. Values that
+already live in the components, such as queue depths, are read by callbacks
+when the metrics are scraped so the hot path is not touched.
+"""
+
+import bisect
+import gc
+import math
+import threading
+import time
+
+import psutil
+
+_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way the exposition format expects"""
+    if value is None or math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: dict) -> str:
+    """Format a label set as {name="value",...}"""
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class _Metric:
+    """Base of the metric types with a name, help text and label names"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, labelvalues: tuple) -> dict:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}')
+        return dict(zip(self.labelnames, labelvalues))
+
+    def samples(self) -> list:
+        """
+        Get the current samples
+
+        Returns:
+            list: Samples as (name suffix, labels, value)
+        """
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+
+    metric_type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        # Unlabelled counters are exposed from zero so rates work from the first scrape
+        self._values = {} if labelnames else {(): 0.0}
+
+    def inc(self, *labelvalues, amount: float = 1.0):
+        """
+        Increase the counter
+
+        Args:
+            labelvalues: Values of the label names in order
+            amount: Non-negative increment
+        """
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def samples(self) -> list:
+        with self._lock:
+            values = list(self._values.items())
+        return [('_total', self._labels(labelvalues), value) for labelvalues, value in values]
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down, either set directly or read from a callback.
+    A callback returns a number, or a dict of label value tuples to numbers.
+    """
+
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), function=None):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._function = function
+
+    def set(self, value: float, *labelvalues):
+        """
+        Set the gauge
+
+        Args:
+            value: New value
+            labelvalues: Values of the label names in order
+        """
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def set_function(self, function):
+        """Read the gauge from a callback when scraped"""
+        self._function = function
+
+    def samples(self) -> list:
+        if self._function is None:
+            with self._lock:
+                values = list(self._values.items())
+        else:
+            value = self._function()
+            values = list(value.items()) if isinstance(value, dict) else [((), value)]
+        return [('', self._labels(labelvalues), value) for labelvalues, value in values]
+
+
+class CallbackCounter(Gauge):
+    """Counter read from a callback when scraped, for totals kept elsewhere"""
+
+    metric_type = 'counter'
+
+    def samples(self) -> list:
+        return [('_total', labels, value) for _, labels, value in super().samples()]
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observations over fixed cumulative buckets, either observed
+    directly or read from a callback returning the bucket counts and the sum.
+    """
+
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, buckets: tuple, function=None):
+        super().__init__(name, documentation)
+        self._upper_bounds = sorted(buckets)
+        self._counts = [0] * (len(self._upper_bounds) + 1)
+        self._sum = 0.0
+        self._function = function
+
+    def observe(self, value: float):
+        """
+        Record an observation
+
+        Args:
+            value: Observed value
+        """
+        index = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def samples(self) -> list:
+        if self._function is None:
+            with self._lock:
+                counts = list(self._counts)
+                total = self._sum
+        else:
+            counts, total = self._function()
+
+        samples = []
+        cumulative = 0
+        for upper_bound, count in zip(self._upper_bounds + [math.inf], counts):
+            cumulative += count
+            samples.append(('_bucket', {'le': _format_value(upper_bound)}, cumulative))
+        samples.append(('_count', {}, cumulative))
+        samples.append(('_sum', {}, total))
+        return samples
+
+
+class LatencySummary(_Metric):
+    """Exposes the instrumentation span histograms as a summary per stage"""
+
+    metric_type = 'summary'
+    _QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+    def __init__(self, name: str, documentation: str, instrumentation):
+        super().__init__(name, documentation, ('stage',))
+        self._instrumentation = instrumentation
+
+    def samples(self) -> list:
+        samples = []
+        for stage, histogram in sorted(self._instrumentation.merged().items()):
+            for quantile in self._QUANTILES:
+                samples.append(('', {'stage': stage, 'quantile': str(quantile)},
+                                histogram.percentile(quantile * 100.0) / 1e9))
+            samples.append(('_count', {'stage': stage}, histogram.count))
+            samples.append(('_sum', {'stage': stage}, histogram.total / 1e9))
+        return samples
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Add a metric, replacing any metric with the same name so callbacks
+        follow the latest instance of a component
+
+        Args:
+            metric: Metric to add
+
+        Returns:
+            _Metric: The added metric
+        """
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """
+        Render every metric
+
+        Returns:
+            str: Metrics in the Prometheus text exposition format
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception:
+                # A failing callback should not take the whole scrape down
+                continue
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.metric_type}')
+            for suffix, labels, value in samples:
+                lines.append(f'{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    @property
+    def content_type(self) -> str:
+        """Get the HTTP content type of the rendered metrics"""
+        return _CONTENT_TYPE
+
+
+# Shared registry used by the application
+registry = MetricsRegistry()
+
+RX_PACKETS = registry.register(Counter('wriple_rx_packets', 'Packets received from the ESP32'))
+TX_PACKETS = registry.register(Counter('wriple_tx_packets', 'CSI request packets sent to the ESP32'))
+PARSE_FAILURES = registry.register(Counter('wriple_parse_failures', 'Packets the parser rejected', ('reason',)))
+CSI_LENGTH = registry.register(Histogram('wriple_csi_length', 'Number of I/Q values per CSI sample',
+                                         (128, 256, 384, 512)))
+
+# Updated from the gc callbacks, which must not take a metric lock: a collection can start while
+# the same thread holds one and allocates. CPython runs one collection at a time, so the callbacks
+# never race with each other and the scrape only reads these fields.
+_gc_start = {}
+_gc_pause_bounds = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+_gc_pause_counts = [0] * (len(_gc_pause_bounds) + 1)
+_gc_pause_sum = [0.0]
+_gc_collections = [0, 0, 0]
+
+GC_PAUSE = registry.register(Histogram('wriple_gc_pause_seconds', 'Garbage collection pause duration',
+                                       _gc_pause_bounds,
+                                       function=lambda: (list(_gc_pause_counts), _gc_pause_sum[0])))
+GC_COLLECTIONS = registry.register(CallbackCounter('wriple_gc_collections', 'Garbage collections', ('generation',),
+                                                   function=lambda: {(str(generation),): count for generation, count
+                                                                     in enumerate(_gc_collections)}))
+
+
+def _track_gc(phase: str, info: dict):
+    """Time garbage collection pauses from the gc callbacks"""
+    if phase == 'start':
+        _gc_start[threading.get_ident()] = time.perf_counter()
+        return
+    start = _gc_start.pop(threading.get_ident(), None)
+    if start is not None:
+        pause = time.perf_counter() - start
+        _gc_pause_counts[bisect.bisect_left(_gc_pause_bounds, pause)] += 1
+        _gc_pause_sum[0] += pause
+        _gc_collections[info.get('generation', 0)] += 1
+
+
+def register_process_metrics():
+    """Add process CPU, memory, thread and garbage collection metrics"""
+    process = psutil.Process()
+
+    def cpu_seconds():
+        times = process.cpu_times()
+        return times.user + times.system
+
+    registry.register(CallbackCounter('process_cpu_seconds', 'User and system CPU time of the process',
+                                      function=cpu_seconds))
+    registry.register(Gauge('process_resident_memory_bytes', 'Resident memory of the process',
+                            function=lambda: process.memory_info().rss))
+    registry.register(Gauge('process_threads', 'Threads of the process', function=process.num_threads))
+    if _track_gc not in gc.callbacks:
+        gc.callbacks.append(_track_gc)
@@ -1,5 +1,7 @@
 """Utility functions for parsing packet data from hardware devices"""
 
+from app.utils.metrics import CSI_LENGTH, PARSE_FAILURES
+
 @staticmethod
 def parse_csi_data(raw_data: bytes, ld2420_miss_count) -> list:
     """
@@ -12,15 +14,18 @@ def parse_csi_data(raw_data: bytes, ld2420_miss_count) -> list:
         list: Parsed CSI data components
     """
     try:
-        data_str = raw_data.decode('utf-8').strip()
+        # str() decodes any bytes-like object, including the pooled receive buffers
+        data_str = str(raw_data, 'utf-8').strip()
     except Exception as e:
         print(f'PACKET PARSER: Error decoding data - {e}')
+        PARSE_FAILURES.inc('decode')
         return None
 
     # Split using the section delimiter
     sections = [s.strip() for s in data_str.split('|')]
     if len(sections) != 3:
         print('PACKET PARSER: Incomplete data packet')
+        PARSE_FAILURES.inc('incomplete')
         return None
 
     # Parse Metadata
@@ -29,9 +34,11 @@ def parse_csi_data(raw_data: bytes, ld2420_miss_count) -> list:
     # Parse CSI
     raw_csi = [int(x) for x in sections[1].strip().split(' ')]
     raw_csi_length = len(raw_csi)
+    CSI_LENGTH.observe(raw_csi_length)
     # Ensure that the received raw data is from 802.11a/g and has LLTF, HT-LTF
     if raw_csi_length not in [256, 384]:
         print(f'PACKET PARSER: Invalid CSI length: {raw_csi_length}')
+        PARSE_FAILURES.inc('csi_length')
         raw_csi = None
 
     # Parse LD2420
@@ -63,3 +70,28 @@ def parse_csi_data(raw_data: bytes, ld2420_miss_count) -> list:
         ld2420_array[15], ld2420_array[16], ld2420_array[17],
         ld2420_array[18], ld2420_array[19]
     ]
+
+@staticmethod
+def encode_csi_data(rx_timestamp, rssi, bandwidth, channel, antenna, raw_csi, ld2420_rdm=None) -> bytes:
+    """
+    Encode CSI data into the packet format sent by the ESP32
+
+    Args:
+        rx_timestamp: ESP32 timestamp of the CSI sample
+        rssi: Received signal strength
+        bandwidth: Channel bandwidth
+        channel: Wi-Fi channel
+        antenna: Antenna index
+        raw_csi: List of I/Q values, or None for an invalid CSI sample
+        ld2420_rdm: 20 doppler rows of 16 gate values, or None if LD2420 data is missing
+
+    Returns:
+        bytes: Packet payload in the 'meta|csi|ld2420' format
+    """
+    meta = f'{rx_timestamp},{rssi},{bandwidth},{channel},{antenna}'
+    csi = ' '.join(map(str, raw_csi)) if raw_csi else '0'
+    if ld2420_rdm is None:
+        ld2420 = '!'
+    else:
+        ld2420 = ','.join(str(value) for row in ld2420_rdm for value in row)
+    return f'{meta}|{csi}|{ld2420}'.encode('utf-8')
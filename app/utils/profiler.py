@@ -0,0 +1,120 @@
+"""
+On-demand sampling profiler for the running process
+
+Stacks of every thread are sampled from sys._current_frames on a short lived
+thread, so nothing runs and nothing is hooked while no capture is active.
+The output is in the collapsed-stack format read by flamegraph.pl and speedscope.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from app.config.settings import ProfilerConfig
+from app.utils.logger import setup_logger
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a capture is requested while another one is running"""
+
+
+class SamplingProfiler:
+    """Captures stack samples of all threads for a fixed duration"""
+
+    def __init__(self):
+        self._capture_lock = threading.Lock()
+        self._base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self._frame_labels = {}
+        self._logger = setup_logger('SamplingProfiler')
+
+    def _frame_label(self, code) -> str:
+        """Get the flamegraph label of a code object"""
+        label = self._frame_labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(self._base_dir):
+                filename = os.path.relpath(filename, self._base_dir)
+            else:
+                filename = os.path.basename(filename)
+            # Semicolons separate the frames of a collapsed stack
+            label = f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+            self._frame_labels[code] = label
+        return label
+
+    def _sample(self, stacks: Counter, own_ident: int):
+        """Add one stack sample of every thread except the sampler"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            codes = []
+            while frame is not None and len(codes) < ProfilerConfig.MAX_DEPTH:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            thread_name = names.get(ident, f'thread-{ident}').replace(';', ':').replace(' ', '_')
+            stacks[(thread_name, tuple(reversed(codes)))] += 1
+
+    def capture(self, duration: float, interval: float = None) -> dict:
+        """
+        Sample the stacks of all threads for a duration
+
+        Args:
+            duration: Seconds to sample for, capped at ProfilerConfig.MAX_DURATION
+            interval: Seconds between samples, ProfilerConfig.SAMPLE_INTERVAL if None
+
+        Returns:
+            dict: Collapsed stacks text with the sample count and actual duration
+
+        Raises:
+            ProfilerBusyError: If another capture is running
+        """
+        if not self._capture_lock.acquire(blocking=False):
+            raise ProfilerBusyError('A profile capture is already running')
+
+        try:
+            duration = min(duration, ProfilerConfig.MAX_DURATION)
+            interval = interval or ProfilerConfig.SAMPLE_INTERVAL
+            stacks = Counter()
+            result = {}
+
+            # Sample from a dedicated thread so the caller's own stack is captured as well
+            def sample_loop():
+                own_ident = threading.get_ident()
+                samples = 0
+                start = time.perf_counter()
+                deadline = start + duration
+                next_sample = start
+                while next_sample < deadline:
+                    self._sample(stacks, own_ident)
+                    samples += 1
+                    next_sample += interval
+                    delay = next_sample - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                result['samples'] = samples
+                result['duration'] = round(time.perf_counter() - start, 3)
+
+            sampler = threading.Thread(target=sample_loop, name='ProfilerSampler', daemon=True)
+            sampler.start()
+            sampler.join()
+
+            lines = []
+            for (thread_name, codes), count in stacks.most_common():
+                frames = ';'.join(self._frame_label(code) for code in codes)
+                lines.append(f'{thread_name};{frames} {count}')
+
+            self._logger.info(f'Captured {result["samples"]} samples over {result["duration"]}s')
+            return {
+                'samples': result['samples'],
+                'duration': result['duration'],
+                'interval': interval,
+                'collapsed': '\n'.join(lines) + '\n',
+            }
+        finally:
+            self._capture_lock.release()
+
+
+# Shared instance used by the application
+profiler = SamplingProfiler()
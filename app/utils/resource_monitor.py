@@ -0,0 +1,195 @@
+"""Background sampler of the process resources"""
+
+import csv
+import io
+import sys
+import threading
+import time
+from collections import deque
+
+import psutil
+
+from app.config.settings import ResourceConfig
+from app.utils.logger import setup_logger
+
+
+def _total_cpu_time(process) -> float:
+    """Get the user and system CPU seconds of a process"""
+    times = process.cpu_times()
+    return getattr(times, 'user', 0.0) + getattr(times, 'system', 0.0)
+
+
+def _native_thread_name(tid: int) -> str:
+    """Get the OS name of a thread Python did not start, such as a TensorFlow worker, '' if unknown"""
+    if not sys.platform.startswith('linux'):
+        return ''
+    try:
+        with open(f'/proc/self/task/{tid}/comm') as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+
+class ResourceMonitor:
+    """
+    Samples the process resources on a background thread into a ring buffer.
+    Thread CPU is grouped by thread name so it can be matched with the pipeline
+    stages, and CPU of threads that exited between two samples is kept apart.
+    """
+
+    def __init__(self, inference_cpu=None, interval: float = None, history_size: int = None):
+        """
+        Args:
+            inference_cpu: Function returning the CPU seconds model inference spent on the
+                HTTP threads that called it, moved out of their group
+            interval: Seconds between samples, ResourceConfig.SAMPLE_INTERVAL if None
+            history_size: Samples kept, ResourceConfig.HISTORY_SIZE if None
+        """
+        self._inference_cpu = inference_cpu
+        self._interval = interval or ResourceConfig.SAMPLE_INTERVAL
+        self._history = deque(maxlen=history_size or ResourceConfig.HISTORY_SIZE)
+        self._groups = list(ResourceConfig.THREAD_GROUPS) + ['other', 'exited']
+
+        self._process = psutil.Process()
+        self._running = False
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._logger = setup_logger('ResourceMonitor')
+
+    def start(self, interval: float = None):
+        """
+        Start sampling in the background
+
+        Args:
+            interval: Seconds between samples, keeps the current interval if None
+        """
+        if interval:
+            self._interval = interval
+        if self._running:
+            return
+        self._running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='ResourceMonitor', daemon=True)
+        self._thread.start()
+        self._logger.info(f'Sampling every {self._interval}s')
+
+    def stop(self):
+        """Stop sampling, keeping the history"""
+        if not self._running:
+            return
+        self._running = False
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self._interval + 1.0)
+        self._thread = None
+        self._logger.info(f'Stopped with {len(self._history)} samples')
+
+    def _thread_group(self, name: str) -> str:
+        """Get the CPU group of a thread name"""
+        for group, prefixes in ResourceConfig.THREAD_GROUPS.items():
+            if name.startswith(prefixes):
+                return group
+        return 'other'
+
+    def _thread_cpu(self) -> dict:
+        """Get the CPU seconds of every live thread by native thread id"""
+        return {t.id: t.user_time + t.system_time for t in self._process.threads()}
+
+    def _run(self):
+        """Take a sample every interval"""
+        prev_time = time.perf_counter()
+        prev_cpu = _total_cpu_time(self._process)
+        prev_threads = self._thread_cpu()
+        prev_net = psutil.net_io_counters()
+        prev_ctx = self._process.num_ctx_switches()
+        prev_inference = self._inference_cpu() if self._inference_cpu else 0.0
+
+        while not self._stop_event.wait(self._interval):
+            try:
+                now = time.perf_counter()
+                dt = max(now - prev_time, 1e-9)
+                cpu = _total_cpu_time(self._process)
+                threads = self._thread_cpu()
+                net = psutil.net_io_counters()
+                ctx = self._process.num_ctx_switches()
+                inference = self._inference_cpu() if self._inference_cpu else 0.0
+
+                names = {t.native_id: t.name for t in threading.enumerate()}
+                group_cpu = dict.fromkeys(self._groups, 0.0)
+                for tid, thread_cpu in threads.items():
+                    delta = thread_cpu - prev_threads.get(tid, 0.0)
+                    name = names[tid] if tid in names else _native_thread_name(tid)
+                    group_cpu[self._thread_group(name)] += max(delta, 0.0)
+
+                # Inference runs inside the HTTP request threads
+                inference_delta = max(inference - prev_inference, 0.0)
+                group_cpu['inference'] += inference_delta
+                group_cpu['http'] = max(group_cpu['http'] - inference_delta, 0.0)
+                # Whatever the live threads do not account for was used by exited threads
+                group_cpu['exited'] = max((cpu - prev_cpu) - sum(group_cpu.values()), 0.0)
+
+                sample = {
+                    'timestamp': time.time(),
+                    'cpu_percent': round((cpu - prev_cpu) / dt * 100.0, 2),
+                    'rss_mb': round(self._process.memory_info().rss / (1024.0 ** 2), 2),
+                    'threads': self._process.num_threads(),
+                    'net_rx_kbps': round(max(net.bytes_recv - prev_net.bytes_recv, 0) / dt / 1024.0, 2),
+                    'net_tx_kbps': round(max(net.bytes_sent - prev_net.bytes_sent, 0) / dt / 1024.0, 2),
+                    'ctx_voluntary_per_s': round((ctx.voluntary - prev_ctx.voluntary) / dt, 1),
+                    'ctx_involuntary_per_s': round((ctx.involuntary - prev_ctx.involuntary) / dt, 1),
+                }
+                for group, group_seconds in group_cpu.items():
+                    sample[f'cpu_{group}_percent'] = round(group_seconds / dt * 100.0, 2)
+
+                with self._lock:
+                    self._history.append(sample)
+
+                prev_time, prev_cpu, prev_threads = now, cpu, threads
+                prev_net, prev_ctx, prev_inference = net, ctx, inference
+            except Exception as e:
+                self._logger.error(f'Error sampling resources: {e}')
+
+    def history(self, last: int = None) -> list:
+        """
+        Get the recorded samples
+
+        Args:
+            last: Number of latest samples to return, all if None
+
+        Returns:
+            list: Samples from oldest to newest, CPU in percent of one core
+        """
+        with self._lock:
+            samples = list(self._history)
+        return samples[-last:] if last else samples
+
+    def export_csv(self) -> str:
+        """
+        Export the recorded samples
+
+        Returns:
+            str: Samples in CSV format with a header row
+        """
+        samples = self.history()
+        columns = list(samples[0]) if samples else []
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(samples)
+        return output.getvalue()
+
+    def clear(self):
+        """Remove the recorded samples"""
+        with self._lock:
+            self._history.clear()
+
+    @property
+    def status(self) -> dict:
+        """Get the sampler state"""
+        return {
+            'running': self._running,
+            'interval': self._interval,
+            'samples': len(self._history),
+            'capacity': self._history.maxlen,
+        }
@@ -0,0 +1,247 @@
+"""Fixed-size rolling statistics updated in constant time per value"""
+
+import math
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class RollingStats:
+    """
+    Rolling mean and variance over the last values pushed, kept in a ring
+    buffer with running sums. Values can be scalars or arrays of a fixed shape,
+    in which case the statistics are element-wise.
+    """
+
+    def __init__(self, size: int, shape: tuple = ()):
+        """
+        Args:
+            size: Number of latest values the statistics cover
+            shape: Shape of each value, () for scalars
+        """
+        if size <= 0:
+            raise ValueError('size must be positive')
+        self._size = size
+        self._buffer = np.zeros((size,) + tuple(shape), dtype=np.float64)
+        self._sum = np.zeros(shape, dtype=np.float64)
+        self._sumsq = np.zeros(shape, dtype=np.float64)
+        self._index = 0
+        self._count = 0
+        self._latest = None
+        # Values are pushed from the concurrent packet and request threads
+        self._lock = threading.Lock()
+
+    def push(self, value):
+        """
+        Add a value, dropping the oldest one once full
+
+        Args:
+            value: Scalar or array of the configured shape
+        """
+        value = np.asarray(value, dtype=np.float64)
+        with self._lock:
+            old = self._buffer[self._index]
+            if self._count == self._size:
+                self._sum -= old
+                self._sumsq -= old * old
+            else:
+                self._count += 1
+
+            self._buffer[self._index] = value
+            self._sum += value
+            self._sumsq += value * value
+            self._latest = self._buffer[self._index]
+            self._index += 1
+
+            if self._index == self._size:
+                self._index = 0
+                # Resum once per lap so the floating point drift of the running sums stays bounded
+                self._sum = self._buffer.sum(axis=0)
+                self._sumsq = np.square(self._buffer).sum(axis=0)
+
+    def clear(self):
+        """Remove all values"""
+        with self._lock:
+            self._buffer.fill(0.0)
+            self._sum = np.zeros_like(self._sum)
+            self._sumsq = np.zeros_like(self._sumsq)
+            self._index = 0
+            self._count = 0
+            self._latest = None
+
+    @property
+    def mean(self):
+        """Get the mean of the values"""
+        with self._lock:
+            if not self._count:
+                return np.zeros_like(self._sum)
+            return self._sum / self._count
+
+    @property
+    def variance(self):
+        """Get the population variance of the values"""
+        with self._lock:
+            if not self._count:
+                return np.zeros_like(self._sum)
+            mean = self._sum / self._count
+            return np.maximum(self._sumsq / self._count - mean * mean, 0.0)
+
+    @property
+    def std(self):
+        """Get the population standard deviation of the values"""
+        return np.sqrt(self.variance)
+
+    @property
+    def latest(self):
+        """Get the last value pushed, None if empty"""
+        return self._latest
+
+    @property
+    def count(self) -> int:
+        """Get the number of values the statistics cover"""
+        return self._count
+
+    @property
+    def is_full(self) -> bool:
+        """Check if the statistics cover the whole size"""
+        return self._count == self._size
+
+
+class IntRingBuffer:
+    """
+    Ring buffer of integers such as RSSI readings with exact running sums over
+    the latest window, so the window mean, std, min, max and slope are O(1)
+    per value instead of a pass over the window per read.
+    """
+
+    def __init__(self, capacity: int, window: int):
+        """
+        Args:
+            capacity: Number of latest values kept
+            window: Number of latest values the statistics cover, at most capacity
+        """
+        if not 0 < window <= capacity:
+            raise ValueError('window must be positive and at most capacity')
+        self._capacity = capacity
+        self._window = window
+        self._buffer = [0] * capacity
+        self._index = 0     # Position of the next value
+        self._count = 0
+        self._total = 0     # Number of values ever pushed, the position of the next value
+        # Packets are parsed on concurrent threads and the running sums must stay consistent
+        self._lock = threading.Lock()
+        self._clear_sums()
+
+    def _clear_sums(self):
+        self._sum = 0
+        self._sumsq = 0
+        self._sum_xy = 0    # Sum of the values weighted by their position in the window
+        # Monotonic queues of (position, value) for the window min and max
+        self._min_queue = deque()
+        self._max_queue = deque()
+
+    def push(self, value: int):
+        """
+        Add a value, dropping the oldest one once full
+
+        Args:
+            value: Integer value
+        """
+        value = int(value)
+        with self._lock:
+            n = min(self._count, self._window)
+            if n == self._window:
+                # The oldest value of the window slides out and every position shifts down by one
+                out = self._buffer[(self._index - self._window) % self._capacity]
+                self._sum_xy += -self._sum + out + (n - 1) * value
+                self._sum += value - out
+                self._sumsq += value * value - out * out
+            else:
+                self._sum_xy += n * value
+                self._sum += value
+                self._sumsq += value * value
+
+            position = self._total
+            while self._min_queue and self._min_queue[-1][1] >= value:
+                self._min_queue.pop()
+            self._min_queue.append((position, value))
+            while self._max_queue and self._max_queue[-1][1] <= value:
+                self._max_queue.pop()
+            self._max_queue.append((position, value))
+            oldest = position - self._window + 1
+            if self._min_queue[0][0] < oldest:
+                self._min_queue.popleft()
+            if self._max_queue[0][0] < oldest:
+                self._max_queue.popleft()
+
+            self._buffer[self._index] = value
+            self._index = (self._index + 1) % self._capacity
+            self._count = min(self._count + 1, self._capacity)
+            self._total += 1
+
+    def clear(self):
+        """Remove all values"""
+        with self._lock:
+            self._index = 0
+            self._count = 0
+            self._total = 0
+            self._clear_sums()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def window_count(self) -> int:
+        """Get the number of values the statistics cover"""
+        return min(self._count, self._window)
+
+    @property
+    def latest(self) -> int:
+        """Get the last value pushed, None if empty"""
+        return self._buffer[self._index - 1] if self._count else None
+
+    @property
+    def mean(self) -> float:
+        """Get the mean of the window"""
+        n = self.window_count
+        return self._sum / n if n else 0.0
+
+    @property
+    def std(self) -> float:
+        """Get the population standard deviation of the window"""
+        n = self.window_count
+        if not n:
+            return 0.0
+        # Integer sums keep the numerator exact
+        return math.sqrt(max(n * self._sumsq - self._sum * self._sum, 0) / (n * n))
+
+    @property
+    def min(self) -> int:
+        """Get the minimum of the window, None if empty"""
+        return self._min_queue[0][1] if self._count else None
+
+    @property
+    def max(self) -> int:
+        """Get the maximum of the window, None if empty"""
+        return self._max_queue[0][1] if self._count else None
+
+    @property
+    def slope(self) -> float:
+        """Get the least squares slope of the window per value"""
+        n = self.window_count
+        if n < 2:
+            return 0.0
+        sum_x = n * (n - 1) // 2
+        sum_xx = (n - 1) * n * (2 * n - 1) // 6
+        return (n * self._sum_xy - sum_x * self._sum) / (n * sum_xx - sum_x * sum_x)
+
+    def features(self) -> dict:
+        """
+        Get all the window statistics
+
+        Returns:
+            dict: Mean, std, min, max and slope of the window
+        """
+        with self._lock:
+            return {'mean': self.mean, 'std': self.std, 'min': self.min, 'max': self.max, 'slope': self.slope}
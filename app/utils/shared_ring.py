@@ -0,0 +1,118 @@
+"""Ring buffers in shared memory written by one process and read by others"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_HEADER_DTYPE = np.int64
+_HEADER_SIZE = 8 * np.dtype(_HEADER_DTYPE).itemsize
+
+
+class SharedRing:
+    """
+    Ring buffer of fixed-shape records in shared memory. Every record is written
+    twice, at its slot and one lap further, so any window of up to a lap of the
+    latest records is a contiguous view that can be read without copying.
+
+    The number of records ever written is the sequence counter. The writer
+    stores a record before advancing it, and the reader checks it again after
+    using a window to detect that the writer lapped the records it read.
+    """
+
+    def __init__(self, slots: int, shape: tuple = (), dtype=np.float64, name: str = None):
+        """
+        Args:
+            slots: Records kept
+            shape: Shape of each record, () for scalars
+            dtype: Data type of the records
+            name: Shared memory block to attach to, a new block is created if None
+        """
+        self._slots = slots
+        self._shape = tuple(shape)
+        self._dtype = np.dtype(dtype)
+        record_size = int(np.prod(self._shape, dtype=np.int64)) * self._dtype.itemsize
+        size = _HEADER_SIZE + 2 * slots * record_size
+
+        self._owner = name is None
+        self._memory = shared_memory.SharedMemory(name=name, create=self._owner, size=size)
+        buffer = self._memory.buf
+        self._header = np.ndarray((_HEADER_SIZE // 8,), dtype=_HEADER_DTYPE, buffer=buffer)
+        self._data = np.ndarray((2 * slots,) + self._shape, dtype=self._dtype, buffer=buffer,
+                                offset=_HEADER_SIZE)
+        if self._owner:
+            self._header.fill(0)
+
+    @property
+    def spec(self) -> tuple:
+        """Get the arguments that attach another process to this ring"""
+        return self._slots, self._shape, self._dtype.str, self._memory.name
+
+    @classmethod
+    def attach(cls, spec: tuple) -> 'SharedRing':
+        """
+        Attach to a ring created by another process
+
+        Args:
+            spec: Ring spec from the creating process
+
+        Returns:
+            SharedRing: Ring sharing the same memory
+        """
+        slots, shape, dtype, name = spec
+        return cls(slots, shape, dtype, name)
+
+    def push(self, value):
+        """
+        Append a record, only called by the writing process
+
+        Args:
+            value: Record of the ring shape
+        """
+        total = int(self._header[0])
+        index = total % self._slots
+        self._data[index] = value
+        self._data[index + self._slots] = value
+        self._header[0] = total + 1
+
+    @property
+    def total(self) -> int:
+        """Get the number of records ever written, the sequence counter"""
+        return int(self._header[0])
+
+    def window(self, count: int, since: int = 0) -> tuple[np.ndarray, int]:
+        """
+        Get the latest records as a view of the shared memory
+
+        Args:
+            count: Most records to return, at most the number of slots
+            since: Sequence counter before which records are ignored
+
+        Returns:
+            tuple: (Records from oldest to newest, sequence counter the window ends at)
+        """
+        total = int(self._header[0])
+        available = max(min(count, total - since, self._slots), 0)
+        start = (total - available) % self._slots
+        return self._data[start:start + available], total
+
+    def consistent(self, total: int, count: int) -> bool:
+        """
+        Check that a window read at a sequence counter was not overwritten since
+
+        Args:
+            total: Sequence counter the window ended at
+            count: Number of records in the window
+
+        Returns:
+            bool: True if the writer has not lapped the window
+        """
+        # The record being written is not counted yet and may already overwrite the next slot
+        return int(self._header[0]) - total < self._slots - count
+
+    def close(self):
+        """Detach from the shared memory, freeing it if this process created it"""
+        self._header = None
+        self._data = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
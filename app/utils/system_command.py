@@ -92,23 +92,40 @@ def get_local_ip():
     return None
 
 @staticmethod
-def ping_esp32(esp32_ip, system):
+def get_udp_socket_drops(sock):
     """
-    Ping a host once.
+    Get the datagrams the kernel dropped on a UDP socket because its receive buffer was full
 
-    Args:
-        esp32_ip (str): IP address of the ESP32 to ping
-        system (str): Operating system name (e.g., 'Windows', 'Darwin', 'Linux')
+    Returns:
+        int: Drop count of the socket on Linux, None elsewhere
+    """
+    try:
+        inode = str(os.fstat(sock.fileno()).st_ino)
+        for path in ('/proc/net/udp', '/proc/net/udp6'):
+            if not os.path.exists(path):
+                continue
+            with open(path, mode='r', encoding='utf-8') as file:
+                next(file)
+                for line in file:
+                    fields = line.split()
+                    if len(fields) > 9 and fields[9] == inode:
+                        return int(fields[-1])
+    except Exception:
+        return None
+    return None
+
+@staticmethod
+def get_udp_rcvbuf_errors():
+    """
+    Get the UDP datagrams dropped system-wide because a receive buffer was full
 
     Returns:
-        bool: True if the host is reachable, False otherwise
+        int: RcvbufErrors of /proc/net/snmp on Linux, None elsewhere
     """
-    if system == 'Windows':
-        output = _run_cmd(['ping', '-n', '1', esp32_ip])
-        return 'TTL=' in output
-    if system in ('Linux', 'Darwin'):
-        if shutil.which('ping'):
-            output = _run_cmd(['ping', '-c', '1', esp32_ip])
-            return '1 received' in output or '1 packets received' in output
-        return False
-    return False
+    try:
+        with open('/proc/net/snmp', mode='r', encoding='utf-8') as file:
+            udp_lines = [line.split() for line in file if line.startswith('Udp:')]
+        header, values = udp_lines[0], udp_lines[1]
+        return int(values[header.index('RcvbufErrors')])
+    except Exception:
+        return None
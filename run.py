@@ -1,3 +1,4 @@
+import multiprocessing
 import socket
 import threading
 import time
@@ -49,12 +50,14 @@ def _find_port(host):
     return port
 
 if __name__ == '__main__':
+    # The ingest child process is spawned, a frozen build has to run its entry point instead of the app
+    multiprocessing.freeze_support()
     app = create_app()
     host = '127.0.0.1'
     port = _find_port(host)
     print(f'APP: http://{host}:{port}')
 
     server = create_server(app, host=host, port=port)
-    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread = threading.Thread(target=server.run, name='HTTPServer', daemon=True)
     server_thread.start()
     _setup_window()
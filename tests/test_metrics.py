@@ -0,0 +1,29 @@
+"""Regression tests of the metrics registry"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+# Collect on every allocation so a collection starts while a metric lock is held
+_RENDER_WITH_GC = '''
+import gc
+from app.utils.metrics import RX_PACKETS, register_process_metrics, registry
+register_process_metrics()
+gc.set_threshold(1)
+for _ in range(2000):
+    registry.render()
+    RX_PACKETS.inc()
+print(registry.render())
+'''
+
+
+def test_render_does_not_deadlock_on_gc():
+    """The gc callbacks must not take a lock the collecting thread already holds"""
+    # A subprocess so a deadlock fails on the timeout instead of hanging the test run
+    result = subprocess.run([sys.executable, '-c', _RENDER_WITH_GC], cwd=_ROOT,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert 'wriple_gc_pause_seconds_count' in result.stdout
+    assert 'wriple_gc_collections_total{generation="0"}' in result.stdout